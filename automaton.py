@@ -0,0 +1,618 @@
+from grammar import Grammar
+from lazy_imports import optional_import
+
+# Valor usado en la tabla de transiciones cuando no existe transición (estado muerto)
+DEAD = -1
+
+# Mínimo de cadenas por bloque para que avanzarlas juntas con NumPy en `accepts_batch`
+# compense el costo fijo de cada paso (con menos se recorren una por una)
+MIN_BATCH = 32
+
+# Máximo de estados de la construcción de subconjuntos en `compile_regular`. Puede
+# crecer exponencialmente (con "el símbolo k-ésimo desde el final es a" hay 2^k
+# subconjuntos; 131072 estados tardan 5,7 s); con 16384 estados compilar y
+# minimizar tarda unos 0,3 s. Por encima se abandona y el validador usa otro motor
+# (ver GrammarValidator._has_dfa)
+MAX_DFA_STATES = 20000
+
+
+class DFA:
+    """
+    Autómata finito determinista compilado a partir de una gramática regular.
+    Los estados se numeran de 0 a n-1 y la tabla de transiciones es una lista de
+    listas indexada por [estado][índice del símbolo].
+    """
+
+    def __init__(self, alphabet, transitions, accepting, start=0):
+        """
+        Constructor de la clase DFA.
+
+        :param alphabet: Lista de símbolos terminales (cada uno es un símbolo del alfabeto,
+                         aunque tenga varios caracteres).
+        :param transitions: Tabla [estado][símbolo] -> estado destino o DEAD.
+        :param accepting: Lista de booleanos que indica qué estados son finales.
+        :param start: Estado inicial.
+        """
+        self.alphabet = list(alphabet)
+        self.symbol_index = {sym: i for i, sym in enumerate(self.alphabet)}
+        self.transitions = transitions
+        self.accepting = accepting
+        self.start = start
+
+    @property
+    def num_states(self):
+        return len(self.transitions)
+
+    def step(self, state, symbol):
+        """
+        Retorna el estado alcanzado desde `state` leyendo `symbol`, o DEAD.
+        """
+        if state == DEAD:
+            return DEAD
+        index = self.symbol_index.get(symbol)
+        if index is None:
+            return DEAD
+        return self.transitions[state][index]
+
+    def accepts(self, symbols):
+        """
+        Indica si la secuencia de símbolos es aceptada por el autómata.
+        Una cadena de Python se recorre carácter a carácter.
+        """
+        state = self.start
+        table = self.transitions
+        index_of = self.symbol_index
+        for symbol in symbols:
+            index = index_of.get(symbol)
+            if index is None:
+                return False
+            state = table[state][index]
+            if state == DEAD:
+                return False
+        return self.accepting[state]
+
+    def accepts_ids(self, ids):
+        """
+        Igual que `accepts`, pero recibe índices de símbolo del alfabeto (para un DFA
+        compilado desde una gramática coinciden con los identificadores de token).
+        """
+        state = self.start
+        table = self.transitions
+        for index in ids:
+            state = table[state][index]
+            if state == DEAD:
+                return False
+        return self.accepting[state]
+
+    def accepts_batch(self, sequences, chunk_size=4096):
+        """
+        Valida un lote de cadenas a la vez.
+        Con NumPy disponible todas las cadenas avanzan simultáneamente por la tabla
+        de transiciones (ver `accepts_batch`); sin NumPy se valida una por una.
+
+        :return: Lista de booleanos en el mismo orden que `sequences`.
+        """
+        return accepts_batch(self, sequences, chunk_size)
+
+    def complete(self):
+        """
+        Retorna un autómata equivalente en el que todas las transiciones están
+        definidas, agregando un estado sumidero si hace falta.
+        """
+        if all(t != DEAD for row in self.transitions for t in row):
+            return self
+        sink = self.num_states
+        transitions = [[sink if t == DEAD else t for t in row] for row in self.transitions]
+        transitions.append([sink] * len(self.alphabet))
+        return DFA(self.alphabet, transitions, self.accepting + [False], self.start)
+
+    def minimize(self):
+        """
+        Minimiza el autómata con el algoritmo de Hopcroft (O(n·k·log n)).
+        El estado sumidero del resultado se elimina y sus transiciones quedan como DEAD.
+        """
+        dfa = self.complete()
+        n = dfa.num_states
+        k = len(dfa.alphabet)
+
+        # Transiciones inversas por símbolo
+        inverse = [[[] for _ in range(n)] for _ in range(k)]
+        for q, row in enumerate(dfa.transitions):
+            for a, target in enumerate(row):
+                inverse[a][target].append(q)
+
+        finals = {q for q in range(n) if dfa.accepting[q]}
+        others = set(range(n)) - finals
+        partition = [block for block in (finals, others) if block]
+        block_of = [0] * n
+        for index, block in enumerate(partition):
+            for q in block:
+                block_of[q] = index
+        pending = set(range(len(partition)))
+
+        while pending:
+            splitter = list(partition[pending.pop()])
+            for a in range(k):
+                predecessors = set()
+                for q in splitter:
+                    predecessors.update(inverse[a][q])
+                if not predecessors:
+                    continue
+                touched = {}
+                for q in predecessors:
+                    touched.setdefault(block_of[q], []).append(q)
+                for block, members in touched.items():
+                    if len(members) == len(partition[block]):
+                        continue
+                    new_block = set(members)
+                    partition[block] -= new_block
+                    new_index = len(partition)
+                    partition.append(new_block)
+                    for q in new_block:
+                        block_of[q] = new_index
+                    if block in pending or len(new_block) <= len(partition[block]):
+                        pending.add(new_index)
+                    else:
+                        pending.add(block)
+
+        # Detecta el bloque muerto (no final y que solo transita a sí mismo)
+        dead_blocks = set()
+        for index, block in enumerate(partition):
+            q = next(iter(block))
+            if not dfa.accepting[q] and all(block_of[t] == index for t in dfa.transitions[q]):
+                dead_blocks.add(index)
+
+        # Renumera los bloques en orden BFS desde el estado inicial
+        start_block = block_of[dfa.start]
+        if start_block in dead_blocks:
+            return DFA(dfa.alphabet, [[DEAD] * k], [False], 0)
+        numbering = {start_block: 0}
+        order = [start_block]
+        for block in order:
+            q = next(iter(partition[block]))
+            for target in dfa.transitions[q]:
+                target_block = block_of[target]
+                if target_block not in numbering and target_block not in dead_blocks:
+                    numbering[target_block] = len(order)
+                    order.append(target_block)
+
+        transitions = []
+        accepting = []
+        for block in order:
+            q = next(iter(partition[block]))
+            transitions.append([numbering.get(block_of[t], DEAD) for t in dfa.transitions[q]])
+            accepting.append(dfa.accepting[q])
+        return DFA(dfa.alphabet, transitions, accepting, 0)
+
+    def __str__(self):
+        lines = [f"Estados: {self.num_states}, inicial: {self.start}"]
+        for q, row in enumerate(self.transitions):
+            marker = "*" if self.accepting[q] else " "
+            moves = ", ".join(f"{sym}->{t}" for sym, t in zip(self.alphabet, row) if t != DEAD)
+            lines.append(f" {marker}{q}: {moves}")
+        return "\n".join(lines)
+
+
+def is_right_linear(grammar: Grammar):
+    """
+    Indica si todas las producciones tienen la forma  A -> t1 ... tk [B]  (k >= 0).
+    """
+    for prods in grammar.get_productions().values():
+        for prod in prods:
+            if any(grammar.is_nonterminal(sym) for sym in prod[:-1]):
+                return False
+    return True
+
+
+def is_left_linear(grammar: Grammar):
+    """
+    Indica si todas las producciones tienen la forma  A -> [B] t1 ... tk  (k >= 0).
+    """
+    for prods in grammar.get_productions().values():
+        for prod in prods:
+            if any(grammar.is_nonterminal(sym) for sym in prod[1:]):
+                return False
+    return True
+
+
+def _components(grammar, productions):
+    """
+    Componentes fuertemente conexas del grafo "A usa B" entre no terminales
+    (algoritmo de Tarjan, iterativo). Retorna (componente de cada no terminal,
+    lista de componentes, indicador de recursividad de cada componente).
+    """
+    graph = {left: sorted({sym for prod in prods for sym in prod if sym in productions})
+             for left, prods in productions.items()}
+    index_of, low, on_stack = {}, {}, set()
+    stack, components = [], []
+    component_of = {}
+    counter = 0
+    for root in graph:
+        if root in index_of:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child = work.pop()
+            if child == 0:
+                index_of[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+            neighbors = graph[node]
+            if child < len(neighbors):
+                work.append((node, child + 1))
+                nxt = neighbors[child]
+                if nxt not in index_of:
+                    work.append((nxt, 0))
+                elif nxt in on_stack:
+                    low[node] = min(low[node], index_of[nxt])
+                continue
+            # Todos los vecinos procesados: se propaga low al padre y se cierra la componente
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component_of[member] = len(components)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    recursive = [len(component) > 1 or component[0] in graph[component[0]] for component in components]
+    return component_of, components, recursive
+
+
+def _component_side(component, productions):
+    """
+    Indica si una componente recursiva es lineal por la derecha ("right") o por la
+    izquierda ("left") respecto de sus propios no terminales, o None si no es ninguna.
+    """
+    members = set(component)
+    right = left = True
+    for name in component:
+        for prod in productions[name]:
+            positions = [i for i, sym in enumerate(prod) if sym in members]
+            if len(positions) > 1:
+                return None
+            if positions:
+                right = right and positions[0] == len(prod) - 1
+                left = left and positions[0] == 0
+    return "right" if right else "left" if left else None
+
+
+def regular_form(grammar: Grammar):
+    """
+    Detecta si la gramática genera un lenguaje regular por su forma:
+     - "right-linear": todas las producciones son  A -> t1 ... tk [B].
+     - "left-linear": todas las producciones son  A -> [B] t1 ... tk.
+     - "non-self-embedding": cada grupo de no terminales mutuamente recursivos es
+       lineal (por la derecha o por la izquierda) respecto de sí mismo, por lo que
+       ningún no terminal deriva  α A β  con α y β no vacíos.
+    Retorna None si no se cumple ninguna (la gramática puede ser regular igual,
+    pero decidirlo en general no es posible).
+    """
+    if is_right_linear(grammar):
+        return "right-linear"
+    if is_left_linear(grammar):
+        return "left-linear"
+    productions = grammar.get_productions()
+    _, components, recursive = _components(grammar, productions)
+    for component, is_recursive in zip(components, recursive):
+        if is_recursive and _component_side(component, productions) is None:
+            return None
+    return "non-self-embedding"
+
+
+def _strongly_regular_nfa(grammar, max_states=200000):
+    """
+    Construye un AFN con transiciones ε para una gramática sin autoincrustación
+    (construcción de Nederhof). Cada tarea (q0, α, q1) agrega al autómata un
+    fragmento que va de q0 a q1 leyendo las cadenas derivadas de α:
+     - α de varios símbolos se parte en el primero y el resto con un estado intermedio;
+     - un terminal es una transición;
+     - un no terminal no recursivo se expande con cada una de sus producciones;
+     - un no terminal de una componente recursiva instancia la componente entera con
+       un estado por no terminal, conectado por la izquierda o por la derecha según
+       el tipo de la componente.
+    Retorna (número de estados, inicial, final, transiciones, transiciones ε).
+
+    :raises ValueError: Si la gramática tiene autoincrustación o el autómata supera
+                        `max_states` estados.
+    """
+    productions = grammar.get_productions()
+    component_of, components, recursive = _components(grammar, productions)
+    sides = [_component_side(c, productions) if r else None for c, r in zip(components, recursive)]
+    if any(r and side is None for r, side in zip(recursive, sides)):
+        raise ValueError("La gramática tiene autoincrustación: no se puede convertir a un autómata.")
+
+    moves = {}
+    epsilon = {}
+    count = 2
+    start, final = 0, 1
+    tasks = [(start, (grammar.start,), final)]
+    while tasks:
+        if count > max_states:
+            raise ValueError(f"El autómata de la gramática supera {max_states} estados.")
+        q0, symbols, q1 = tasks.pop()
+        if not symbols:
+            epsilon.setdefault(q0, set()).add(q1)
+            continue
+        if len(symbols) > 1:
+            middle = count
+            count += 1
+            tasks.append((q0, symbols[:1], middle))
+            tasks.append((middle, symbols[1:], q1))
+            continue
+        sym = symbols[0]
+        if sym not in productions:
+            if not grammar.is_nonterminal(sym):
+                moves.setdefault((q0, sym), set()).add(q1)
+            continue
+        c = component_of[sym]
+        if not recursive[c]:
+            for prod in productions[sym]:
+                tasks.append((q0, tuple(prod), q1))
+            continue
+        members = components[c]
+        state = {name: count + k for k, name in enumerate(members)}
+        count += len(members)
+        for name in members:
+            for prod in productions[name]:
+                if sides[c] == "right":
+                    if prod and prod[-1] in state:
+                        tasks.append((state[name], tuple(prod[:-1]), state[prod[-1]]))
+                    else:
+                        tasks.append((state[name], tuple(prod), q1))
+                else:
+                    if prod and prod[0] in state:
+                        tasks.append((state[prod[0]], tuple(prod[1:]), state[name]))
+                    else:
+                        tasks.append((q0, tuple(prod), state[name]))
+        if sides[c] == "right":
+            epsilon.setdefault(q0, set()).add(state[sym])
+        else:
+            epsilon.setdefault(state[sym], set()).add(q1)
+    return count, start, final, moves, epsilon
+
+
+def _right_linear_nfa(grammar):
+    """
+    Construye un AFN con transiciones ε a partir de una gramática lineal por la derecha.
+    Retorna (número de estados, inicial, final, transiciones, transiciones ε).
+    Cada producción debe tener la forma  A -> t1 ... tk [B]  con k >= 0.
+    """
+    productions = grammar.get_productions()
+    state_of = {}
+
+    def state(name):
+        if name not in state_of:
+            state_of[name] = len(state_of)
+        return state_of[name]
+
+    start = state(grammar.start)
+    final = state(None)
+    moves = {}      # (estado, terminal) -> conjunto de destinos
+    epsilon = {}    # estado -> conjunto de destinos por ε
+    extra = 0
+
+    for left, prods in productions.items():
+        origin = state(left)
+        for prod in prods:
+            target_name = None
+            symbols = prod
+            if prod and grammar.is_nonterminal(prod[-1]):
+                target_name = prod[-1]
+                symbols = prod[:-1]
+            for sym in symbols:
+                if grammar.is_nonterminal(sym):
+                    raise ValueError(
+                        f"La producción {left} -> {' '.join(prod)} no es lineal por la derecha.")
+            target = state(target_name) if target_name is not None else final
+            current = origin
+            for i, sym in enumerate(symbols):
+                if i == len(symbols) - 1:
+                    nxt = target
+                else:
+                    nxt = state(("__intermedio__", extra))
+                    extra += 1
+                moves.setdefault((current, sym), set()).add(nxt)
+                current = nxt
+            if not symbols:
+                epsilon.setdefault(origin, set()).add(target)
+
+    return len(state_of), start, final, moves, epsilon
+
+
+def accepts_at_end(productions, state):
+    """
+    Regla de aceptación al terminar la entrada cuando una gramática regular se
+    recorre por sus producciones (A -> a B | a | ε), la misma del AFN de
+    `_right_linear_nfa`: se acepta si el último terminal se consumió con una
+    producción A -> a (estado None, FINAL) o si el estado alcanzado tiene una
+    producción vacía. La comparten el validador y el generador de cadenas.
+    """
+    return state is None or any(not prod for prod in productions.get(state, ()))
+
+
+def _epsilon_closure(states, epsilon):
+    closure = set(states)
+    stack = list(states)
+    while stack:
+        q = stack.pop()
+        for t in epsilon.get(q, ()):
+            if t not in closure:
+                closure.add(t)
+                stack.append(t)
+    return frozenset(closure)
+
+
+def compile_regular(grammar: Grammar, minimize=True, max_states=MAX_DFA_STATES):
+    """
+    Compila una gramática regular a un DFA mínimo mediante construcción de
+    subconjuntos y minimización de Hopcroft. Además de las gramáticas lineales por
+    la derecha acepta las lineales por la izquierda y, en general, las gramáticas
+    sin autoincrustación (ver `regular_form`), aunque se declaren de tipo 2.
+
+    :param grammar: Instancia de Grammar.
+    :param minimize: Si es False se retorna el DFA de subconjuntos sin minimizar.
+    :param max_states: Máximo de estados del DFA de subconjuntos (None: sin límite).
+    :return: Instancia de DFA.
+    :raises ValueError: Si la gramática no tiene una forma regular reconocible o el
+                        DFA supera `max_states` estados.
+    """
+    if is_right_linear(grammar):
+        _, start, final, moves, epsilon = _right_linear_nfa(grammar)
+    else:
+        _, start, final, moves, epsilon = _strongly_regular_nfa(grammar)
+    alphabet = sorted(grammar.get_terminals())
+
+    by_state = {}
+    for (q, sym), targets in moves.items():
+        by_state.setdefault(q, []).append((sym, targets))
+
+    initial = _epsilon_closure({start}, epsilon)
+    ids = {initial: 0}
+    order = [initial]
+    transitions = []
+    accepting = []
+    for subset in order:
+        buckets = {}
+        for q in subset:
+            for sym, targets in by_state.get(q, ()):
+                buckets.setdefault(sym, set()).update(targets)
+        row = [DEAD] * len(alphabet)
+        for a, sym in enumerate(alphabet):
+            targets = buckets.get(sym)
+            if not targets:
+                continue
+            closure = _epsilon_closure(targets, epsilon)
+            if closure not in ids:
+                if max_states is not None and len(order) >= max_states:
+                    raise ValueError(f"El autómata de la gramática supera {max_states} estados.")
+                ids[closure] = len(order)
+                order.append(closure)
+            row[a] = ids[closure]
+        transitions.append(row)
+        accepting.append(final in subset)
+
+    dfa = DFA(alphabet, transitions, accepting, 0)
+    return dfa.minimize() if minimize else dfa
+
+
+def _encode_batch(dfa, sequences, unknown):
+    """
+    Convierte las secuencias en un arreglo plano con los índices de símbolo de
+    todas ellas (una tras otra) y un arreglo con la longitud de cada una.
+    Si todos los símbolos del alfabeto son de un carácter y las secuencias son
+    cadenas, la conversión se hace en bloque sobre los puntos de código UTF-32;
+    en otro caso se recorre símbolo a símbolo. Los símbolos fuera del alfabeto
+    se codifican como `unknown`.
+    """
+    np = optional_import("numpy")
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    if all(len(sym) == 1 for sym in dfa.alphabet):
+        try:
+            text = "".join(sequences)  # TypeError si alguna secuencia no es una cadena
+        except TypeError:
+            text = None
+        if text is not None:
+            try:  # Un byte por carácter si todos son Latin-1
+                codes = np.frombuffer(text.encode("latin-1"), dtype=np.uint8)
+            except UnicodeEncodeError:
+                codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+            # Tabla densa punto de código -> índice; la última entrada captura lo desconocido
+            top = max((ord(sym) for sym in dfa.alphabet), default=0) + 1
+            lookup = np.full(max(top + 1, 256), unknown, dtype=np.intp)
+            for i, sym in enumerate(dfa.alphabet):
+                lookup[ord(sym)] = i
+            return lookup[codes if codes.dtype == np.uint8 else np.minimum(codes, top)], lengths
+    index_of = dfa.symbol_index
+    codes = np.fromiter((index_of.get(sym, unknown) for seq in sequences for sym in seq),
+                        dtype=np.intp, count=int(lengths.sum()))
+    return codes, lengths
+
+
+def accepts_batch(dfa, sequences, chunk_size=4096):
+    """
+    Kernel de pertenencia por lotes sobre la tabla de transiciones del DFA.
+
+    Todas las cadenas se codifican de una vez en un arreglo plano, se ordenan por
+    longitud y se agrupan en bloques de hasta `chunk_size`. Como el bloque está
+    ordenado, las cadenas que siguen activas en el paso j son un sufijo del bloque:
+    en cada paso ese sufijo toma su símbolo (un puntero por cadena sobre el arreglo
+    plano) y avanza su estado con una suma y una indexación de NumPy hechas en el
+    lugar, sin matriz rellenada ni máscaras. La tabla guarda los estados ya
+    multiplicados por el ancho de fila.
+
+    Cada paso tiene un costo fijo de unos microsegundos: los bloques de menos de
+    MIN_BATCH cadenas (pocas cadenas muy largas) se recorren una por una.
+
+    :param dfa: Instancia de DFA.
+    :param sequences: Secuencia de cadenas (o listas de símbolos).
+    :param chunk_size: Número máximo de cadenas por bloque.
+    :return: Lista de booleanos.
+    """
+    sequences = list(sequences)
+    np = optional_import("numpy")  # NumPy es opcional: sin él se usa el recorrido por cadena
+    if np is None or len(sequences) < MIN_BATCH:
+        return [dfa.accepts(seq) for seq in sequences]
+
+    k = len(dfa.alphabet)
+    n = dfa.num_states
+    unknown = k
+    sink = n
+    stride = k + 1
+
+    # Tabla completa: estados + sumidero; columnas: símbolos + desconocido.
+    # Cada entrada es el estado destino multiplicado por `stride` (posición de su fila)
+    table = np.full((n + 1, stride), sink, dtype=np.intp)
+    if n:
+        table[:n, :k] = np.asarray(dfa.transitions, dtype=np.intp).reshape(n, k)
+    table[table == DEAD] = sink
+    flat_table = (table * stride).ravel()
+    accepting = np.zeros(n + 1, dtype=bool)
+    accepting[:n] = dfa.accepting
+
+    codes, lengths = _encode_batch(dfa, sequences, unknown)
+    offsets = np.zeros(len(sequences), dtype=np.intp)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    order = np.argsort(lengths, kind="stable")
+    results = np.zeros(len(sequences), dtype=bool)
+    scalar_table = None
+
+    for begin in range(0, len(order), chunk_size):
+        indices = order[begin:begin + chunk_size]
+        chunk_lengths = lengths[indices]
+        chunk_offsets = offsets[indices]
+        count = len(indices)
+        if count < MIN_BATCH:
+            if scalar_table is None:
+                scalar_table = flat_table.tolist()
+            finals = []
+            for offset, length in zip(chunk_offsets.tolist(), chunk_lengths.tolist()):
+                state = dfa.start * stride
+                for code in codes[offset:offset + length].tolist():
+                    state = scalar_table[state + code]
+                finals.append(state // stride)
+            results[indices] = accepting[finals]
+            continue
+
+        states = np.full(count, dfa.start * stride, dtype=np.intp)
+        symbols = np.empty(count, dtype=np.intp)
+        positions = chunk_offsets.copy()  # Posición del próximo símbolo de cada cadena
+        # Primera cadena con longitud mayor que j, para cada paso j
+        firsts = np.searchsorted(chunk_lengths, np.arange(int(chunk_lengths[-1])), side="right")
+        for first in firsts.tolist():
+            active = positions[first:]
+            column = symbols[first:]
+            row = states[first:]
+            codes.take(active, out=column)
+            active += 1
+            column += row
+            flat_table.take(column, out=row)
+        results[indices] = accepting[states // stride]
+
+    return results.tolist()
@@ -0,0 +1,194 @@
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+
+from grammar import Grammar
+from automaton import compile_regular
+from cyk import BitsetCYK
+from earley import EarleyRecognizer
+from chart_store import SPILL_THRESHOLD
+from lazy_imports import optional_import
+import valiant
+
+# Gramática ambigua y densa: todas las celdas del diagrama tienen no terminales,
+# por lo que es el peor caso para el diagrama CYK
+DENSE_GRAMMAR = """type: 2
+start: S
+S -> S S | a | S b S"""
+
+# Gramática no regular ni LL(1) para la que Earley es lineal: sirve para medir la
+# memoria del diagrama con entradas muy largas (a^k b^k)
+LARGE_GRAMMAR = """type: 2
+start: S
+S -> a S b | a b"""
+
+# Gramática regular cuyo DFA no tiene estado muerto alcanzable con a y b: las
+# cadenas aleatorias se recorren completas, sin cortes tempranos
+BATCH_GRAMMAR = """type: 3
+start: S
+S -> a A | b | b S
+A -> a S | b A | a"""
+
+
+def _measure(function, *args):
+    """
+    Ejecuta la función y retorna (resultado, segundos transcurridos).
+    """
+    begin = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - begin
+
+
+def _peak_rss():
+    """
+    Memoria residente máxima del proceso en MiB, o None si el sistema no la informa
+    (el módulo resource no existe en Windows).
+    """
+    resource = optional_import("resource")
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la informa en KiB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _isolated(function, *args):
+    """
+    Ejecuta la función en un proceso nuevo, para que la memoria residente máxima
+    medida corresponda solo a esa ejecución.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(function, args)
+
+
+def _format_rss(peak):
+    return f"{peak:.1f}" if peak is not None else "-"
+
+
+def _cfg_case(kind, grammar_text, n):
+    """
+    Construye el reconocedor indicado y mide una entrada de n símbolos "a". El de
+    matrices se mide sin su límite de memoria (valiant.MAX_TABLE_BYTES).
+    Retorna (resultado, segundos, MiB residentes máximos).
+    """
+    grammar = Grammar.from_text(grammar_text)
+    recognizer = BitsetCYK(grammar) if kind == "cyk" else valiant.ValiantRecognizer(grammar, max_bytes=None)
+    result, seconds = _measure(recognizer.recognize, "a" * n)
+    return result, seconds, _peak_rss()
+
+
+def bench_cfg(lengths, grammar_text=DENSE_GRAMMAR):
+    """
+    Compara el reconocedor CYK bit-paralelo con el de multiplicación de matrices
+    para entradas de longitud creciente e informa el punto de cruce. Cada medición
+    se hace en un proceso aparte e informa también la memoria residente máxima.
+    """
+    if valiant.np is None:
+        print("NumPy no está instalado: se omite la comparación con el reconocedor de matrices.")
+        return None
+
+    print(f"{'n':>8} {'CYK (s)':>10} {'RSS (MiB)':>10} {'Matrices (s)':>13} {'RSS (MiB)':>10}")
+    crossover = None
+    for n in lengths:
+        chart_result, chart_time, chart_rss = _isolated(_cfg_case, "cyk", grammar_text, n)
+        matrix_result, matrix_time, matrix_rss = _isolated(_cfg_case, "matrix", grammar_text, n)
+        if chart_result != matrix_result:
+            print(f"Resultados distintos para n={n}: CYK={chart_result} matrices={matrix_result}")
+        print(f"{n:>8} {chart_time:>10.3f} {_format_rss(chart_rss):>10} "
+              f"{matrix_time:>13.3f} {_format_rss(matrix_rss):>10}")
+        if crossover is None and matrix_time < chart_time:
+            crossover = n
+    if crossover is None:
+        print("El reconocedor de matrices no superó al diagrama CYK en las longitudes medidas.")
+    else:
+        print(f"Punto de cruce: n ≈ {crossover}")
+    return crossover
+
+
+def _memory_case(mode, n, spill_threshold):
+    """
+    Reconoce a^(n/2) b^(n/2) con Earley guardando todos los conjuntos ("sets", ver
+    EarleyRecognizer.parse_sets) o solo el diagrama compacto ("compact").
+    Retorna (resultado, segundos, MiB residentes antes y después, diagrama en disco).
+    """
+    grammar = Grammar.from_text(LARGE_GRAMMAR)
+    recognizer = EarleyRecognizer(grammar, spill_threshold)
+    half = n // 2
+    ids = [recognizer.alphabet.index("a")] * half + [recognizer.alphabet.index("b")] * half
+    before = _peak_rss()
+    if mode == "sets":
+        result, seconds = _measure(lambda: len(recognizer.parse_sets(ids)) > len(ids))
+    else:
+        result, seconds = _measure(recognizer.recognize_ids, ids)
+    return result, seconds, before, _peak_rss()
+
+
+def bench_memory(lengths, spill_threshold=SPILL_THRESHOLD, modes=("sets", "compact")):
+    """
+    Mide tiempo y memoria residente máxima del reconocedor de Earley con entradas
+    muy largas, con los conjuntos completos en listas de Python y con el diagrama
+    compacto que pasa a disco por encima de `spill_threshold` bytes.
+    """
+    print(f"{'n':>9} {'Diagrama':>9} {'Tiempo (s)':>11} {'RSS base':>9} {'RSS máx (MiB)':>14}")
+    results = []
+    for n in lengths:
+        for mode in modes:
+            result, seconds, before, peak = _isolated(_memory_case, mode, n, spill_threshold)
+            if not result:
+                print(f"La entrada de longitud {n} no fue aceptada con el diagrama {mode}.")
+            print(f"{n:>9} {mode:>9} {seconds:>11.2f} {_format_rss(before):>9} {_format_rss(peak):>14}")
+            results.append((n, mode, seconds, peak))
+    return results
+
+
+def bench_batch(shapes, grammar_text=BATCH_GRAMMAR, seed=0):
+    """
+    Compara la validación por lotes del DFA (DFA.accepts_batch) con el recorrido
+    cadena por cadena (DFA.accepts) para lotes de cadenas aleatorias.
+
+    :param shapes: Lista de (cantidad de cadenas, longitud mínima, longitud máxima).
+    :return: Lista de (cantidad, mínima, máxima, segundos por cadena, segundos por lote).
+    """
+    dfa = compile_regular(Grammar.from_text(grammar_text))
+    if optional_import("numpy") is None:
+        print("NumPy no está instalado: accepts_batch valida las cadenas una por una.")
+    dfa.accepts_batch([dfa.alphabet[0]] * 64)  # Importa NumPy fuera de la medición
+    rng = random.Random(seed)
+    print(f"{'Cadenas':>9} {'Longitud':>13} {'Por cadena (s)':>15} {'Lote (s)':>9} {'Aceleración':>12}")
+    results = []
+    for count, shortest, longest in shapes:
+        strings = ["".join(rng.choice(dfa.alphabet) for _ in range(rng.randint(shortest, longest)))
+                   for _ in range(count)]
+        expected, single = _measure(lambda: [dfa.accepts(s) for s in strings])
+        result, batch = _measure(dfa.accepts_batch, strings)
+        if result != expected:
+            print(f"Resultados distintos para {count} cadenas de {shortest}-{longest} símbolos.")
+        print(f"{count:>9} {f'{shortest}-{longest}':>13} {single:>15.3f} {batch:>9.3f} {single / batch:>11.1f}x")
+        results.append((count, shortest, longest, single, batch))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mediciones de rendimiento de los reconocedores.")
+    parser.add_argument("section", choices=["cfg", "memory", "batch"], help="Sección a medir.")
+    parser.add_argument("--lengths", type=int, nargs="+",
+                        help="Longitudes de entrada a medir (por defecto según la sección).")
+    parser.add_argument("--spill-threshold", type=int, default=SPILL_THRESHOLD,
+                        help="Bytes a partir de los cuales el diagrama de Earley pasa a disco (sección memory).")
+    parser.add_argument("--compact-only", action="store_true",
+                        help="En la sección memory mide solo el diagrama compacto.")
+    args = parser.parse_args()
+
+    if args.section == "cfg":
+        bench_cfg(args.lengths or [500, 1000, 2000, 4000, 8000])
+    elif args.section == "memory":
+        bench_memory(args.lengths or [100000, 1000000], args.spill_threshold,
+                     ("compact",) if args.compact_only else ("sets", "compact"))
+    elif args.section == "batch":
+        shapes = [(100000, 5, 50), (10000, 100, 300), (1000, 1000, 3000), (20, 50000, 100000)]
+        if args.lengths:
+            # Con --lengths: 1000 cadenas de cada longitud indicada
+            shapes = [(1000, length, length) for length in args.lengths]
+        bench_batch(shapes)
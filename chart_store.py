@@ -0,0 +1,212 @@
+import array
+import mmap
+import os
+import tempfile
+import weakref
+from bisect import bisect_left
+
+# Tamaño (en bytes) a partir del cual un ChartArray pasa de memoria a un archivo mapeado
+SPILL_THRESHOLD = 64 * 1024 * 1024
+
+
+def _discard(view, mapped, handle, path):
+    """
+    Libera los recursos de un ChartArray volcado a disco y borra su archivo.
+    """
+    if view is not None:
+        view.release()
+    if mapped is not None:
+        mapped.close()
+    if handle is not None:
+        os.close(handle)
+    if path is not None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ChartArray:
+    """
+    Arreglo de enteros de un tipo fijo (códigos del módulo array) al que solo se
+    agregan elementos al final y que se lee por índice.
+
+    Mientras ocupa menos de `spill_threshold` bytes vive en un array.array; al
+    superarlo se copia a un archivo temporal mapeado con mmap, que crece duplicando
+    su tamaño. Cada vez que se escriben otros `spill_threshold` bytes las páginas del
+    archivo se devuelven al sistema (madvise), así que la memoria residente queda
+    acotada aunque el arreglo sea mucho más grande que la memoria. El archivo se
+    borra con `close` (o al recolectar el objeto).
+    """
+
+    def __init__(self, typecode, spill_threshold=SPILL_THRESHOLD, directory=None):
+        """
+        :param typecode: Código de tipo del módulo array ("i", "q", ...).
+        :param spill_threshold: Bytes a partir de los cuales se usa un archivo mapeado.
+                                None mantiene el arreglo siempre en memoria.
+        :param directory: Directorio del archivo temporal (por defecto el del sistema).
+        """
+        self.typecode = typecode
+        self.itemsize = array.array(typecode).itemsize
+        self.spill_threshold = spill_threshold
+        self.directory = directory
+        self._data = array.array(typecode)  # array en memoria o memoryview sobre el mapa
+        self._length = 0
+        self._capacity = 0
+        self._handle = None
+        self._path = None
+        self._map = None
+        self._next_release = 0  # cantidad de elementos a partir de la cual se liberan páginas
+        self._finalizer = None
+
+    @property
+    def spilled(self):
+        """
+        Indica si el arreglo ya se volcó a un archivo mapeado.
+        """
+        return self._map is not None
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._length:
+            raise IndexError("Índice fuera del arreglo.")
+        return self._data[index]
+
+    def append(self, value):
+        if self._map is None:
+            self._data.append(value)
+            self._length += 1
+            if self.spill_threshold is not None and self._length * self.itemsize > self.spill_threshold:
+                self._spill()
+            return
+        if self._length == self._capacity:
+            self._grow(self._length + 1)
+        self._data[self._length] = value
+        self._length += 1
+        if self._length >= self._next_release:
+            self._release()
+
+    def extend(self, values):
+        if self._map is None:
+            self._data.extend(values)
+            self._length = len(self._data)
+            if self.spill_threshold is not None and self._length * self.itemsize > self.spill_threshold:
+                self._spill()
+            return
+        values = array.array(self.typecode, values)
+        end = self._length + len(values)
+        if end > self._capacity:
+            self._grow(end)
+        self._data[self._length:end] = values
+        self._length = end
+        if self._length >= self._next_release:
+            self._release()
+
+    def _open_map(self):
+        self._map = mmap.mmap(self._handle, self._capacity * self.itemsize)
+        self._data = memoryview(self._map).cast(self.typecode)
+
+    def _close_map(self):
+        self._data.release()
+        self._map.close()
+
+    def _spill(self):
+        """
+        Copia el contenido a un archivo temporal y pasa a leerlo y escribirlo mapeado.
+        """
+        content = self._data
+        self._handle, self._path = tempfile.mkstemp(prefix="chart_", suffix=".bin", dir=self.directory)
+        self._capacity = 2 * self._length
+        os.ftruncate(self._handle, self._capacity * self.itemsize)
+        self._open_map()
+        self._data[:self._length] = content
+        self._next_release = self._length + self.spill_threshold // self.itemsize
+        self._finalizer = weakref.finalize(self, _discard, None, None, self._handle, self._path)
+
+    def _grow(self, needed):
+        """
+        Duplica el archivo (al menos hasta `needed` elementos) y lo vuelve a mapear.
+        """
+        self._close_map()
+        self._capacity = max(2 * self._capacity, needed)
+        os.ftruncate(self._handle, self._capacity * self.itemsize)
+        self._open_map()
+
+    def _release(self):
+        """
+        Devuelve al sistema las páginas escritas: siguen en el archivo (y en la caché
+        de páginas del sistema operativo) y se vuelven a leer si hacen falta.
+        """
+        if hasattr(mmap, "MADV_DONTNEED"):
+            size = self._length * self.itemsize
+            self._map.madvise(mmap.MADV_DONTNEED, 0, size - size % mmap.PAGESIZE)
+        self._next_release = self._length + self.spill_threshold // self.itemsize
+
+    def close(self):
+        """
+        Libera la memoria y borra el archivo temporal, si lo hay.
+        """
+        if self._map is not None:
+            self._finalizer.detach()
+            _discard(self._data, self._map, self._handle, self._path)
+            self._map = self._handle = self._path = None
+        self._data = array.array(self.typecode)
+        self._length = self._capacity = 0
+
+
+class WaitingChart:
+    """
+    Elementos de Earley en espera (con el punto delante de un no terminal) de los
+    conjuntos ya cerrados, que son los únicos que hace falta conservar para
+    reconocer. Cada elemento se codifica como un entero (ver EarleyRecognizer) y se
+    guarda en arreglos compactos (ChartArray):
+     - items: los elementos de cada conjunto, agrupados por no terminal esperado.
+     - symbols / starts: un directorio por conjunto con cada no terminal (ordenados)
+       y el índice en `items` donde empieza su grupo.
+     - sets: el índice en el directorio donde empieza cada conjunto.
+    """
+
+    def __init__(self, spill_threshold=SPILL_THRESHOLD, directory=None):
+        """
+        :param spill_threshold: Ver ChartArray; se aplica a cada arreglo por separado.
+        :param directory: Directorio de los archivos temporales.
+        """
+        self.items = ChartArray("q", spill_threshold, directory)
+        self.symbols = ChartArray("i", spill_threshold, directory)
+        self.starts = ChartArray("q", spill_threshold, directory)
+        self.sets = ChartArray("q", spill_threshold, directory)
+        self.sets.append(0)
+
+    @property
+    def spilled(self):
+        return any(part.spilled for part in (self.items, self.symbols, self.starts, self.sets))
+
+    def close_set(self, waits):
+        """
+        Agrega el conjunto siguiente.
+
+        :param waits: Diccionario no terminal -> lista de elementos codificados.
+        """
+        for symbol in sorted(waits):
+            self.symbols.append(symbol)
+            self.starts.append(len(self.items))
+            self.items.extend(waits[symbol])
+        self.sets.append(len(self.symbols))
+
+    def waiting(self, position, symbol):
+        """
+        Retorna los elementos del conjunto `position` que esperan a `symbol`.
+        """
+        low, high = self.sets[position], self.sets[position + 1]
+        entry = bisect_left(self.symbols, symbol, low, high)
+        if entry == high or self.symbols[entry] != symbol:
+            return ()
+        end = self.starts[entry + 1] if entry + 1 < len(self.starts) else len(self.items)
+        items = self.items
+        return [items[k] for k in range(self.starts[entry], end)]
+
+    def close(self):
+        for part in (self.items, self.symbols, self.starts, self.sets):
+            part.close()
@@ -0,0 +1,182 @@
+from grammar import Grammar
+
+
+class CNFGrammar:
+    """
+    Gramática en Forma Normal de Chomsky con los no terminales internados como enteros.
+    Solo contiene reglas A -> B C y A -> t; la cadena vacía se registra aparte
+    en `accepts_empty`.
+    """
+
+    def __init__(self, names, start, terminal_rules, binary_rules, accepts_empty):
+        """
+        :param names: Lista de nombres de no terminales (el índice es su identificador).
+        :param start: Identificador del símbolo inicial.
+        :param terminal_rules: Diccionario terminal -> lista de A con A -> terminal.
+        :param binary_rules: Lista de tuplas (A, B, C) con A -> B C.
+        :param accepts_empty: True si ε pertenece al lenguaje.
+        """
+        self.names = names
+        self.start = start
+        self.terminal_rules = terminal_rules
+        self.binary_rules = binary_rules
+        self.accepts_empty = accepts_empty
+
+    @property
+    def num_nonterminals(self):
+        return len(self.names)
+
+    def __str__(self):
+        result = [f"Inicial: {self.names[self.start]}" + (" (acepta ε)" if self.accepts_empty else "")]
+        for a, b, c in self.binary_rules:
+            result.append(f"  {self.names[a]} -> {self.names[b]} {self.names[c]}")
+        for terminal, lefts in self.terminal_rules.items():
+            for a in lefts:
+                result.append(f"  {self.names[a]} -> {terminal}")
+        return "\n".join(result)
+
+
+def _fresh_name(base, used):
+    """
+    Retorna un nombre de no terminal nuevo derivado de `base` que no esté en `used`.
+    """
+    name = base
+    counter = 1
+    while name in used:
+        name = f"{base}{counter}"
+        counter += 1
+    used.add(name)
+    return name
+
+
+def to_cnf(grammar: Grammar):
+    """
+    Convierte una gramática libre de contexto a Forma Normal de Chomsky.
+
+    Pasos: nuevo símbolo inicial (START), terminales en reglas largas (TERM),
+    binarización (BIN), eliminación de producciones vacías (DEL) y de reglas
+    unitarias (UNIT). BIN se aplica antes que DEL para que la gramática resultante
+    crezca linealmente.
+
+    :param grammar: Instancia de Grammar (tipo 2 o 3).
+    :return: Instancia de CNFGrammar.
+    """
+    productions = grammar.get_productions()
+    used = set(productions) | set(grammar.nonterminals) | grammar.get_terminals()
+
+    # START: el símbolo inicial no debe aparecer a la derecha
+    start = _fresh_name(f"{grammar.start}0", used)
+    rules = [(start, [grammar.start])]
+    for left, prods in productions.items():
+        for prod in prods:
+            rules.append((left, list(prod)))
+    is_nonterminal = lambda sym: sym == start or grammar.is_nonterminal(sym)
+
+    # TERM: reemplaza terminales dentro de reglas de longitud >= 2
+    terminal_proxy = {}
+    term_rules = []
+    for left, right in rules:
+        if len(right) >= 2:
+            for i, sym in enumerate(right):
+                if not is_nonterminal(sym):
+                    if sym not in terminal_proxy:
+                        terminal_proxy[sym] = _fresh_name(f"T_{sym}", used)
+                    right[i] = terminal_proxy[sym]
+        term_rules.append((left, right))
+    for sym, proxy in terminal_proxy.items():
+        term_rules.append((proxy, [sym]))
+
+    # BIN: divide reglas largas en cadenas de reglas binarias
+    bin_rules = []
+    for left, right in term_rules:
+        current = left
+        while len(right) > 2:
+            helper = _fresh_name(f"{left}_", used)
+            bin_rules.append((current, [right[0], helper]))
+            current, right = helper, right[1:]
+        bin_rules.append((current, right))
+    # Desde aquí son no terminales también los auxiliares creados por TERM y BIN
+    lefts_after_bin = {left for left, _ in bin_rules}
+    is_variable = lambda sym: sym in lefts_after_bin or is_nonterminal(sym)
+
+    # DEL: calcula los anulables y agrega las variantes sin ellos
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for left, right in bin_rules:
+            if left not in nullable and all(sym in nullable for sym in right):
+                nullable.add(left)
+                changed = True
+    del_rules = set()
+    for left, right in bin_rules:
+        if len(right) == 2:
+            b, c = right
+            del_rules.add((left, (b, c)))
+            if c in nullable:
+                del_rules.add((left, (b,)))
+            if b in nullable:
+                del_rules.add((left, (c,)))
+        elif len(right) == 1:
+            del_rules.add((left, (right[0],)))
+
+    # UNIT: clausura de reglas A -> B entre no terminales
+    unit = {}
+    proper = {}
+    for left, right in del_rules:
+        if len(right) == 1 and is_variable(right[0]):
+            unit.setdefault(left, set()).add(right[0])
+        else:
+            proper.setdefault(left, set()).add(right)
+    final_rules = set()
+    lefts = set(unit) | set(proper)
+    for left in lefts:
+        reach = {left}
+        stack = [left]
+        while stack:
+            x = stack.pop()
+            for y in unit.get(x, ()):
+                if y not in reach:
+                    reach.add(y)
+                    stack.append(y)
+        for y in reach:
+            for right in proper.get(y, ()):
+                final_rules.add((left, right))
+
+    # Elimina símbolos inútiles: se conservan los generadores alcanzables desde el inicial
+    generating = set()
+    changed = True
+    while changed:
+        changed = False
+        for left, right in final_rules:
+            if left in generating:
+                continue
+            if all(not is_variable(sym) or sym in generating for sym in right):
+                generating.add(left)
+                changed = True
+    reachable = {start}
+    stack = [start]
+    by_left = {}
+    for left, right in final_rules:
+        if left in generating and all(not is_variable(s) or s in generating for s in right):
+            by_left.setdefault(left, []).append(right)
+    while stack:
+        x = stack.pop()
+        for right in by_left.get(x, ()):
+            for sym in right:
+                if is_variable(sym) and sym not in reachable:
+                    reachable.add(sym)
+                    stack.append(sym)
+
+    names = [start] + sorted(n for n in reachable if n != start)
+    ids = {name: i for i, name in enumerate(names)}
+    terminal_rules = {}
+    binary_rules = []
+    for left in names:
+        for right in sorted(by_left.get(left, ())):
+            if len(right) == 2:
+                binary_rules.append((ids[left], ids[right[0]], ids[right[1]]))
+            else:
+                terminal_rules.setdefault(right[0], []).append(ids[left])
+
+    return CNFGrammar(names, 0, terminal_rules, binary_rules, start in nullable)
@@ -0,0 +1,259 @@
+from grammar import Grammar
+from cnf import to_cnf
+from tokenizer import terminal_alphabet
+from lazy_imports import optional_import
+
+# Memoria máxima (en bytes) del diagrama de una entrada para elegir CYK (ver
+# `chart_bytes` y GrammarValidator.select_engine). Con ejemplo4 (palíndromos) el
+# diagrama ocupa 27 MiB con n = 4000 y 108 MiB con n = 8000, y Earley, con su
+# diagrama compacto (1 MiB), ya es más rápido desde n = 4000 (12,2 s contra 17,1 s)
+MAX_CHART_BYTES = 32 * 1024 * 1024
+
+
+def _bits(mask):
+    """
+    Itera los índices de los bits encendidos de un entero.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitsetCYK:
+    """
+    Reconocedor CYK bit-paralelo para gramáticas en Forma Normal de Chomsky.
+
+    Cada celda del diagrama es un único entero de Python usado como conjunto de bits
+    sobre los no terminales internados, y el diagrama es un arreglo triangular plano.
+    Las reglas binarias se precalculan en tablas indexadas por fragmentos
+    (conjunto izquierdo, conjunto derecho) de `chunk_bits` bits.
+    """
+
+    def __init__(self, grammar: Grammar, chunk_bits=4, numpy_threshold=128, max_bytes=MAX_CHART_BYTES):
+        """
+        :param grammar: Instancia de Grammar; se convierte a CNF al construir el reconocedor.
+        :param chunk_bits: Tamaño en bits de cada fragmento de las tablas de reglas binarias.
+        :param numpy_threshold: Longitud de entrada a partir de la cual se usa el modo
+                                NumPy (si está instalado). None lo desactiva.
+        :param max_bytes: Memoria máxima del diagrama de una entrada (ver `fits`);
+                          None no pone límite.
+        """
+        self.cnf = to_cnf(grammar)
+        self.chunk_bits = chunk_bits
+        self.numpy_threshold = numpy_threshold
+        self.max_bytes = max_bytes
+        self.start_mask = 1 << self.cnf.start
+
+        # Terminal -> conjunto de no terminales A con A -> terminal
+        self.terminal_masks = {}
+        for terminal, lefts in self.cnf.terminal_rules.items():
+            mask = 0
+            for a in lefts:
+                mask |= 1 << a
+            self.terminal_masks[terminal] = mask
+        # Conjunto de no terminales por identificador de token (ver tokenizer.py)
+        self.alphabet = terminal_alphabet(grammar)
+        self.id_masks = [self.terminal_masks.get(sym, 0) for sym in self.alphabet]
+
+        # (B, C) -> conjunto de A con A -> B C
+        self.pair_masks = {}
+        for a, b, c in self.cnf.binary_rules:
+            self.pair_masks[(b, c)] = self.pair_masks.get((b, c), 0) | (1 << a)
+
+        self.chunk_tables = self._build_chunk_tables()
+        self._combine_cache = {}
+
+    def _build_chunk_tables(self):
+        """
+        Para cada par de fragmentos (cl, cr) con alguna regla, construye una tabla de
+        2^(2·chunk_bits) entradas: tabla[bits_izq << chunk_bits | bits_der] es el
+        conjunto de no terminales producidos por esos bits.
+        """
+        width = self.chunk_bits
+        size = 1 << width
+        by_chunks = {}
+        for (b, c), mask in self.pair_masks.items():
+            key = (b // width, c // width)
+            by_chunks.setdefault(key, []).append((b % width, c % width, mask))
+
+        tables = {}
+        for key, entries in by_chunks.items():
+            # Resultado para cada bit individual y luego cierre por unión
+            single = {}
+            for lb, rb, mask in entries:
+                single[(lb, rb)] = single.get((lb, rb), 0) | mask
+            table = [0] * (size * size)
+            for left in range(1, size):
+                for right in range(1, size):
+                    result = 0
+                    for lb in _bits(left):
+                        for rb in _bits(right):
+                            result |= single.get((lb, rb), 0)
+                    table[(left << width) | right] = result
+            tables[key] = table
+        return tables
+
+    def _combine(self, left, right):
+        """
+        Retorna el conjunto de A tales que A -> B C con B en `left` y C en `right`.
+        Los pares de conjuntos ya vistos se memorizan.
+        """
+        key = (left, right)
+        cached = self._combine_cache.get(key)
+        if cached is not None:
+            return cached
+        width = self.chunk_bits
+        chunk_mask = (1 << width) - 1
+        left_chunks = []
+        cl = 0
+        value = left
+        while value:
+            if value & chunk_mask:
+                left_chunks.append((cl, value & chunk_mask))
+            value >>= width
+            cl += 1
+        right_chunks = []
+        cr = 0
+        value = right
+        while value:
+            if value & chunk_mask:
+                right_chunks.append((cr, value & chunk_mask))
+            value >>= width
+            cr += 1
+        result = 0
+        for cl, lbits in left_chunks:
+            for cr, rbits in right_chunks:
+                table = self.chunk_tables.get((cl, cr))
+                if table is not None:
+                    result |= table[(lbits << width) | rbits]
+        self._combine_cache[key] = result
+        return result
+
+    def recognize(self, tokens):
+        """
+        Indica si la secuencia de terminales pertenece al lenguaje.
+        Una cadena de Python se trata carácter a carácter.
+        """
+        masks = self.terminal_masks
+        return self._recognize_masks([masks.get(tok, 0) for tok in tokens])
+
+    def chart_bytes(self, length):
+        """
+        Memoria (en bytes) aproximada del diagrama para una entrada de `length`
+        terminales: en el modo NumPy, dos conjuntos de bits de n + 1 posiciones por no
+        terminal y posición; con enteros de Python, una referencia y un entero por
+        celda del triángulo.
+        """
+        n = length
+        if (self.numpy_threshold is not None and n >= self.numpy_threshold
+                and optional_import("numpy") is not None):
+            return 2 * self.cnf.num_nonterminals * (n + 1) * ((n + 64) // 64) * 8
+        return n * (n + 1) // 2 * (8 + 32)
+
+    def fits(self, length):
+        """
+        Indica si el diagrama de una entrada de `length` terminales entra en `max_bytes`.
+        """
+        return self.max_bytes is None or self.chart_bytes(length) <= self.max_bytes
+
+    def recognize_ids(self, ids):
+        """
+        Igual que `recognize`, pero recibe identificadores de token (ver tokenizer.py).
+        """
+        masks = self.id_masks
+        return self._recognize_masks([masks[i] for i in ids])
+
+    def _recognize_masks(self, masks):
+        """
+        Reconoce la entrada dada como la lista de conjuntos de no terminales que
+        derivan cada terminal.
+        """
+        n = len(masks)
+        if n == 0:
+            return self.cnf.accepts_empty
+        if not all(masks):
+            return False
+        # NumPy es opcional: sin él se usa siempre el modo con enteros de Python
+        if (self.numpy_threshold is not None and n >= self.numpy_threshold
+                and optional_import("numpy") is not None):
+            return self._recognize_numpy(masks)
+        return self._recognize_bitset(masks)
+
+    def _recognize_bitset(self, masks):
+        """
+        CYK sobre el diagrama triangular plano: la celda del tramo (i, j), con i < j,
+        está en la posición j·(j-1)/2 + i.
+        Además de las celdas se mantienen, por posición, los conjuntos de bits de los
+        extremos con alguna celda no vacía; su intersección da directamente los puntos
+        de corte k útiles para cada tramo y evita recorrer cortes vacíos.
+        """
+        n = len(masks)
+        chart = [0] * (n * (n + 1) // 2)
+        ends = [0] * (n + 1)    # ends[i]: bits k > i con celda (i, k) no vacía
+        starts = [0] * (n + 1)  # starts[j]: bits k < j con celda (k, j) no vacía
+        combine = self._combine
+
+        for i, mask in enumerate(masks):
+            j = i + 1
+            chart[j * (j - 1) // 2 + i] = mask
+            ends[i] |= 1 << j
+            starts[j] |= 1 << i
+
+        for length in range(2, n + 1):
+            for i in range(n - length + 1):
+                j = i + length
+                splits = ends[i] & starts[j]
+                base_j = j * (j - 1) // 2
+                cell = 0
+                while splits:
+                    low = splits & -splits
+                    k = low.bit_length() - 1
+                    splits ^= low
+                    left = chart[k * (k - 1) // 2 + i]
+                    right = chart[base_j + k]
+                    cell |= combine(left, right)
+                if cell:
+                    chart[base_j + i] = cell
+                    ends[i] |= 1 << j
+                    starts[j] |= 1 << i
+
+        return bool(chart[n * (n - 1) // 2] & self.start_mask)
+
+    def _recognize_numpy(self, masks):
+        """
+        Variante vectorizada con NumPy: para cada no terminal se guardan conjuntos de
+        bits empaquetados en uint64 sobre posiciones (extremos derechos por inicio y
+        extremos izquierdos por final). Cada diagonal del diagrama se calcula para
+        todos los inicios a la vez con un AND y un `any` por par (B, C).
+        """
+        np = optional_import("numpy")
+        n = len(masks)
+        m = self.cnf.num_nonterminals
+        words = (n + 1 + 63) // 64
+        ends = np.zeros((m, n + 1, words), dtype=np.uint64)
+        starts = np.zeros((m, n + 1, words), dtype=np.uint64)
+        one = np.uint64(1)
+
+        for i, mask in enumerate(masks):
+            for a in _bits(mask):
+                ends[a, i, (i + 1) >> 6] |= one << np.uint64((i + 1) & 63)
+                starts[a, i + 1, i >> 6] |= one << np.uint64(i & 63)
+
+        pairs = [(b, c, list(_bits(mask))) for (b, c), mask in self.pair_masks.items()]
+        for length in range(2, n + 1):
+            count = n - length + 1
+            found = {}
+            for b, c, lefts in pairs:
+                hit = (ends[b, :count] & starts[c, length:length + count]).any(axis=1)
+                if not hit.any():
+                    continue
+                for a in lefts:
+                    found[a] = found[a] | hit if a in found else hit
+            for a, hit in found.items():
+                i = np.nonzero(hit)[0]
+                j = i + length
+                ends[a, i, j >> 6] |= one << (j & 63).astype(np.uint64)
+                starts[a, j, i >> 6] |= one << (i & 63).astype(np.uint64)
+
+        return bool((ends[self.cnf.start, 0, n >> 6] >> np.uint64(n & 63)) & one)
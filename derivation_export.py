@@ -0,0 +1,258 @@
+import argparse
+import json
+import sys
+
+from grammar import Grammar
+from glr import GLRParser
+from ll1 import all_productions
+from tokenizer import Tokenizer, TokenizeError, character_grammar
+
+FORMATS = ("jsonl", "dot", "binary")
+
+# Encabezado del formato binario (y versión)
+MAGIC = b"DRV1"
+
+
+def production_list(grammar: Grammar):
+    """
+    Producciones numeradas como en las derivaciones exportadas: el identificador
+    de cada producción es su índice en esta lista (orden de ll1.all_productions).
+
+    :return: Lista de (no terminal, lista de símbolos del lado derecho).
+    """
+    return [(left, list(prod)) for left, prods in all_productions(grammar).items() for prod in prods]
+
+
+def _varint(value):
+    """
+    Codifica un entero no negativo en LEB128 (7 bits por byte).
+    """
+    result = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            result.append(byte | 0x80)
+        else:
+            result.append(byte)
+            return bytes(result)
+
+
+def _read_varint(stream):
+    """
+    Lee un entero LEB128; retorna None al final del archivo.
+    """
+    value = shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise ValueError("Archivo de derivaciones truncado.")
+            return None
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+def _text(value):
+    data = value.encode("utf-8")
+    return _varint(len(data)) + data
+
+
+def _read_text(stream):
+    length = _read_varint(stream)
+    if length is None:
+        raise ValueError("Archivo de derivaciones truncado.")
+    return stream.read(length).decode("utf-8")
+
+
+class DerivationWriter:
+    """
+    Escribe derivaciones en un archivo a medida que se producen, sin armar los
+    textos de la interfaz. Cada derivación es la lista de pasos por la izquierda
+    (producción, inicio, fin) de PackedForest.derivation.
+
+    Formatos:
+     - "jsonl": una línea JSON con las producciones y luego una por cadena:
+       {"index", "string", "valid", "tokens", "steps": [[producción, inicio, fin], ...]}.
+     - "dot": un digraph de Graphviz por cadena; cada nodo lleva los atributos
+       production, start y end.
+     - "binary": MAGIC, la tabla de producciones y por cadena los enteros
+       (válida, tokens, pasos, producción, inicio, largo, ...) en LEB128
+       (ver `read_binary`).
+    """
+
+    def __init__(self, stream, productions, format="jsonl"):
+        """
+        :param stream: Archivo abierto en modo texto ("jsonl", "dot") o binario ("binary").
+        :param productions: Lista de production_list.
+        :param format: Uno de FORMATS.
+        :raises ValueError: Si el formato no existe.
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Formato de exportación desconocido: {format}")
+        self.stream = stream
+        self.productions = productions
+        self.format = format
+        self.count = 0
+        self._nonterminals = {left for left, _ in productions}
+        if format == "jsonl":
+            stream.write(json.dumps({"productions": [[left, right] for left, right in productions]},
+                                    ensure_ascii=False) + "\n")
+        elif format == "binary":
+            header = bytearray(MAGIC)
+            header += _varint(len(productions))
+            for left, right in productions:
+                header += _text(left) + _varint(len(right))
+                for symbol in right:
+                    header += _text(symbol)
+            stream.write(bytes(header))
+
+    def write(self, string, tokens, steps, valid=True):
+        """
+        Agrega la derivación de una cadena.
+
+        :param string: Cadena de entrada.
+        :param tokens: Lista de terminales de la cadena (o None si no se pudo dividir).
+        :param steps: Lista de (producción, inicio, fin); vacía si la cadena no es válida.
+        """
+        if self.format == "jsonl":
+            self.stream.write(json.dumps({"index": self.count, "string": string, "valid": valid,
+                                         "tokens": len(tokens) if tokens is not None else None,
+                                         "steps": steps}, ensure_ascii=False) + "\n")
+        elif self.format == "binary":
+            record = bytearray(_varint(1 if valid else 0))
+            record += _varint(len(tokens) if tokens is not None else 0) + _varint(len(steps))
+            for production, start, end in steps:
+                record += _varint(production) + _varint(start) + _varint(end - start)
+            self.stream.write(bytes(record))
+        else:
+            self.stream.write(self._dot(string, tokens, steps, valid))
+        self.count += 1
+
+    def _dot(self, string, tokens, steps, valid):
+        """
+        Reconstruye el árbol a partir de la derivación por la izquierda: cada paso
+        expande el no terminal pendiente más a la izquierda.
+        """
+        lines = [f"digraph derivation_{self.count} {{",
+                 f"  label={json.dumps(string, ensure_ascii=False)}; valid={str(valid).lower()};"]
+        pending = []  # nodos no terminales aún no expandidos (el de más a la izquierda al final)
+        nodes = 0
+        for production, start, end in steps:
+            left, right = self.productions[production]
+            if pending:
+                node = pending.pop()
+            else:
+                node = nodes
+                nodes += 1
+            lines.append(f"  n{node} [label={json.dumps(left, ensure_ascii=False)}, "
+                         f"production={production}, start={start}, end={end}];")
+            children = []
+            for symbol in right:
+                child = nodes
+                nodes += 1
+                lines.append(f"  n{node} -> n{child};")
+                if symbol in self._nonterminals:
+                    children.append(child)
+                else:
+                    lines.append(f"  n{child} [label={json.dumps(symbol, ensure_ascii=False)}, shape=box];")
+            if not right:
+                child = nodes
+                nodes += 1
+                lines.append(f"  n{node} -> n{child};")
+                lines.append(f'  n{child} [label="ε", shape=plaintext];')
+            pending.extend(reversed(children))
+        lines.append("}\n")
+        return "\n".join(lines)
+
+
+def read_binary(stream):
+    """
+    Lee un archivo del formato "binary".
+
+    :return: Tupla (producciones, iterador de (válida, tokens, pasos)).
+    :raises ValueError: Si el archivo no tiene el formato esperado.
+    """
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("El archivo no contiene derivaciones en formato binario.")
+    productions = []
+    for _ in range(_read_varint(stream) or 0):
+        left = _read_text(stream)
+        productions.append((left, [_read_text(stream) for _ in range(_read_varint(stream))]))
+
+    def records():
+        while True:
+            valid = _read_varint(stream)
+            if valid is None:
+                return
+            tokens, count = _read_varint(stream), _read_varint(stream)
+            steps = []
+            for _ in range(count):
+                production, start, length = _read_varint(stream), _read_varint(stream), _read_varint(stream)
+                steps.append((production, start, start + length))
+            yield bool(valid), tokens, steps
+
+    return productions, records()
+
+
+def export_derivations(grammar, strings, stream, format="jsonl", parser=None):
+    """
+    Analiza cada cadena con el analizador GLR (ver glr.py) y escribe su derivación
+    en `stream` a medida que avanza, sin guardar las anteriores en memoria.
+
+    Si algún terminal es prefijo de otro, la coincidencia más larga no es la única
+    división de la entrada y se analiza la gramática carácter a carácter (ver
+    tokenizer.character_grammar): las producciones son las mismas, pero las
+    posiciones y la cantidad de tokens se miden en caracteres.
+
+    :param strings: Iterable de cadenas.
+    :param parser: GLRParser ya construido para la gramática (opcional); en el caso
+                   anterior, para la gramática carácter a carácter.
+    :return: Cantidad de cadenas escritas.
+    :raises ValueError: Si el tipo de gramática no es 2 ni 3 o el formato no existe.
+    """
+    if grammar.type not in (2, 3):
+        raise ValueError("Tipo de gramática no soportado para validación.")
+    writer = DerivationWriter(stream, production_list(grammar), format)
+    tokenizer = Tokenizer.from_grammar(grammar)
+    if not tokenizer.prefix_free:
+        grammar = character_grammar(grammar)
+        tokenizer = Tokenizer.from_grammar(grammar)
+    parser = parser if parser is not None else GLRParser(grammar)
+    for string in strings:
+        try:
+            ids = tokenizer.tokenize(string)
+        except TokenizeError:
+            writer.write(string, None, [], False)
+            continue
+        forest = parser.parse_ids(ids)
+        writer.write(string, ids, forest.derivation() if forest is not None else [], forest is not None)
+    return writer.count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Exporta derivaciones (identificadores de producción y posiciones) a un archivo.")
+    parser.add_argument("grammar", help="Archivo .grm.")
+    parser.add_argument("strings", nargs="*",
+                        help="Cadenas a exportar (sin cadenas se lee una por línea de la entrada estándar).")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="Formato de salida.")
+    parser.add_argument("--output", help="Archivo de salida (por defecto la salida estándar).")
+    args = parser.parse_args()
+
+    strings = args.strings or (line.rstrip("\n") for line in sys.stdin)
+    binary = args.format == "binary"
+    if args.output:
+        output = open(args.output, "wb" if binary else "w", encoding=None if binary else "utf-8")
+    else:
+        output = sys.stdout.buffer if binary else sys.stdout
+    try:
+        export_derivations(Grammar.from_file(args.grammar), strings, output, args.format)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        if args.output:
+            output.close()
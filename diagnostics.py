@@ -0,0 +1,380 @@
+from collections import deque
+
+from automaton import DEAD
+from tokenizer import UNKNOWN
+
+# Costo máximo de la reparación buscada con Earley. El trabajo de `_correcting_earley`
+# crece con el costo máximo (con ejemplo3 y 1000 símbolos "b": 0,34 s con 8, 0,61 s
+# con 16 y 2,4 s con 32) y la reparación de una cadena muy alejada del lenguaje
+# necesita O(n) ediciones: sin este límite el diagnóstico es supercuadrático
+MAX_REPAIR_COST = 8
+
+
+class Diagnosis:
+    """
+    Resultado del modo de diagnóstico para una cadena.
+
+    Atributos:
+     - valid: True si la cadena pertenece al lenguaje.
+     - position / char_position: posición más lejana alcanzada (en tokens y en
+       caracteres): el prefijo hasta allí se puede completar a una cadena válida.
+     - expected: terminales que podrían seguir en esa posición.
+     - expects_end: True si en esa posición la cadena podría terminar.
+     - edits: reparación de costo mínimo como lista de (operación, posición, símbolo,
+       reemplazo); operación es "insert", "delete" o "substitute".
+     - repaired: la cadena reparada (None si el lenguaje es vacío o si no hay
+       reparación de costo <= repair_limit).
+     - repair_limit: costo máximo de la reparación buscada (None: sin límite).
+    """
+
+    def __init__(self, valid, position, char_position, expected, expects_end, edits, repaired,
+                 repair_limit=None):
+        self.valid = valid
+        self.position = position
+        self.char_position = char_position
+        self.expected = expected
+        self.expects_end = expects_end
+        self.edits = edits
+        self.repaired = repaired
+        self.repair_limit = repair_limit
+
+    @property
+    def cost(self):
+        return len(self.edits)
+
+    def describe_edits(self):
+        """
+        Retorna cada edición de la reparación como texto.
+        """
+        lines = []
+        for operation, position, symbol, replacement in self.edits:
+            if operation == "insert":
+                lines.append(f"insertar '{replacement}' en la posición {position}")
+            elif operation == "delete":
+                lines.append(f"eliminar '{symbol}' en la posición {position}")
+            else:
+                lines.append(f"reemplazar '{symbol}' por '{replacement}' en la posición {position}")
+        return lines
+
+    def to_dict(self):
+        """
+        Retorna el diagnóstico como diccionario serializable a JSON.
+        """
+        return {"valid": self.valid, "position": self.position, "char_position": self.char_position,
+                "expected": self.expected, "expects_end": self.expects_end,
+                "edits": [list(edit) for edit in self.edits], "repaired": self.repaired,
+                "repair_limit": self.repair_limit}
+
+    def lines(self):
+        """
+        Retorna el diagnóstico como lista de líneas legibles.
+        """
+        if self.valid:
+            return ["La cadena es válida."]
+        expected = ", ".join(f"'{sym}'" for sym in self.expected)
+        if self.expects_end:
+            expected = f"{expected} o fin de la cadena" if expected else "fin de la cadena"
+        result = [f"Error en el carácter {self.char_position} (token {self.position}).",
+                  f"Se esperaba: {expected or 'nada (el lenguaje es vacío)'}"]
+        if self.repaired is not None:
+            result.append(f"Reparación mínima ({self.cost} ediciones): '{self.repaired}'")
+            result.extend(f"  - {line}" for line in self.describe_edits())
+        elif self.repair_limit is not None:
+            result.append(f"No hay reparación de {self.repair_limit} ediciones o menos.")
+        return result
+
+
+def _script_edits(script, symbols, ids):
+    """
+    Convierte un guion de operaciones (operación, posición, terminal) en la lista de
+    ediciones y la cadena reparada.
+    """
+    edits = []
+    output = []
+    for operation, position, terminal in script:
+        original = symbols[ids[position]] if position < len(ids) and ids[position] != UNKNOWN else None
+        if operation == "match":
+            output.append(symbols[terminal])
+        elif operation == "insert":
+            output.append(symbols[terminal])
+            edits.append(("insert", position, None, symbols[terminal]))
+        elif operation == "substitute":
+            output.append(symbols[terminal])
+            edits.append(("substitute", position, original, symbols[terminal]))
+        else:
+            edits.append(("delete", position, original, None))
+    return edits, "".join(output)
+
+
+def _unknown_aware(symbols, text, starts, edits):
+    """
+    Los tokens desconocidos no tienen símbolo en el alfabeto: se muestra el carácter.
+    """
+    return [(op, pos, symbol if symbol is not None or op == "insert" else text[starts[pos]:starts[pos + 1]],
+             replacement) for op, pos, symbol, replacement in edits]
+
+
+def diagnose_dfa(dfa, ids, text, starts):
+    """
+    Diagnóstico con el DFA compilado (ver automaton.py).
+
+    La posición más lejana es la del primer token sin transición: como el DFA es
+    mínimo y sin estado muerto, todo estado alcanzado puede llegar a un estado final.
+    La reparación es un camino mínimo (BFS 0-1) en el grafo de pares (posición,
+    estado): aceptar un token cuesta 0; insertar, eliminar o reemplazar cuesta 1.
+    Tiempo O(n · estados · |alfabeto|), lineal en la longitud de la entrada.
+
+    :param ids: Identificadores de token (UNKNOWN para caracteres desconocidos).
+    :param text: Texto original (para mostrar los caracteres desconocidos).
+    :param starts: Posición en `text` de cada token (ver Tokenizer.tokenize_spans).
+    """
+    transitions = dfa.transitions
+    k = len(dfa.alphabet)
+    n = len(ids)
+
+    state = dfa.start
+    position = 0
+    while position < n:
+        token = ids[position]
+        target = transitions[state][token] if token != UNKNOWN else DEAD
+        if target == DEAD:
+            break
+        state = target
+        position += 1
+    valid = position == n and dfa.accepting[state]
+    expected = [dfa.alphabet[a] for a in range(k) if transitions[state][a] != DEAD]
+    expects_end = bool(dfa.accepting[state])
+    if valid:
+        return Diagnosis(True, n, starts[n], expected, expects_end, [], text)
+
+    # BFS 0-1 sobre (posición, estado); parent guarda (nodo anterior, operación, terminal)
+    start = (0, dfa.start)
+    distance = {start: 0}
+    parent = {}
+    queue = deque([start])
+    goal = None
+    while queue:
+        node = queue.popleft()
+        pos, q = node
+        cost = distance[node]
+        if pos == n and dfa.accepting[q]:
+            goal = node
+            break
+        row = transitions[q]
+        moves = []
+        if pos < n:
+            token = ids[pos]
+            moves.append(((pos + 1, q), 1, "delete", None))
+            for a in range(k):
+                if row[a] != DEAD:
+                    if a == token:
+                        moves.append(((pos + 1, row[a]), 0, "match", a))
+                    else:
+                        moves.append(((pos + 1, row[a]), 1, "substitute", a))
+        for a in range(k):
+            if row[a] != DEAD:
+                moves.append(((pos, row[a]), 1, "insert", a))
+        for target, weight, operation, terminal in moves:
+            new_cost = cost + weight
+            if new_cost < distance.get(target, new_cost + 1):
+                distance[target] = new_cost
+                parent[target] = (node, operation, terminal)
+                if weight:
+                    queue.append(target)
+                else:
+                    queue.appendleft(target)
+
+    if goal is None:
+        return Diagnosis(False, position, starts[position], expected, expects_end, [], None)
+    script = []
+    node = goal
+    while node != start:
+        previous, operation, terminal = parent[node]
+        script.append((operation, previous[0], terminal))
+        node = previous
+    script.reverse()
+    edits, repaired = _script_edits(script, dfa.alphabet, ids)
+    return Diagnosis(False, position, starts[position], expected, expects_end,
+                     _unknown_aware(dfa.alphabet, text, starts, edits), repaired)
+
+
+def _shortest_yields(earley):
+    """
+    Longitud de la cadena terminal más corta que deriva cada no terminal.
+    """
+    shortest = {}
+    changed = True
+    while changed:
+        changed = False
+        for left, right in earley.rules:
+            if all(sym >= 0 or sym in shortest for sym in right):
+                length = sum(1 if sym >= 0 else shortest[sym] for sym in right)
+                if length < shortest.get(left, length + 1):
+                    shortest[left] = length
+                    changed = True
+    return shortest
+
+
+def _correcting_earley(earley, ids, max_cost):
+    """
+    Earley con corrección de errores (en el estilo de Aho y Peterson): además de
+    aceptar el token, cada elemento puede insertar el terminal esperado, reemplazar
+    el token o eliminarlo, con costo 1. Dentro de cada conjunto los elementos se
+    procesan en orden de costo (Dijkstra con una cola por niveles) y se descartan los de costo > max_cost,
+    de modo que con reparaciones pequeñas el trabajo es proporcional al de Earley.
+
+    :return: Guion de operaciones (operación, posición, terminal) de costo mínimo,
+             o None si no hay reparación de costo <= max_cost.
+    """
+    rules, by_left = earley.rules, earley.by_left
+    n = len(ids)
+    best = [dict() for _ in range(n + 1)]
+    back = [dict() for _ in range(n + 1)]
+    waits = [dict() for _ in range(n + 1)]
+    # Cola por niveles de costo (0..max_cost) para cada conjunto, en lugar de un montículo
+    queues = [None] * (n + 1)
+
+    def relax(j, key, cost, pointer):
+        if cost <= max_cost and cost < best[j].get(key, max_cost + 1):
+            best[j][key] = cost
+            back[j][key] = pointer
+            if queues[j] is None:
+                queues[j] = [[] for _ in range(max_cost + 1)]
+            queues[j][cost].append(key)
+
+    for rule in by_left.get(earley.start, ()):
+        relax(0, (rule, 0, 0), 0, None)
+
+    for j in range(n + 1):
+        if queues[j] is None:
+            continue
+        done = set()
+        here = {}  # no terminal -> elementos completos con origen j ya procesados
+        token = ids[j] if j < n else None
+        best_j = best[j]
+        levels = queues[j]
+        # Las predicciones tienen costo 0 aunque las dispare un elemento de costo
+        # mayor, así que un nivel ya recorrido puede recibir elementos nuevos:
+        # se recuerda hasta dónde se procesó cada nivel y se vuelve al más bajo pendiente
+        processed = [0] * (max_cost + 1)
+        cost = 0
+        while cost <= max_cost:
+            bucket = levels[cost]
+            if processed[cost] == len(bucket):
+                lower = next((c for c in range(cost) if processed[c] < len(levels[c])), None)
+                cost = cost + 1 if lower is None else lower
+                continue
+            key = bucket[processed[cost]]
+            processed[cost] += 1
+            if key in done or best_j[key] != cost:
+                continue
+            done.add(key)
+            rule, dot, origin = key
+            left, right = rules[rule]
+            if dot < len(right):
+                sym = right[dot]
+                advanced = (rule, dot + 1, origin)
+                if sym >= 0:
+                    relax(j, advanced, cost + 1, ("insert", (j, key), sym))
+                    if j < n:
+                        if sym == token:
+                            relax(j + 1, advanced, cost, ("match", (j, key), sym))
+                        else:
+                            relax(j + 1, advanced, cost + 1, ("substitute", (j, key), sym))
+                else:
+                    waiting = waits[j].setdefault(sym, [])
+                    if not waiting:
+                        for predicted in by_left.get(sym, ()):
+                            relax(j, (predicted, 0, j), 0, None)
+                    waiting.append(key)
+                    for child, child_cost in here.get(sym, ()):
+                        relax(j, advanced, cost + child_cost, ("complete", (j, key), (j, child)))
+            else:
+                if origin == j:
+                    here.setdefault(left, []).append((key, cost))
+                best_origin = best[origin]
+                for parent in waits[origin].get(left, ()):
+                    parent_rule, parent_dot, parent_origin = parent
+                    relax(j, (parent_rule, parent_dot + 1, parent_origin),
+                          best_origin[parent] + cost, ("complete", (origin, parent), (j, key)))
+            if j < n:
+                relax(j + 1, key, cost + 1, ("delete", (j, key), None))
+        queues[j] = None
+
+    finals = [(cost, key) for key, cost in best[n].items()
+              if key[2] == 0 and rules[key[0]][0] == earley.start and key[1] == len(rules[key[0]][1])]
+    if not finals:
+        return None
+
+    # Reconstrucción iterativa del guion a partir de los punteros
+    script = []
+    stack = [(n, min(finals)[1])]
+    while stack:
+        entry = stack.pop()
+        if entry[0] == "emit":
+            script.append(entry[1])
+            continue
+        j, key = entry
+        pointer = back[j][key]
+        if pointer is None:
+            continue
+        kind = pointer[0]
+        if kind == "complete":
+            stack.append(pointer[2])
+            stack.append(pointer[1])
+        else:
+            previous_j = pointer[1][0]
+            stack.append(("emit", (kind, previous_j, pointer[2])))
+            stack.append(pointer[1])
+    return script
+
+
+def diagnose_earley(earley, ids, text, starts, max_repair=MAX_REPAIR_COST):
+    """
+    Diagnóstico con el reconocedor de Earley (ver earley.py).
+
+    La posición más lejana es el último conjunto de Earley no vacío (Earley tiene
+    la propiedad de prefijo correcto) y los terminales esperados son los que siguen
+    al punto en ese conjunto. La reparación se busca con `_correcting_earley`
+    duplicando el costo máximo hasta encontrarla o hasta llegar a `max_repair`.
+
+    :param ids: Identificadores de token (UNKNOWN para caracteres desconocidos).
+    :param text: Texto original (para mostrar los caracteres desconocidos).
+    :param starts: Posición en `text` de cada token (ver Tokenizer.tokenize_spans).
+    :param max_repair: Costo máximo de la reparación (None: sin límite).
+    """
+    n = len(ids)
+    sets = earley.parse_sets(ids) if earley.start is not None else [[]]
+    position = len(sets) - 1
+    rules = earley.rules
+    expected_ids = set()
+    expects_end = False
+    for rule, dot, origin in sets[position]:
+        left, right = rules[rule]
+        if dot < len(right) and right[dot] >= 0:
+            expected_ids.add(right[dot])
+        elif dot == len(right) and origin == 0 and left == earley.start:
+            expects_end = True
+    expected = [earley.alphabet[a] for a in sorted(expected_ids)]
+    if position == n and expects_end:
+        return Diagnosis(True, n, starts[n], expected, expects_end, [], text)
+
+    shortest = _shortest_yields(earley)
+    if earley.start not in shortest:
+        return Diagnosis(False, position, starts[position], expected, expects_end, [], None)
+    limit = n + shortest[earley.start]  # Reemplazar toda la entrada siempre alcanza
+    bounded = max_repair is not None and max_repair < limit
+    if bounded:
+        limit = max_repair
+    max_cost = 1
+    while True:
+        script = _correcting_earley(earley, ids, min(max_cost, limit))
+        if script is not None or max_cost >= limit:
+            break
+        max_cost *= 2
+    if script is None:
+        return Diagnosis(False, position, starts[position], expected, expects_end, [], None, limit)
+    edits, repaired = _script_edits(script, earley.alphabet, ids)
+    return Diagnosis(False, position, starts[position], expected, expects_end,
+                     _unknown_aware(earley.alphabet, text, starts, edits), repaired,
+                     limit if bounded else None)
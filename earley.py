@@ -0,0 +1,229 @@
+from grammar import Grammar
+from chart_store import SPILL_THRESHOLD, WaitingChart
+from ll1 import all_productions, nullable_set
+from tokenizer import terminal_alphabet
+
+
+class EarleyRecognizer:
+    """
+    Reconocedor de Earley para gramáticas libres de contexto arbitrarias
+    (ambiguas, recursivas por la izquierda, con producciones vacías).
+    Tiempo O(n³) en el peor caso, O(n²) para gramáticas no ambiguas y lineal
+    para la mayoría de las gramáticas deterministas.
+
+    Las producciones vacías se tratan con la corrección de Aycock y Horspool: al
+    predecir un no terminal anulable el punto avanza también sobre él.
+
+    Para reconocer solo se conservan los elementos en espera de los conjuntos ya
+    cerrados, codificados como enteros en arreglos compactos que pasan a archivos
+    mapeados en memoria al superar `spill_threshold` bytes (ver chart_store.py).
+    """
+
+    def __init__(self, grammar: Grammar, spill_threshold=SPILL_THRESHOLD, spill_directory=None):
+        """
+        :param grammar: Instancia de Grammar.
+        :param spill_threshold: Bytes de cada arreglo del diagrama a partir de los cuales
+                                se usa un archivo mapeado. None lo mantiene en memoria.
+        :param spill_directory: Directorio de esos archivos (por defecto el temporal).
+        """
+        self.spill_threshold = spill_threshold
+        self.spill_directory = spill_directory
+        productions = all_productions(grammar)
+        self.alphabet = terminal_alphabet(grammar)
+        ids = {sym: i for i, sym in enumerate(self.alphabet)}
+        # Los no terminales se codifican como enteros negativos y los terminales por su id
+        self.names = list(productions)
+        codes = {name: -(k + 1) for k, name in enumerate(self.names)}
+        self.start = codes.get(grammar.start)
+        nullable = nullable_set(productions)
+        self.nullable = {codes[name] for name in nullable}
+
+        # Se descartan las reglas con no terminales improductivos: así todo elemento
+        # de un conjunto de Earley corresponde a un prefijo que se puede completar
+        productive = set()
+        changed = True
+        while changed:
+            changed = False
+            for name, prods in productions.items():
+                if name not in productive and any(all(sym in productive or sym not in productions
+                                                       for sym in prod) for prod in prods):
+                    productive.add(name)
+                    changed = True
+
+        # Reglas como tuplas (izquierda, derecha); by_left[código] = índices de sus reglas
+        # y sources[regla] = (no terminal, índice de la producción en la gramática)
+        self.rules = []
+        self.sources = []
+        self.by_left = {code: [] for code in codes.values()}
+        for name, prods in productions.items():
+            for index, prod in enumerate(prods):
+                if any(sym in productions and sym not in productive for sym in prod):
+                    continue
+                right = tuple(codes[sym] if sym in codes else ids[sym] for sym in prod)
+                self.by_left[codes[name]].append(len(self.rules))
+                self.rules.append((codes[name], right))
+                self.sources.append((name, index))
+
+        # Elementos codificados como enteros: origen * dotted_count + posición punteada,
+        # donde las posiciones punteadas de la regla r van de dotted_base[r] a
+        # dotted_base[r] + len(derecha); así avanzar el punto es sumar 1
+        self.dotted_base = []
+        self.dotted_after = []  # símbolo tras el punto, o None si el elemento está completo
+        self.dotted_left = []
+        for left, right in self.rules:
+            self.dotted_base.append(len(self.dotted_after))
+            self.dotted_after.extend(right)
+            self.dotted_after.append(None)
+            self.dotted_left.extend([left] * (len(right) + 1))
+        self.dotted_count = len(self.dotted_after)
+
+    def recognize(self, tokens):
+        """
+        Indica si la secuencia de terminales pertenece al lenguaje.
+        """
+        ids = {sym: i for i, sym in enumerate(self.alphabet)}
+        try:
+            return self.recognize_ids([ids[tok] for tok in tokens])
+        except KeyError:
+            return False
+
+    def recognize_ids(self, ids):
+        """
+        Igual que `recognize`, pero recibe identificadores de token (ver tokenizer.py).
+        A diferencia de `parse_sets`, de cada conjunto cerrado solo conserva los
+        elementos en espera, en un WaitingChart.
+        """
+        if self.start is None:
+            return False
+        by_left, nullable = self.by_left, self.nullable
+        base, after, left_of, count = self.dotted_base, self.dotted_after, self.dotted_left, self.dotted_count
+        start = self.start
+        n = len(ids)
+        chart = WaitingChart(self.spill_threshold, self.spill_directory)
+        try:
+            scan = [base[rule] for rule in by_left.get(start, ())]
+            accepted = False
+            for position in range(n + 1):
+                seen = set(scan)
+                agenda = list(seen)
+                waits = {}
+                completed_null = set()
+                next_scan = []
+                token = ids[position] if position < n else None
+                offset = position * count
+
+                while agenda:
+                    item = agenda.pop()
+                    origin, dotted = divmod(item, count)
+                    sym = after[dotted]
+                    if sym is not None:
+                        if sym >= 0:
+                            if sym == token:
+                                next_scan.append(item + 1)
+                            continue
+                        # Predicción
+                        first_wait = sym not in waits
+                        waits.setdefault(sym, []).append(item)
+                        if first_wait:
+                            for predicted in by_left.get(sym, ()):
+                                new = offset + base[predicted]
+                                if new not in seen:
+                                    seen.add(new)
+                                    agenda.append(new)
+                        if sym in nullable or sym in completed_null:
+                            new = item + 1
+                            if new not in seen:
+                                seen.add(new)
+                                agenda.append(new)
+                    else:
+                        # Compleción: los que esperan en conjuntos cerrados están en el diagrama
+                        left = left_of[dotted]
+                        if origin == 0 and left == start and position == n:
+                            accepted = True
+                        if origin == position:
+                            completed_null.add(left)
+                            parents = waits.get(left, ())
+                        else:
+                            parents = chart.waiting(origin, left)
+                        for parent in parents:
+                            new = parent + 1
+                            if new not in seen:
+                                seen.add(new)
+                                agenda.append(new)
+
+                chart.close_set(waits)
+                if position < n and not next_scan:
+                    return False
+                scan = next_scan
+            return accepted
+        finally:
+            chart.close()
+
+    def parse_sets(self, ids):
+        """
+        Construye los conjuntos de Earley para la entrada. Cada elemento es una tupla
+        (regla, punto, origen). Si algún conjunto queda vacío el análisis se detiene
+        y la lista retornada es más corta que len(ids) + 1.
+        """
+        rules, by_left, nullable = self.rules, self.by_left, self.nullable
+        n = len(ids)
+        sets = []
+        # waiting[i][B]: elementos del conjunto i con el punto delante de B
+        waiting = []
+        scan = [(rule, 0, 0) for rule in by_left.get(self.start, [])]
+
+        for position in range(n + 1):
+            items = []
+            seen = set()
+            agenda = []
+            for item in scan:
+                if item not in seen:
+                    seen.add(item)
+                    agenda.append(item)
+            waits = {}
+            waiting.append(waits)
+            # Anulables completos en esta posición (para elementos que los esperan después)
+            completed_null = set()
+            next_scan = []
+            token = ids[position] if position < n else None
+
+            while agenda:
+                item = agenda.pop()
+                items.append(item)
+                rule, dot, origin = item
+                left, right = rules[rule]
+                if dot < len(right):
+                    sym = right[dot]
+                    if sym >= 0:
+                        if sym == token:
+                            next_scan.append((rule, dot + 1, origin))
+                        continue
+                    # Predicción
+                    first_wait = sym not in waits
+                    waits.setdefault(sym, []).append(item)
+                    if first_wait:
+                        for predicted in by_left.get(sym, ()):
+                            new = (predicted, 0, position)
+                            if new not in seen:
+                                seen.add(new)
+                                agenda.append(new)
+                    if sym in nullable or sym in completed_null:
+                        new = (rule, dot + 1, origin)
+                        if new not in seen:
+                            seen.add(new)
+                            agenda.append(new)
+                else:
+                    # Compleción
+                    if origin == position:
+                        completed_null.add(left)
+                    for parent_rule, parent_dot, parent_origin in waiting[origin].get(left, ()):
+                        new = (parent_rule, parent_dot + 1, parent_origin)
+                        if new not in seen:
+                            seen.add(new)
+                            agenda.append(new)
+
+            sets.append(items)
+            if position < n and not next_scan:
+                break
+            scan = next_scan
+        return sets
@@ -0,0 +1,364 @@
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from grammar import Grammar
+from grammar_generator import GrammarGenerator, stream_seed
+from grammar_validator import GrammarValidator
+from lazy_imports import optional_import
+from tokenizer import TokenizeError
+
+# Motor de referencia: Earley acepta cualquier gramática libre de contexto
+REFERENCE = "earley"
+
+# Longitud máxima (en terminales) de las entradas que se pasan a la validación con
+# derivación (`validate_string`), que además arma el bosque y el árbol de cada cadena
+LEGACY_LIMIT = 12
+
+# Entradas de cada bloque que procesa un proceso del pool
+CHUNK_SIZE = 256
+
+
+def mutate(ids, rng, alphabet_size):
+    """
+    Retorna una variante cercana de la secuencia de tokens: inserta, elimina,
+    reemplaza o intercambia un token. Son las entradas que más suelen separar a
+    motores con errores en los bordes del lenguaje.
+
+    :param ids: Identificadores de token de una cadena.
+    :param rng: Instancia de random.Random.
+    :param alphabet_size: Cantidad de terminales.
+    """
+    ids = list(ids)
+    operations = ["insert"] if alphabet_size else []
+    if ids:
+        operations.append("delete")
+        if alphabet_size > 1:
+            operations.append("substitute")
+    if len(ids) > 1:
+        operations.append("swap")
+    if not operations:
+        return ids
+    operation = rng.choice(operations)
+    if operation == "insert":
+        ids.insert(rng.randint(0, len(ids)), rng.randrange(alphabet_size))
+    elif operation == "delete":
+        del ids[rng.randrange(len(ids))]
+    elif operation == "substitute":
+        position = rng.randrange(len(ids))
+        ids[position] = rng.choice([token for token in range(alphabet_size) if token != ids[position]])
+    else:
+        position = rng.randrange(len(ids) - 1)
+        ids[position], ids[position + 1] = ids[position + 1], ids[position]
+    return ids
+
+
+def minimize(ids, failing):
+    """
+    Reduce una entrada con la que falla una comprobación a una mínima con el
+    algoritmo ddmin (delta debugging): se prueban los complementos de particiones
+    cada vez más finas hasta que no se puede quitar ningún token.
+
+    :param ids: Secuencia de tokens con la que `failing` retorna True.
+    :param failing: Función que recibe una lista de tokens y retorna un booleano.
+    :return: Lista de tokens mínima (1-mínima) con la que `failing` sigue fallando.
+    """
+    ids = list(ids)
+    granularity = 2
+    while len(ids) >= 2:
+        size = len(ids) // granularity
+        parts = [ids[start:start + size] for start in range(0, len(ids), size)] if size else [ids]
+        reduced = False
+        for index in range(len(parts)):
+            complement = [token for k, part in enumerate(parts) if k != index for token in part]
+            if failing(complement):
+                ids = complement
+                granularity = max(granularity - 1, 2)
+                reduced = True
+                break
+        if not reduced:
+            if granularity >= len(ids):
+                break
+            granularity = min(granularity * 2, len(ids))
+    if len(ids) == 1 and failing([]):
+        return []
+    return ids
+
+
+def available_engines(validator):
+    """
+    Motores de reconocimiento aplicables a la gramática del validador (ver
+    GrammarValidator.ENGINES), más "legacy": la validación con derivación
+    (`validate_string`) de la interfaz y del servicio.
+    """
+    engines = []
+    for name in validator.ENGINES:
+        if name == "dfa" and not validator._has_dfa():
+            continue
+        if name == "ll1" and not validator.profile.ll1:
+            continue
+        if name == "matrix" and optional_import("numpy") is None:
+            continue
+        engines.append(name)
+    engines.append("legacy")
+    return engines
+
+
+class EngineRunner:
+    """
+    Ejecuta un motor del validador sobre secuencias de tokens. Los errores del
+    motor se registran como resultado (texto con el tipo de excepción) para que
+    cuenten como desacuerdo en lugar de detener la prueba.
+    """
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.tokenizer = validator._tokenizer
+
+    def run(self, name, ids):
+        """
+        :return: True/False, "error: <tipo>" o None si el motor no se aplica a la entrada.
+        """
+        try:
+            if name != "legacy":
+                return self.validator._recognizer(name)(ids)
+            if len(ids) > LEGACY_LIMIT:
+                return None
+            text = "".join(self.tokenizer.to_symbols(ids))
+            # Con terminales de varios caracteres el texto puede volver a dividirse de
+            # otra forma; esas entradas no se comparan
+            if self.tokenizer.tokenize(text) != list(ids):
+                return None
+            return self.validator.validate_string(text)[0]
+        except Exception as error:  # Cualquier fallo del motor es un hallazgo
+            return f"error: {type(error).__name__}"
+
+
+# Ejecutor de cada proceso del pool (ver _init_fuzz_worker)
+_fuzz_runner = None
+
+
+def _init_fuzz_worker(grammar):
+    global _fuzz_runner
+    _fuzz_runner = EngineRunner(GrammarValidator(grammar))
+
+
+def _fuzz_worker_chunk(engines, inputs):
+    return _run_chunk(_fuzz_runner, engines, inputs)
+
+
+def _run_chunk(runner, engines, inputs):
+    """
+    Pasa un bloque de entradas por todos los motores.
+
+    :return: Diccionario motor -> (lista de resultados, segundos).
+    """
+    results = {}
+    for name in engines:
+        begin = time.perf_counter()
+        results[name] = ([runner.run(name, ids) for ids in inputs], time.perf_counter() - begin)
+    return results
+
+
+class FuzzReport:
+    """
+    Resultado de `differential_fuzz` para una gramática.
+
+    Atributos:
+     - generated / mutated: entradas generadas del lenguaje y variantes cercanas.
+     - sampled: secuencias aleatorias de terminales agregadas para las longitudes
+       en las que el generador falló o no produjo cadenas.
+     - generation_rate: cadenas generadas por segundo.
+     - rates: motor -> entradas procesadas por segundo (sumando todos los procesos).
+     - disagreements: lista de diccionarios con "kind" ("engine" si un motor no
+       coincide con la referencia, "generator" si una cadena generada no es aceptada),
+       "engine", "expected", "actual", "input" y "minimized" (textos). Si el
+       generador falla para una longitud, "input" es None y "length" la indica.
+    """
+
+    def __init__(self, name, engines, generated, mutated, generation_rate, rates, disagreements, sampled=0):
+        self.name = name
+        self.engines = engines
+        self.generated = generated
+        self.mutated = mutated
+        self.sampled = sampled
+        self.generation_rate = generation_rate
+        self.rates = rates
+        self.disagreements = disagreements
+
+    @property
+    def ok(self):
+        return not self.disagreements
+
+    def to_dict(self):
+        """
+        Retorna el informe como diccionario serializable a JSON.
+        """
+        return {"grammar": self.name, "engines": self.engines, "generated": self.generated,
+                "mutated": self.mutated, "sampled": self.sampled, "generation_rate": self.generation_rate,
+                "rates": self.rates, "disagreements": self.disagreements}
+
+    def lines(self):
+        """
+        Retorna el informe como lista de líneas legibles.
+        """
+        result = [f"{self.name}: {self.generated} cadenas generadas ({self.generation_rate:.0f}/s), "
+                  f"{self.mutated} variantes"
+                  + (f", {self.sampled} secuencias aleatorias" if self.sampled else "")]
+        result.append("  " + ", ".join(f"{name} {rate:.0f}/s" for name, rate in self.rates.items()))
+        if self.ok:
+            result.append("  Sin desacuerdos.")
+        for item in self.disagreements:
+            if item["kind"] == "generator" and item["input"] is None:
+                result.append(f"  El generador falló con la longitud {item['length']}: {item['actual']}")
+            elif item["kind"] == "generator" and item["engine"] == "generator":
+                result.append(f"  Cadena generada que no se divide en terminales: '{item['input']}'")
+            elif item["kind"] == "generator":
+                result.append(f"  Cadena generada rechazada por {REFERENCE}: '{item['input']}'")
+            else:
+                result.append(f"  {item['engine']} da {item['actual']} y {REFERENCE} {item['expected']}: "
+                              f"'{item['input']}' (mínima: '{item['minimized']}')")
+        return result
+
+
+def differential_fuzz(grammar, lengths=(0, 1, 2, 4, 8, 16), count=100, seed=0, workers=1,
+                      engines=None, mutations=2, max_reports=10, name=None):
+    """
+    Prueba diferencial de una gramática: genera cadenas del lenguaje con
+    GrammarGenerator (reproducibles con `seed`) y variantes cercanas de cada una,
+    las pasa por todos los motores y compara cada resultado con el de Earley.
+    Cada desacuerdo se informa con la entrada original y una mínima (ver `minimize`)
+    con la que el motor sigue sin coincidir. Para las longitudes en las que el
+    generador falla o no produce cadenas se agregan `count` secuencias aleatorias de
+    terminales, para que los motores se sigan comparando con esa longitud.
+
+    :param lengths: Longitudes (en caracteres) de las cadenas a generar.
+    :param count: Intentos de generación por longitud.
+    :param seed: Semilla raíz de la generación y de las mutaciones.
+    :param workers: Procesos para ejecutar los motores; None usa todos los núcleos.
+    :param engines: Motores a comparar; por defecto los de `available_engines`.
+    :param mutations: Variantes cercanas por cadena generada.
+    :param max_reports: Máximo de desacuerdos minimizados por motor.
+    :param name: Nombre de la gramática en el informe.
+    :return: Instancia de FuzzReport.
+    :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+    """
+    validator = GrammarValidator(grammar)
+    runner = EngineRunner(validator)
+    tokenizer = runner.tokenizer
+    engines = list(engines) if engines is not None else available_engines(validator)
+    if REFERENCE not in engines:
+        engines.insert(0, REFERENCE)
+    generator = GrammarGenerator(grammar)
+
+    disagreements = []
+    begin = time.perf_counter()
+    generated = []
+    uncovered = []  # Longitudes sin cadenas generadas
+    for length in lengths:
+        try:
+            strings = generator.generate_bulk(length, count, (seed, length), workers=1)
+        except Exception as error:
+            strings = []
+            disagreements.append({"kind": "generator", "engine": "generator", "expected": True,
+                                  "actual": f"error: {type(error).__name__}", "input": None,
+                                  "minimized": None, "length": length})
+        generated.extend(strings)
+        if not strings:
+            uncovered.append(length)
+    generation_seconds = time.perf_counter() - begin
+    sequences = []
+    for string in generated:
+        try:
+            sequences.append(tokenizer.tokenize(string))
+        except TokenizeError as error:
+            disagreements.append({"kind": "generator", "engine": "generator", "expected": True,
+                                  "actual": f"error: {type(error).__name__}", "input": string,
+                                  "minimized": string})
+    generated = sequences
+
+    rng = random.Random(stream_seed(seed, "mutations"))
+    alphabet_size = len(tokenizer.symbols)
+    mutated = [mutate(ids, rng, alphabet_size) for ids in generated for _ in range(mutations)]
+    sample_rng = random.Random(stream_seed(seed, "samples"))
+    sampled = [[sample_rng.randrange(alphabet_size) for _ in range(length)]
+               for length in uncovered if alphabet_size or not length for _ in range(count)]
+    inputs = generated + mutated + sampled
+
+    chunks = [inputs[start:start + CHUNK_SIZE] for start in range(0, len(inputs), CHUNK_SIZE)]
+    if workers is None or workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_fuzz_worker,
+                                 initargs=(grammar,)) as pool:
+            partial = list(pool.map(_fuzz_worker_chunk, [engines] * len(chunks), chunks))
+    else:
+        partial = [_run_chunk(runner, engines, chunk) for chunk in chunks]
+    results = {engine: [result for chunk in partial for result in chunk[engine][0]] for engine in engines}
+    seconds = {engine: sum(chunk[engine][1] for chunk in partial) for engine in engines}
+    rates = {engine: len(inputs) / seconds[engine] if seconds[engine] else 0.0 for engine in engines}
+
+    separator = "" if tokenizer.single_char else " "
+
+    def text(ids):
+        return separator.join(tokenizer.to_symbols(ids))
+
+    expected = results[REFERENCE]
+    for index in range(len(generated)):
+        if expected[index] is not True:
+            disagreements.append({"kind": "generator", "engine": REFERENCE, "expected": True,
+                                  "actual": expected[index], "input": text(inputs[index]),
+                                  "minimized": text(inputs[index])})
+            if sum(item["kind"] == "generator" for item in disagreements) >= max_reports:
+                break
+    for engine in engines:
+        if engine == REFERENCE:
+            continue
+        reported = set()
+        for ids, reference, actual in zip(inputs, expected, results[engine]):
+            if actual is None or actual == reference:
+                continue
+
+            def failing(candidate, engine=engine):
+                result = runner.run(engine, candidate)
+                return result is not None and result != runner.run(REFERENCE, candidate)
+
+            smallest = tuple(minimize(ids, failing))
+            if smallest in reported:
+                continue
+            reported.add(smallest)
+            disagreements.append({"kind": "engine", "engine": engine, "expected": reference, "actual": actual,
+                                  "input": text(ids), "minimized": text(smallest)})
+            if len(reported) >= max_reports:
+                break
+
+    return FuzzReport(name or "gramática", engines, len(generated), len(mutated),
+                      len(generated) / generation_seconds if generation_seconds else 0.0,
+                      rates, disagreements, len(sampled))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Prueba diferencial: compara generador y motores de reconocimiento.")
+    parser.add_argument("grammars", nargs="+", help="Archivos .grm a probar.")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[0, 1, 2, 4, 8, 16],
+                        help="Longitudes de las cadenas generadas.")
+    parser.add_argument("--count", type=int, default=100, help="Cadenas a generar por longitud.")
+    parser.add_argument("--seed", default="0", help="Semilla (misma semilla, mismas entradas).")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para ejecutar los motores.")
+    parser.add_argument("--engines", nargs="+", help="Motores a comparar (por defecto todos los aplicables).")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.grammars:
+        try:
+            report = differential_fuzz(Grammar.from_file(path), args.lengths, args.count, args.seed,
+                                       args.workers, args.engines, name=path)
+        except ValueError as e:
+            print(f"{path}: Error: {e}", file=sys.stderr)
+            failed = True
+            continue
+        failed = failed or not report.ok
+        for line in report.lines():
+            print(line)
+    sys.exit(1 if failed else 0)
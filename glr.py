@@ -0,0 +1,427 @@
+from grammar import Grammar, EPSILON
+from ll1 import END, all_productions, follow_sets
+from tokenizer import terminal_alphabet
+
+
+class LRTables:
+    """
+    Autómata LR(0) de la gramática aumentada (S' -> S) con las reducciones de SLR(1):
+    la regla A -> α se reduce con los terminales de FOLLOW(A) (ver ll1.follow_sets).
+    Los estados con más de una acción para el mismo terminal son los conflictos.
+
+    Los símbolos se codifican como en EarleyRecognizer: terminales por su
+    identificador de token (el fin de entrada es len(alphabet)) y no terminales como
+    enteros negativos.
+    """
+
+    def __init__(self, grammar: Grammar):
+        """
+        :param grammar: Instancia de Grammar.
+        """
+        productions = all_productions(grammar)
+        self.alphabet = terminal_alphabet(grammar)
+        ids = {sym: i for i, sym in enumerate(self.alphabet)}
+        self.end = len(self.alphabet)
+        ids[END] = self.end
+        self.names = list(productions)
+        codes = {name: -(k + 1) for k, name in enumerate(self.names)}
+        self.start = codes.get(grammar.start)
+
+        # Regla 0: S' -> S (S' se codifica con el primer código libre)
+        augmented = -(len(self.names) + 1)
+        self.rules = [(augmented, (self.start,) if self.start is not None else ())]
+        self.by_left = {}
+        for name, prods in productions.items():
+            for prod in prods:
+                self.by_left.setdefault(codes[name], []).append(len(self.rules))
+                self.rules.append((codes[name], tuple(codes[sym] if sym in codes else ids[sym] for sym in prod)))
+
+        follow = follow_sets(grammar, productions)
+        follow_ids = {codes[name]: {ids[sym] for sym in symbols} for name, symbols in follow.items()}
+        follow_ids[augmented] = {self.end}
+
+        # Colección canónica LR(0): cada estado es un conjunto congelado de (regla, punto)
+        self.gotos = []        # gotos[estado][símbolo] -> estado
+        self.reductions = []   # reductions[estado][terminal] -> lista de reglas
+        self.accessing = []    # símbolo con el que se llega a cada estado
+        states = {}
+        kernels = [frozenset([(0, 0)])]
+        states[kernels[0]] = 0
+        self.accessing.append(None)
+        index = 0
+        while index < len(kernels):
+            items = self._closure(kernels[index])
+            moves = {}
+            reductions = {}
+            for rule, dot in items:
+                right = self.rules[rule][1]
+                if dot < len(right):
+                    moves.setdefault(right[dot], set()).add((rule, dot + 1))
+                else:
+                    for terminal in follow_ids.get(self.rules[rule][0], ()):
+                        reductions.setdefault(terminal, []).append(rule)
+            gotos = {}
+            for symbol in sorted(moves):
+                kernel = frozenset(moves[symbol])
+                target = states.get(kernel)
+                if target is None:
+                    target = states[kernel] = len(kernels)
+                    kernels.append(kernel)
+                    self.accessing.append(symbol)
+                gotos[symbol] = target
+            self.gotos.append(gotos)
+            self.reductions.append(reductions)
+            index += 1
+        self.accept_state = self.gotos[0].get(self.start) if self.start is not None else None
+
+    def _closure(self, kernel):
+        items = set(kernel)
+        stack = list(kernel)
+        while stack:
+            rule, dot = stack.pop()
+            right = self.rules[rule][1]
+            if dot < len(right) and right[dot] < 0:
+                for predicted in self.by_left.get(right[dot], ()):
+                    if (predicted, 0) not in items:
+                        items.add((predicted, 0))
+                        stack.append((predicted, 0))
+        return items
+
+    def conflicts(self):
+        """
+        Retorna la lista de (estado, terminal) con más de una acción (desplazar y
+        reducir, o varias reducciones).
+        """
+        result = []
+        for state, reductions in enumerate(self.reductions):
+            for terminal, rules in reductions.items():
+                if len(rules) + (terminal in self.gotos[state]) > 1:
+                    result.append((state, terminal))
+        return result
+
+
+class PackedForest:
+    """
+    Bosque de análisis compartido y empaquetado: cada nodo (símbolo, inicio, fin)
+    aparece una sola vez y guarda sus alternativas (regla, hijos), de modo que todas
+    las derivaciones de la cadena caben en espacio polinomial aunque sean
+    exponenciales en cantidad. Los terminales son nodos sin alternativas.
+    """
+
+    def __init__(self, tables, length):
+        """
+        :param tables: LRTables con los nombres de los símbolos.
+        :param length: Cantidad de terminales de la entrada.
+        """
+        self.tables = tables
+        self.length = length
+        self.nodes = {}  # (símbolo, inicio, fin) -> {(regla, hijos): None}, en orden de inserción
+        self.root = None
+
+    def add(self, key, rule, children):
+        """
+        Agrega una alternativa al nodo; retorna False si ya estaba.
+        """
+        alternatives = self.nodes.setdefault(key, {})
+        if (rule, children) in alternatives:
+            return False
+        alternatives[(rule, children)] = None
+        return True
+
+    def is_ambiguous(self):
+        """
+        Indica si algún nodo alcanzable desde la raíz tiene más de una alternativa.
+        """
+        return any(len(self.nodes.get(key, ())) > 1 for key in self._reachable())
+
+    def _reachable(self):
+        seen = set()
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            key = stack.pop()
+            if key in seen:
+                continue
+            seen.add(key)
+            for _, children in self.nodes.get(key, ()):
+                stack.extend(children)
+        return seen
+
+    def count_trees(self):
+        """
+        Cantidad de árboles de derivación distintos; None si son infinitos (ciclos
+        de producciones unitarias o anulables en el bosque).
+        """
+        if self.root is None:
+            return 0
+        counts = {}
+        state = {}  # clave -> 1 en curso, 2 terminado
+        stack = [(self.root, False)]
+        while stack:
+            key, done = stack.pop()
+            if done:
+                total = 0
+                for _, children in self.nodes.get(key, ()):
+                    product = 1
+                    for child in children:
+                        product *= counts[child]
+                    total += product
+                counts[key] = total if key[0] < 0 else 1
+                state[key] = 2
+                continue
+            if state.get(key) == 2:
+                continue
+            if state.get(key) == 1:
+                return None
+            state[key] = 1
+            stack.append((key, True))
+            for _, children in self.nodes.get(key, ()):
+                for child in children:
+                    if state.get(child) == 1:
+                        return None
+                    if state.get(child) is None:
+                        stack.append((child, False))
+        return counts[self.root]
+
+    def derivation(self):
+        """
+        Derivación por la izquierda del mismo árbol que `to_tree`, sin textos: lista
+        de (producción, inicio, fin), donde producción es el índice de la producción
+        en el orden de ll1.all_productions y [inicio, fin) las posiciones (en tokens)
+        de la parte de la entrada que deriva.
+        """
+        if self.root is None:
+            return []
+        steps = []
+        stack = [(self.root, frozenset())]
+        while stack:
+            key, open_keys = stack.pop()
+            open_keys = open_keys | {key}
+            alternatives = self.nodes.get(key, ())
+            choice = next((alt for alt in alternatives if not any(c in open_keys for c in alt[1])),
+                          next(iter(alternatives), None))
+            if choice is None:
+                continue
+            rule, children = choice
+            # La regla 0 de LRTables es la del símbolo inicial aumentado
+            steps.append((rule - 1, key[1], key[2]))
+            stack.extend((child, open_keys) for child in reversed(children)
+                         if child[0] < 0 and child not in open_keys)
+        return steps
+
+    def to_tree(self):
+        """
+        Extrae un árbol de derivación (la primera alternativa de cada nodo que no
+        vuelve a un nodo ya abierto en la misma rama) en el formato de diccionarios de
+        GrammarValidator.validate_string, que es el que usa TreeVisualizer.
+
+        :return: Tupla (árbol, pasos de la derivación por la izquierda), o (None, []).
+        """
+        if self.root is None:
+            return None, []
+        tables = self.tables
+        names, alphabet, rules = tables.names, tables.alphabet, tables.rules
+        root = {"symbol": names[-self.root[0] - 1], "children": [], "description": "Símbolo inicial"}
+        steps = []
+        # (nodo del árbol, clave del bosque, claves abiertas en la rama)
+        stack = [(root, self.root, frozenset())]
+        while stack:
+            node, key, open_keys = stack.pop()
+            open_keys = open_keys | {key}
+            alternatives = self.nodes.get(key, ())
+            choice = next((alt for alt in alternatives if not any(c in open_keys for c in alt[1])),
+                          next(iter(alternatives), None))
+            if choice is None:
+                continue
+            rule, children = choice
+            name = names[-rules[rule][0] - 1]
+            text = " ".join(names[-s - 1] if s < 0 else alphabet[s] for s in rules[rule][1]) or EPSILON
+            steps.append(f"{name} -> {text}")
+            node["production_applied"] = f"{name} → {text}"
+            pending = []
+            for position, child in enumerate(children):
+                symbol = child[0]
+                if symbol >= 0:
+                    node["children"].append({"symbol": alphabet[symbol], "children": [], "terminal": True,
+                                             "description": f"Terminal '{alphabet[symbol]}' coincide con la entrada"})
+                else:
+                    child_node = {"symbol": names[-symbol - 1], "children": [],
+                                  "description": f"Símbolo {position + 1} de la producción {name} → {text}"}
+                    node["children"].append(child_node)
+                    if child not in open_keys:
+                        pending.append((child_node, child, open_keys))
+            # El hijo más a la izquierda queda arriba de la pila (derivación por la izquierda)
+            stack.extend(reversed(pending))
+        return root, steps
+
+
+class GLRParser:
+    """
+    Analizador GLR (Tomita, con la corrección de Farshi para las reglas vacías)
+    sobre las tablas SLR(1) de LRTables. La pila es un grafo (GSS): los nodos son
+    pares (estado, posición), únicos por posición, y las pilas que llegan al mismo
+    estado se fusionan. Solo se bifurca en los estados con conflictos, así que en
+    las zonas deterministas de la entrada hay un único tope y el costo es lineal;
+    en el peor caso es polinomial y admite cualquier gramática libre de contexto.
+
+    Cada arista de la pila corresponde a un nodo del bosque (PackedForest): el
+    símbolo con el que se llega a su estado y las posiciones de sus extremos, así
+    que el análisis produce el bosque empaquetado con todas las derivaciones. Para
+    solo reconocer se reduce una vez por nodo del fondo y no por camino, lo que
+    acota el costo a O(n³) aunque la entrada tenga exponenciales árboles.
+    """
+
+    def __init__(self, grammar: Grammar):
+        """
+        :param grammar: Instancia de Grammar.
+        """
+        self.tables = LRTables(grammar)
+        self.alphabet = self.tables.alphabet
+
+    def recognize(self, tokens):
+        """
+        Indica si la secuencia de terminales pertenece al lenguaje.
+        """
+        ids = {sym: i for i, sym in enumerate(self.alphabet)}
+        try:
+            return self.recognize_ids([ids[tok] for tok in tokens])
+        except KeyError:
+            return False
+
+    def recognize_ids(self, ids):
+        """
+        Igual que `recognize`, pero recibe identificadores de token (ver tokenizer.py).
+        """
+        return self._run(ids, None)
+
+    def parse(self, tokens):
+        """
+        Igual que `parse_ids`, pero recibe la secuencia de terminales.
+        """
+        ids = {sym: i for i, sym in enumerate(self.alphabet)}
+        try:
+            return self.parse_ids([ids[tok] for tok in tokens])
+        except KeyError:
+            return None
+
+    def parse_ids(self, ids):
+        """
+        Analiza la entrada y retorna el PackedForest con todas sus derivaciones, o
+        None si la cadena no pertenece al lenguaje.
+        """
+        forest = PackedForest(self.tables, len(ids))
+        return forest if self._run(ids, forest) else None
+
+    def _run(self, ids, forest):
+        """
+        Recorre la entrada manteniendo la pila-grafo; si `forest` no es None además
+        construye el bosque de análisis.
+        """
+        tables = self.tables
+        if tables.start is None:
+            return False
+        gotos, reductions, accessing, rules = tables.gotos, tables.reductions, tables.accessing, tables.rules
+        n = len(ids)
+        root = (0, 0)
+        preds = {root: []}   # nodo -> nodos anteriores en la pila
+        level = {0: root}    # estado -> nodo de la posición actual
+
+        for position in range(n + 1):
+            token = ids[position] if position < n else tables.end
+            # Reducciones. Cuando una arista nueva llega a un nodo ya existente solo se
+            # repiten los caminos que pasan por ella: si empieza en ese nodo basta con
+            # reducir desde él; si hay aristas vacías en la posición (reglas ε) otro nodo
+            # puede llegar a ella y se repiten todos (corrección de Farshi)
+            done = set()
+            queue = [(node, None) for node in level.values()]
+            empty_edges = False
+            while queue:
+                node, via = queue.pop()
+                for rule in reductions[node[0]].get(token, ()):
+                    left, right = rules[rule]
+                    if rule == 0 or (via is not None and not right):
+                        continue
+                    if forest is None:
+                        # Para reconocer basta con el nodo del fondo de cada camino
+                        paths = [(bottom,) for bottom in self._bottoms(preds, node, len(right), via)]
+                    else:
+                        paths = self._paths(preds, node, len(right), via)
+                    for path in paths:
+                        if (rule, path) in done:
+                            continue
+                        done.add((rule, path))
+                        bottom = path[-1]
+                        target = gotos[bottom[0]].get(left)
+                        if target is None:
+                            continue
+                        if forest is not None:
+                            children = tuple((accessing[path[k][0]], path[k + 1][1], path[k][1])
+                                             for k in range(len(path) - 2, -1, -1))
+                            forest.add((left, bottom[1], position), rule, children)
+                        empty_edges = empty_edges or bottom[1] == position
+                        new = level.get(target)
+                        if new is None:
+                            new = (target, position)
+                            level[target] = new
+                            preds[new] = [bottom]
+                            queue.append((new, None))
+                        elif bottom not in preds[new]:
+                            preds[new].append(bottom)
+                            if empty_edges:
+                                queue.extend((other, None) for other in level.values())
+                            else:
+                                queue.append((new, bottom))
+
+            if position == n:
+                accepting = level.get(tables.accept_state)
+                if accepting is None or root not in preds[accepting]:
+                    return False
+                if forest is not None:
+                    forest.root = (tables.start, 0, n)
+                return True
+
+            # Desplazamiento: todos los topes que aceptan el token pasan a la posición siguiente
+            shifted = {}
+            for state, node in level.items():
+                target = gotos[state].get(token)
+                if target is not None:
+                    new = shifted.get(target)
+                    if new is None:
+                        new = shifted[target] = (target, position + 1)
+                        preds[new] = []
+                    preds[new].append(node)
+            if not shifted:
+                return False
+            level = shifted
+        return False
+
+    @staticmethod
+    def _paths(preds, node, length, via=None):
+        """
+        Enumera los caminos de `length` aristas que bajan desde `node` por la pila.
+        Cada camino es una tupla de nodos que empieza en `node`; si `via` no es None
+        solo los que siguen primero la arista node -> via.
+        """
+        if via is None:
+            paths = [(node,)]
+        else:
+            paths = [(node, via)]
+            length -= 1
+        for _ in range(length):
+            paths = [path + (previous,) for path in paths for previous in preds[path[-1]]]
+        return paths
+
+    @staticmethod
+    def _bottoms(preds, node, length, via=None):
+        """
+        Como `_paths`, pero retorna solo el conjunto de nodos en que terminan los
+        caminos: su cantidad está acotada por la de nodos de la pila, mientras que la
+        de caminos crece con la ambigüedad de la entrada.
+        """
+        if via is None:
+            nodes = {node}
+        else:
+            nodes = {via}
+            length -= 1
+        for _ in range(length):
+            nodes = {previous for current in nodes for previous in preds[current]}
+        return nodes
@@ -1,6 +1,14 @@
-from tkinter import messagebox
+import re
 from typing import List, Dict, Set, Tuple
 
+# Símbolo usado en los archivos .grm para la producción vacía
+EPSILON = "ε"
+
+# Anotación opcional de peso al final de una alternativa: S -> a S [2.5] | ε [0.5].
+# Solo un número no negativo entre corchetes es un peso; con otro contenido los
+# corchetes son símbolos de la producción (S -> [ S ] | x)
+WEIGHT_PATTERN = re.compile(r"\[\s*((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)\s*\]\s*$")
+
 # Clase que representa una gramática (Tipo 2: CFG o Tipo 3: regular)
 class Grammar:
     """
@@ -8,7 +16,7 @@ class Grammar:
     o una gramática regular (Tipo 3).
     """
 
-    def __init__(self, nonterminals=None, terminals=None, start="", productions=None):
+    def __init__(self, nonterminals=None, terminals=None, start="", productions=None, weights=None):
         """
         Constructor de la clase Grammar.
 
@@ -17,11 +25,15 @@ class Grammar:
         :param start: Símbolo inicial (S).
         :param productions: Diccionario que define las reglas de producción.
                             Ejemplo: { "S": [["a", "S", "b"], ["ε"]] }
+        :param weights: Diccionario opcional con el peso de cada producción, en el mismo
+                        orden que `productions`. Ejemplo: { "S": [3.0, 1.0] }
+                        Las producciones sin peso valen 1.
         """
         self.nonterminals = nonterminals if nonterminals is not None else []
         self.terminals = terminals if terminals is not None else []
         self.start = start
         self.productions = productions if productions is not None else {}
+        self.weights = weights if weights is not None else {}
 
     @staticmethod
     def from_text(text: str):
@@ -37,6 +49,10 @@ class Grammar:
             Productions:
             S -> a S b | ε
 
+        Cada alternativa puede terminar con un peso entre corchetes (por ejemplo
+        `S -> a S b [3] | ε [1]`); las alternativas sin peso valen 1. Si lo que está
+        entre corchetes no es un número, los corchetes son símbolos (`S -> [ S ] | x`).
+
         Retorna un objeto Grammar.
         """
         # Limpia líneas vacías y espacios
@@ -46,6 +62,7 @@ class Grammar:
         terminals = set()
         start = None
         productions = {}
+        weights = {}
 
         section = None  # Rastrea en qué sección del texto estamos
         for line in lines:
@@ -83,12 +100,25 @@ class Grammar:
                     if left not in productions:
                         productions[left] = []
                     for opt in options:
+                        weight = 1.0
+                        match = WEIGHT_PATTERN.search(opt)
+                        if match:
+                            weight = float(match.group(1))
+                            if not weight > 0 or weight == float("inf"):
+                                raise ValueError(f"El peso de la producción {left} -> {opt} debe ser positivo.")
+                            opt = opt[:match.start()].strip() or EPSILON
                         # Se separan los símbolos por espacio
                         symbols = opt.split()
                         productions[left].append(symbols)
+                        # Los pesos solo se guardan si alguna alternativa los declara
+                        if match or left in weights:
+                            weights.setdefault(left, [1.0] * (len(productions[left]) - 1)).append(weight)
 
         # Crea la instancia de Grammar con los datos recolectados
-        grammar = Grammar(nonterminals, terminals, start, productions)
+        for left, prods in productions.items():
+            if left in weights:
+                weights[left].extend([1.0] * (len(prods) - len(weights[left])))
+        grammar = Grammar(nonterminals, terminals, start, productions, weights)
         grammar.type = grammar_type if grammar_type is not None else "Desconocido"
         return grammar
 
@@ -102,6 +132,51 @@ class Grammar:
             text = f.read()
         return Grammar.from_text(text)
 
+    def is_nonterminal(self, symbol):
+        """
+        Indica si un símbolo es no terminal: aparece declarado en NonTerminals
+        o tiene producciones propias.
+        """
+        return symbol in self.productions or symbol in self.nonterminals
+
+    def get_terminals(self):
+        """
+        Retorna el conjunto de terminales efectivo de la gramática.
+        Si el archivo no declara la sección Terminals, se infieren a partir de las
+        producciones (todo símbolo que no es no terminal ni ε).
+        """
+        terminals = set(self.terminals)
+        for prods in self.productions.values():
+            for prod in prods:
+                for sym in prod:
+                    if sym != EPSILON and not self.is_nonterminal(sym):
+                        terminals.add(sym)
+        return terminals
+
+    @property
+    def weighted(self):
+        """
+        Indica si alguna producción declara un peso.
+        """
+        return bool(self.weights)
+
+    def get_weights(self):
+        """
+        Retorna el peso de cada producción, en el mismo orden que `get_productions`
+        (1 para las producciones sin peso declarado).
+        """
+        return {nt: list(self.weights.get(nt, [1.0] * len(prods))) for nt, prods in self.productions.items()}
+
+    def get_productions(self):
+        """
+        Retorna las producciones normalizadas: la producción vacía se representa
+        siempre como lista vacía (el archivo .grm la escribe como ["ε"]).
+        """
+        normalized = {}
+        for nt, prods in self.productions.items():
+            normalized[nt] = [[sym for sym in prod if sym != EPSILON] for prod in prods]
+        return normalized
+
     def __str__(self):
         """
         Retorna una representación en texto legible de la gramática,
@@ -114,7 +189,8 @@ class Grammar:
         result.append("Producciones:")
         for nt, prods in self.productions.items():
             prod_strs = []
-            for p in prods:
-                prod_strs.append(" ".join(p))
+            weights = self.weights.get(nt)
+            for i, p in enumerate(prods):
+                prod_strs.append(" ".join(p) + (f" [{weights[i]:g}]" if weights else ""))
             result.append(f"  {nt} -> {' | '.join(prod_strs)}")
         return "\n".join(result)
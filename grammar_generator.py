@@ -1,30 +1,324 @@
-from tkinter import messagebox
+import hashlib
 import random
+import re
+from automaton import accepts_at_end, compile_regular
+from cnf import to_cnf
+from length_dag import LengthDAG
+from pcfg import AliasTable, shortest_yields
+from tokenizer import character_grammar
+
+# Cantidad de cadenas de cada bloque de la generación masiva: cada bloque usa su
+# propio flujo aleatorio, así que el resultado no depende de cuántos procesos lo generan
+CHUNK_SIZE = 64
+
+
+# Texto que representa un entero decimal (ver `_normalize_seed`)
+INTEGER_PATTERN = re.compile(r"\s*[+-]?\d+\s*")
+
+
+def _normalize_seed(seed):
+    """
+    Forma canónica de una semilla: los textos que representan un entero decimal se
+    convierten a int, también dentro de tuplas y listas. La línea de comandos recibe
+    la semilla como texto ("42") y el servicio JSON como número (42), y ambas deben
+    dar las mismas cadenas.
+    """
+    if isinstance(seed, str) and INTEGER_PATTERN.fullmatch(seed):
+        return int(seed)
+    if isinstance(seed, (tuple, list)):
+        return tuple(_normalize_seed(item) for item in seed)
+    return seed
+
+
+def stream_seed(seed, index):
+    """
+    Deriva la semilla del flujo aleatorio número `index` a partir de una semilla raíz
+    (al estilo de las secuencias de semillas): se mezclan ambas con SHA-256 y se usan
+    los 256 bits como semilla de un random.Random. Flujos distintos quedan en estados
+    del Mersenne Twister sin relación entre sí, de modo que no se solapan en la práctica.
+
+    :param seed: Semilla raíz (entero o texto; "42" y 42 son la misma semilla).
+    :param index: Número de flujo (por ejemplo, el bloque o el proceso).
+    """
+    seed = _normalize_seed(seed)
+    digest = hashlib.sha256(f"{type(seed).__name__}:{seed}/{index}".encode("utf-8")).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _first_distinct(items, count):
+    """
+    Retorna los primeros `count` elementos distintos de un iterable, en orden de
+    aparición, sin recorrer el resto.
+    """
+    distinct = {}
+    for item in items:
+        distinct[item] = None
+        if len(distinct) >= count:
+            break
+    return list(distinct)
+
+
+# Generador de cada proceso del pool de generate_bulk (ver _init_bulk_worker)
+_bulk_generator = None
+
+
+def _init_bulk_worker(grammar):
+    global _bulk_generator
+    _bulk_generator = GrammarGenerator(grammar)
+
+
+def _bulk_worker_chunk(length, seed, chunk, size):
+    return _bulk_generator.generate_chunk(length, seed, chunk, size)
 
 # Clase que se encarga de generar cadenas que pertenecen a una gramática dada
 class GrammarGenerator:
-    def __init__(self, grammar):
+    def __init__(self, grammar, seed=None):
         """
         Constructor de la clase GrammarGenerator.
         Recibe una instancia de Grammar y configura un generador aleatorio.
+
+        :param seed: Semilla del generador aleatorio. Con None se toma del sistema
+                     operativo y las cadenas generadas no son reproducibles.
         """
         self.grammar = grammar
-        self.rng = random.Random()  # Crea un generador de números aleatorios independiente
-        self.rng.seed()  # Inicializa la semilla con el tiempo actual (por defecto)
+        self._productions = grammar.get_productions()  # ε como producción vacía []
+        # Misma gramática con un carácter por terminal: las longitudes se miden en
+        # caracteres aunque haya terminales de varios (ver tokenizer.character_grammar)
+        self._characters = character_grammar(grammar)
+        self._character_productions = self._characters.get_productions()
+        self.rng = random.Random(seed)  # Generador de números aleatorios independiente
+        self._dfa = None  # Autómata compilado bajo demanda (gramáticas con forma regular)
+        self._regular = None  # None: aún no se intentó compilar el autómata
+        self._dag = None  # Grafo de cadenas por longitud del DFA (ver length_dag.py)
+        self._cnf = None  # Forma normal de Chomsky bajo demanda (tipo 2)
+        self._alias = None  # Tablas de alias por no terminal (gramáticas con pesos)
+        self._shortest = None  # Longitud mínima derivable por no terminal (gramáticas con pesos)
 
     def generate_string(self, length):
         """
         Genera una cadena que pertenece a la gramática y que tenga la longitud exacta indicada.
+        La longitud se mide en caracteres (un terminal puede tener varios).
         Soporta gramáticas de tipo 2 (CFG) y tipo 3 (Regulares).
+
+        Si las producciones tienen pesos (ver Grammar.from_text) la cadena sigue la
+        distribución de la gramática probabilística; si no, cuando la gramática tiene
+        forma regular (aunque se declare de tipo 2, ver automaton.regular_form) se
+        genera recorriendo el autómata compilado.
+
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
         """
-        if self.grammar.type == 3:
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para generación.")
+        if self.grammar.weighted:
+            return self._generate_weighted(length)  # Respeta los pesos de las producciones
+        if self._get_dfa() is not None:
+            return self._generate_automaton(length)  # Recorrido del autómata, sin reintentos
+        elif self.grammar.type == 3:
             return self._generate_regular(length)  # Usa el generador para gramáticas regulares
-        elif self.grammar.type == 2:
-            return self._generate_cfg(length)  # Usa el generador para gramáticas libres de contexto
         else:
-            # Muestra un error si el tipo de gramática no está soportado
-            messagebox.showerror("Error", "Tipo de gramática no soportado para generación.")
+            return self._generate_cfg(length)  # Usa el generador para gramáticas libres de contexto
+
+    def seed(self, seed=None):
+        """
+        Reinicia el generador aleatorio con la semilla indicada (None: del sistema).
+        """
+        self.rng.seed(seed)
+
+    def generate_chunk(self, length, seed, chunk, size=CHUNK_SIZE):
+        """
+        Genera el bloque número `chunk` de una generación masiva: `size` intentos de
+        generar una cadena de longitud `length` con el flujo aleatorio propio del
+        bloque (ver stream_seed). El estado de `self.rng` no se modifica.
+
+        :return: Lista de cadenas generadas (los intentos fallidos se omiten).
+        """
+        rng, self.rng = self.rng, random.Random(stream_seed(seed, chunk))
+        try:
+            generated = [self.generate_string(length) for _ in range(size)]
+        finally:
+            self.rng = rng
+        return [string for string in generated if string is not None]
+
+    def generate_bulk(self, length, count, seed, workers=1, chunk_size=CHUNK_SIZE):
+        """
+        Genera `count` cadenas de longitud `length` de forma reproducible: los intentos
+        se reparten en bloques de `chunk_size` y cada bloque usa un flujo aleatorio
+        independiente derivado de `seed`. Con la misma semilla el resultado es el mismo
+        para cualquier cantidad de procesos.
+
+        :param workers: Procesos a usar; con más de uno los bloques se generan en un
+                        pool de procesos y se concatenan en orden.
+        :return: Lista de cadenas generadas (los intentos fallidos se omiten).
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para generación.")
+        sizes = [min(chunk_size, count - start) for start in range(0, count, chunk_size)]
+        if workers is None or workers > 1:
+            from concurrent.futures import ProcessPoolExecutor  # solo se importa si se usa (arranque)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_bulk_worker,
+                                     initargs=(self.grammar,)) as pool:
+                chunks = pool.map(_bulk_worker_chunk, [length] * len(sizes), [seed] * len(sizes),
+                                  range(len(sizes)), sizes)
+                return [string for chunk in chunks for string in chunk]
+        return [string for chunk, size in enumerate(sizes)
+                for string in self.generate_chunk(length, seed, chunk, size)]
+
+    def enumerate_strings(self, length, limit=100):
+        """
+        Enumera cadenas distintas del lenguaje con exactamente `length` caracteres,
+        hasta un máximo de `limit`.
+
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para generación.")
+        if self._get_dfa() is not None:
+            return self._enumerate_regular(length, limit)
+        return self._enumerate_cfg(length, limit)
+
+    def count_strings(self, length):
+        """
+        Cantidad de cadenas distintas del lenguaje con exactamente `length` caracteres,
+        o None si la gramática no tiene forma regular (solo se cuenta con el DFA).
+
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para generación.")
+        if self._get_dfa() is None:
             return None
+        return self._length_dag(length).count(length)
+
+    def _get_dfa(self):
+        """
+        Compila (una sola vez) el autómata de la gramática si tiene forma regular;
+        retorna None si no la tiene.
+        """
+        if self._regular is None:
+            try:
+                self._dfa = compile_regular(self._characters)
+                self._regular = True
+            except ValueError:
+                self._regular = False
+        return self._dfa
+
+    def _length_dag(self, length):
+        """
+        Grafo de cadenas por longitud restante del DFA (ver length_dag.py). Sirve
+        para cualquier longitud hasta la mayor pedida, así que se conserva ese.
+        """
+        if self._dag is None or self._dag.length < length:
+            self._dag = LengthDAG(self._dfa, length)
+        return self._dag
+
+    def _generate_automaton(self, length):
+        """
+        Genera una cadena recorriendo una sola vez el grafo de cadenas por longitud:
+        cada transición se elige con probabilidad proporcional a la cantidad de
+        cadenas que la completan, así que el resultado es uniforme entre todas las
+        cadenas de esa longitud y nunca hace falta reintentar.
+        """
+        return self._length_dag(length).sample(length, self.rng)
+
+    def _alias_tables(self):
+        """
+        Construye (una sola vez) una tabla de alias por no terminal con los pesos de
+        sus producciones.
+        """
+        if self._alias is None:
+            weights = self._characters.get_weights()
+            self._alias = {left: AliasTable(weights[left])
+                           for left, prods in self._character_productions.items() if prods}
+            self._shortest = shortest_yields(self._character_productions)
+        return self._alias
+
+    def _generate_weighted(self, length):
+        """
+        Genera una cadena de longitud exacta respetando los pesos: se expande desde el
+        símbolo inicial (con una pila, sin recursión) eligiendo cada producción con su
+        tabla de alias en O(1). El intento se descarta en cuanto los terminales ya
+        generados más los mínimos pendientes superan `length`, así que las cadenas
+        siguen la distribución de la gramática condicionada a esa longitud.
+        """
+        tables = self._alias_tables()
+        shortest = self._shortest
+        start = self.grammar.start
+        if start not in shortest:
+            return None
+        max_attempts = 5000
+        max_steps = 50 * (length + 1) + 1000  # Corta ciclos de producciones unitarias o anulables
+        for _ in range(max_attempts):
+            generated = []
+            stack = [start]
+            pending = shortest[start]  # Mínimo de terminales que faltan por generar
+            steps = 0
+            while stack and len(generated) + pending <= length and steps < max_steps:
+                steps += 1
+                symbol = stack.pop()
+                if not self.grammar.is_nonterminal(symbol):
+                    generated.append(symbol)
+                    pending -= 1
+                    continue
+                production = self._character_productions[symbol][tables[symbol].sample(self.rng)]
+                if any(self.grammar.is_nonterminal(sym) and sym not in shortest for sym in production):
+                    break  # Producción con un no terminal improductivo
+                pending += sum(shortest.get(sym, 1) for sym in production) - shortest[symbol]
+                stack.extend(reversed(production))
+            if not stack and len(generated) == length:
+                return "".join(generated)
+        return None
+
+    def _enumerate_regular(self, length, limit):
+        """
+        Recorre el grafo de cadenas por longitud en profundidad; solo visita nodos
+        desde los que se llega a un estado final con los terminales restantes.
+        """
+        return list(self._length_dag(length).strings(length, limit))
+
+    def _enumerate_cfg(self, length, limit):
+        """
+        Enumera sobre la CNF de la gramática, de abajo hacia arriba y sin recursión:
+        para cada no terminal y cada longitud se guardan a lo sumo `limit` secuencias
+        distintas de terminales, obtenidas combinando las ya guardadas de (B, k) y
+        (C, L - k) para cada regla A -> B C. Alcanza con esas: si alguna división da
+        al menos `limit` combinaciones ya hay suficientes, y si no, ninguna de sus
+        partes se recortó. El costo depende de `limit` y no de la cantidad de
+        derivaciones, que en gramáticas ambiguas es exponencial.
+        """
+        if self._cnf is None:
+            self._cnf = to_cnf(self._characters)
+        cnf = self._cnf
+        if length == 0:
+            return [""] if cnf.accepts_empty and limit > 0 else []
+        if limit <= 0:
+            return []
+
+        by_left = {}
+        for a, b, c in cnf.binary_rules:
+            by_left.setdefault(a, []).append((b, c))
+        firsts = {}
+        for terminal, lefts in sorted(cnf.terminal_rules.items()):
+            for a in lefts:
+                firsts.setdefault(a, []).append((terminal,))
+
+        def collect(cap):
+            # found[L]: no terminal -> secuencias distintas de L terminales (a lo sumo cap)
+            found = [{}, {a: _first_distinct(sequences, cap) for a, sequences in firsts.items()}]
+            for size in range(2, length + 1):
+                level = {}
+                for a, pairs in by_left.items():
+                    combined = (x + y for b, c in pairs for k in range(1, size)
+                                for x in found[k].get(b, ()) for y in found[size - k].get(c, ()))
+                    sequences = _first_distinct(combined, cap)
+                    if sequences:
+                        level[a] = sequences
+                found.append(level)
+            return found[length].get(cnf.start, [])
+
+        # La CNF es la de la gramática carácter a carácter: secuencias distintas son
+        # textos distintos
+        return ["".join(symbols) for symbols in collect(limit)]
 
     def _generate_regular(self, length):
         """
@@ -34,12 +328,13 @@ class GrammarGenerator:
         max_attempts = 1000
         for _ in range(max_attempts):
             current = self.grammar.start  # Símbolo inicial
-            generated = ""  # Cadena generada
+            generated = []  # Terminales generados
+            size = 0  # Caracteres generados
             transitions = []  # Registrar transiciones para debugging
             
             # Intentamos generar una cadena de la longitud deseada
-            while len(generated) < length and current is not None:
-                productions = self.grammar.productions.get(current, [])
+            while size < length and current is not None:
+                productions = self._productions.get(current, [])
                 
                 if not productions:
                     # No hay producciones para este símbolo no terminal
@@ -49,12 +344,12 @@ class GrammarGenerator:
                 for prod in productions:
                     # Filtramos producciones para evitar generar cadenas demasiado largas
                     if not prod:  # Es epsilon
-                        if len(generated) == length:
+                        if size == length:
                             valid_productions.append(prod)
                     else:
                         # Para producciones no vacías, verificamos que no excedamos la longitud
-                        remaining_length = length - len(generated)
-                        if remaining_length >= 1:  # Necesitamos al menos 1 espacio para el terminal
+                        remaining_length = length - size
+                        if remaining_length >= len(prod[0]):  # Necesitamos espacio para el terminal
                             valid_productions.append(prod)
                 
                 if not valid_productions:
@@ -66,7 +361,8 @@ class GrammarGenerator:
                 
                 # Aplicamos la producción
                 if production:  # No es epsilon
-                    generated += production[0]  # Añadimos el terminal
+                    generated.append(production[0])  # Añadimos el terminal
+                    size += len(production[0])
                     transitions.append(f"{current} -> {production[0]}" + 
                                       (f" {production[1]}" if len(production) > 1 else ""))
                     
@@ -76,23 +372,10 @@ class GrammarGenerator:
                     transitions.append(f"{current} -> ε")
                     break
             
-            # Verificamos si la cadena generada tiene la longitud exacta
-            if len(generated) == length:
-                # Si terminamos sin un estado actual o si el estado actual puede aceptar
-                # la cadena vacía, entonces la cadena generada es válida
-                if current is None:
-                    return generated
-                
-                # Verificamos si el estado actual tiene una producción vacía
-                if current and any(not prod for prod in self.grammar.productions.get(current, [])):
-                    return generated
-                
-                # Verificamos si el estado actual tiene producciones que solo consumen un terminal
-                # (sin pasar a otro estado)
-                if current:
-                    for prod in self.grammar.productions.get(current, []):
-                        if len(prod) == 1 and prod[0] in self.grammar.terminals:
-                            return generated
+            # La cadena es válida si tiene la longitud exacta y termina en un estado de
+            # aceptación con la misma regla que el validador (ver automaton.accepts_at_end)
+            if size == length and accepts_at_end(self._productions, current):
+                return "".join(generated)
             
         # Si no pudimos generar una cadena válida después de muchos intentos
         return None
@@ -100,37 +383,9 @@ class GrammarGenerator:
     def _generate_cfg(self, length):
         """
         Genera una cadena de una gramática libre de contexto (tipo 2) de longitud exacta.
-        Usa expansión aleatoria desde el símbolo inicial.
-        """
-        max_attempts = 5000  # Mayor cantidad de intentos debido a la complejidad
-        for _ in range(max_attempts):
-            candidate = self._random_expand(self.grammar.start)  # Intenta expandir el símbolo inicial
-            if candidate is not None and len(candidate) == length:
-                return candidate.replace(" ", "")  # Elimina espacios si los hay (opcional)
-        return None  # No se encontró una cadena válida
-
-    def _random_expand(self, symbol):
-        """
-        Expande recursivamente un símbolo de forma aleatoria usando las producciones de la gramática.
-        Si el símbolo no tiene producciones, se considera un terminal y se retorna tal cual.
+        Usa la misma expansión con pila de `_generate_weighted`, sin recursión (no se
+        agota la pila con gramáticas muy recursivas como ejemplos/1.4): sin pesos
+        declarados todas las producciones tienen peso 1 (ver Grammar.get_weights) y
+        se eligen con la misma probabilidad.
         """
-        if symbol in self.grammar.productions:
-            productions = self.grammar.productions[symbol]  # Producciones disponibles para el símbolo
-            if not productions:
-                return ""  # Producción vacía (epsilon)
-                
-            production = self.rng.choice(productions)  # Selecciona una producción al azar
-            
-            if not production:  # Es epsilon
-                return ""
-                
-            result = ""
-            for sym in production:
-                expanded = self._random_expand(sym)  # Expande recursivamente cada símbolo de la producción
-                if expanded is not None:
-                    result += expanded
-                else:
-                    return None  # Si algún símbolo no se puede expandir, retorna None
-            return result
-        else:
-            return symbol  # Si no hay producción, es un terminal
\ No newline at end of file
+        return self._generate_weighted(length)
@@ -0,0 +1,145 @@
+from grammar import Grammar
+from automaton import regular_form
+from ll1 import all_productions, ll1_table, nullable_set
+from glr import LRTables
+
+
+class GrammarProfile:
+    """
+    Clasificación de una gramática usada para elegir el motor de reconocimiento:
+    regularidad real (sin importar el `type:` declarado), determinismo LL(1) y
+    SLR(1), indicios de ambigüedad y tamaño.
+    """
+
+    def __init__(self, declared_type, regular_form, ll1, ll1_conflicts, ambiguity_hints,
+                 nonterminals, productions, symbols, lr_conflicts=None):
+        """
+        :param declared_type: Tipo declarado en el archivo .grm.
+        :param regular_form: Forma regular detectada ("right-linear", "left-linear",
+                             "non-self-embedding") o None (ver automaton.regular_form).
+        :param ll1: True si la tabla LL(1) no tiene conflictos.
+        :param ll1_conflicts: Cantidad de entradas en conflicto de la tabla LL(1).
+        :param ambiguity_hints: Lista de descripciones de patrones que suelen ser ambiguos.
+        :param nonterminals: Cantidad de no terminales.
+        :param productions: Cantidad de producciones.
+        :param symbols: Suma de las longitudes de los lados derechos.
+        :param lr_conflicts: Cantidad de entradas en conflicto de la tabla SLR(1)
+                             (ver glr.LRTables), o None si no se calculó.
+        """
+        self.declared_type = declared_type
+        self.regular_form = regular_form
+        self.ll1 = ll1
+        self.ll1_conflicts = ll1_conflicts
+        self.ambiguity_hints = ambiguity_hints
+        self.nonterminals = nonterminals
+        self.productions = productions
+        self.symbols = symbols
+        self.lr_conflicts = lr_conflicts
+
+    @property
+    def regular(self):
+        return self.regular_form is not None
+
+    @property
+    def likely_ambiguous(self):
+        return bool(self.ambiguity_hints)
+
+    @property
+    def slr(self):
+        return self.lr_conflicts == 0
+
+    def summary(self):
+        """
+        Retorna la clasificación como diccionario serializable a JSON.
+        """
+        return {"declared_type": self.declared_type, "regular": self.regular,
+                "regular_form": self.regular_form, "ll1": self.ll1,
+                "ll1_conflicts": self.ll1_conflicts, "lr_conflicts": self.lr_conflicts,
+                "ambiguity_hints": list(self.ambiguity_hints),
+                "nonterminals": self.nonterminals, "productions": self.productions,
+                "symbols": self.symbols}
+
+    def __str__(self):
+        result = [f"Tipo declarado: {self.declared_type}",
+                  f"Regular: {f'sí ({self.regular_form})' if self.regular else 'no'}",
+                  f"LL(1): {'sí' if self.ll1 else f'no ({self.ll1_conflicts} conflictos)'}",
+                  f"SLR(1): {'sí' if self.slr else f'no ({self.lr_conflicts} conflictos)'}",
+                  f"Tamaño: {self.nonterminals} no terminales, {self.productions} producciones, "
+                  f"{self.symbols} símbolos"]
+        for hint in self.ambiguity_hints:
+            result.append(f"Posible ambigüedad: {hint}")
+        return "\n".join(result)
+
+
+def _ambiguity_hints(grammar, productions):
+    """
+    Busca patrones baratos de detectar que suelen indicar ambigüedad. No es una
+    prueba (la ambigüedad es indecidible): solo orienta la elección del motor.
+    """
+    hints = []
+    is_nonterminal = grammar.is_nonterminal
+    nullable = nullable_set(productions)
+
+    for left, prods in productions.items():
+        seen = set()
+        left_recursive = right_recursive = False
+        nullable_alternatives = 0
+        for prod in prods:
+            text = f"{left} -> {' '.join(prod) if prod else 'ε'}"
+            if tuple(prod) in seen:
+                hints.append(f"producción repetida {text}")
+            seen.add(tuple(prod))
+            if len(prod) >= 2 and prod[0] == left and prod[-1] == left:
+                hints.append(f"recursión a ambos lados en {text}")
+            if len(prod) >= 2 and prod[0] == left:
+                left_recursive = True
+            if len(prod) >= 2 and prod[-1] == left:
+                right_recursive = True
+            if all(sym in nullable for sym in prod):
+                nullable_alternatives += 1
+        if left_recursive and right_recursive:
+            hints.append(f"{left} es recursivo por la izquierda y por la derecha")
+        if nullable_alternatives > 1:
+            hints.append(f"{left} deriva ε de más de una forma")
+
+    # Ciclos A =>+ A usando solo símbolos anulables alrededor: infinitos árboles por cadena
+    unit = {left: set() for left in productions}
+    for left, prods in productions.items():
+        for prod in prods:
+            for i, sym in enumerate(prod):
+                if is_nonterminal(sym) and all(other in nullable for j, other in enumerate(prod) if j != i):
+                    unit[left].add(sym)
+    for left in productions:
+        stack, reached = list(unit[left]), set()
+        while stack:
+            sym = stack.pop()
+            if sym == left:
+                hints.append(f"{left} se deriva a sí mismo (ciclo de producciones unitarias o anulables)")
+                break
+            if sym not in reached:
+                reached.add(sym)
+                stack.extend(unit.get(sym, ()))
+    return hints
+
+
+def profile_grammar(grammar: Grammar):
+    """
+    Clasifica la gramática. El costo es lineal en el tamaño de la gramática salvo
+    por los conjuntos FIRST/FOLLOW de la tabla LL(1) y la colección LR(0) de la
+    tabla SLR(1).
+
+    :return: Instancia de GrammarProfile.
+    """
+    productions = all_productions(grammar)
+    _, conflicts = ll1_table(grammar)
+    return GrammarProfile(
+        declared_type=grammar.type if hasattr(grammar, "type") else None,
+        regular_form=regular_form(grammar),
+        ll1=not conflicts,
+        ll1_conflicts=len(conflicts),
+        lr_conflicts=len(LRTables(grammar).conflicts()),
+        ambiguity_hints=_ambiguity_hints(grammar, productions),
+        nonterminals=len(productions),
+        productions=sum(len(prods) for prods in productions.values()),
+        symbols=sum(len(prod) for prods in productions.values() for prod in prods),
+    )
@@ -1,45 +1,426 @@
-from tkinter import messagebox
+import math
+import random
+import time
+
+from automaton import accepts_at_end, compile_regular
+from cyk import BitsetCYK
+from earley import EarleyRecognizer
+from glr import GLRParser
+from chart_store import SPILL_THRESHOLD
+from ll1 import LL1Recognizer
+from grammar_profile import profile_grammar
+from diagnostics import MAX_REPAIR_COST, diagnose_dfa, diagnose_earley
+from pcfg import ProbabilisticParser
+from grammar import EPSILON
+from tokenizer import Tokenizer, TokenizeError, character_grammar
+from lazy_imports import optional_import
 
 # Clase que valida si una cadena pertenece a un lenguaje definido por una gramática
 class GrammarValidator:
-    def __init__(self, grammar):
+    # Longitud de entrada a partir de la cual se usa el reconocedor por multiplicación
+    # de matrices en lugar del diagrama CYK. None: no se elige nunca solo. En las
+    # mediciones de benchmark.py (sección "cfg") no superó a CYK en ninguna longitud
+    # (n = 8192: 184 s y 1,4 GB contra 77 s y 78 MB), así que es opcional: se activa
+    # pasando matrix_threshold o incluyéndolo en los motores de `calibrate`
+    MATRIX_THRESHOLD = None
+
+    # Motores de reconocimiento disponibles (ver `select_engine`)
+    ENGINES = ("dfa", "ll1", "lr", "earley", "cyk", "matrix")
+
+    def __init__(self, grammar, matrix_threshold=None, spill_threshold=SPILL_THRESHOLD):
         """
         Constructor de la clase GrammarValidator.
         Recibe una instancia de Grammar que contiene el tipo, producciones y símbolo inicial.
+
+        :param matrix_threshold: Longitud mínima para usar el reconocedor de Valiant.
+                                 Si es None se usa MATRIX_THRESHOLD (desactivado).
+        :param spill_threshold: Bytes a partir de los cuales cada arreglo del diagrama de
+                                Earley pasa a un archivo mapeado (ver chart_store.py).
         """
         self.grammar = grammar
+        self._productions = grammar.get_productions()  # ε como producción vacía []
+        self._tokenizer = Tokenizer.from_grammar(grammar)
+        # Si algún terminal es prefijo de otro (a y ab en ejemplos/1.4) la coincidencia
+        # más larga no es la única división de la entrada: los motores reconocen
+        # entonces la gramática carácter a carácter (ver tokenizer.character_grammar)
+        self._engine_grammar = grammar
+        if not self._tokenizer.prefix_free:
+            self._engine_grammar = character_grammar(grammar)
+            self._tokenizer = Tokenizer.from_grammar(self._engine_grammar)
+        self.matrix_threshold = matrix_threshold if matrix_threshold is not None else self.MATRIX_THRESHOLD
+        self.spill_threshold = spill_threshold
+        self._profile = None  # Clasificación de la gramática bajo demanda
+        self._engines = {}  # Motores construidos bajo demanda: nombre -> reconocedor
+        self._unavailable = set()  # Motores que no se pudieron construir para esta gramática
+        # Plan elegido por `calibrate`: lista de (longitud máxima o None, motor)
+        self.engine_plan = None
+        self.calibration = None
+
+    @property
+    def profile(self):
+        """
+        Clasificación de la gramática (ver grammar_profile.py), calculada una sola vez.
+        """
+        if self._profile is None:
+            self._profile = profile_grammar(self._engine_grammar)
+        return self._profile
+
+    def warm_up(self):
+        """
+        Construye la clasificación y el motor que `select_engine` elige por defecto,
+        para que la primera validación no pague ese costo (por ejemplo al recompilar
+        una gramática en segundo plano, ver grammar_watch.py).
+        """
+        if self.grammar.type in (2, 3):
+            self._get_engine(self.select_engine(0))
+        return self
+
+    def _get_engine(self, name):
+        """
+        Construye (una sola vez) el motor indicado.
+        """
+        engine = self._engines.get(name)
+        if engine is None:
+            if name == "dfa":
+                engine = compile_regular(self._engine_grammar)
+            elif name == "ll1":
+                engine = LL1Recognizer(self._engine_grammar)
+            elif name == "lr":
+                engine = GLRParser(self._engine_grammar)
+            elif name == "earley":
+                engine = EarleyRecognizer(self._engine_grammar, self.spill_threshold)
+            elif name == "cyk":
+                engine = BitsetCYK(self._engine_grammar)
+            elif name == "matrix":
+                from valiant import ValiantRecognizer  # requiere NumPy: se importa solo si se usa
+                engine = ValiantRecognizer(self._engine_grammar)
+            elif name == "pcfg":
+                # No es un motor de reconocimiento: analizador probabilístico (ver pcfg.py)
+                engine = ProbabilisticParser(self._engine_grammar, self._get_engine("earley"))
+            else:
+                raise ValueError(f"Motor de reconocimiento desconocido: {name}")
+            self._engines[name] = engine
+        return engine
+
+    def _has_dfa(self):
+        """
+        Indica si la gramática tiene forma regular y su autómata se pudo compilar
+        (la conversión se abandona si el autómata resulta demasiado grande).
+        """
+        if not self.profile.regular or "dfa" in self._unavailable:
+            return False
+        try:
+            self._get_engine("dfa")
+            return True
+        except ValueError:
+            self._unavailable.add("dfa")
+            return False
+
+    def _recognizer(self, name):
+        """
+        Retorna la función de reconocimiento sobre identificadores de token del motor.
+        """
+        engine = self._get_engine(name)
+        return engine.accepts_ids if name == "dfa" else engine.recognize_ids
+
+    def select_engine(self, length):
+        """
+        Elige el motor para una entrada de `length` terminales. Si hay un plan de
+        calibración se usa ese plan; si no, se decide por la clasificación:
+         - Gramática con forma regular (aunque se declare tipo 2): DFA compilado.
+         - LL(1): análisis predictivo por tabla, lineal y sin retroceso.
+         - SLR(1) sin conflictos: GLR, que con una sola pila es un analizador LR lineal.
+         - Con indicios de ambigüedad: CYK bit-paralelo, o multiplicación de
+           matrices (si NumPy está disponible) desde matrix_threshold, solo si se
+           indicó uno y las tablas de la entrada entran en su límite de memoria.
+         - Resto: Earley, casi lineal en gramáticas no ambiguas.
+        Si el diagrama CYK de la entrada supera su límite de memoria (ver
+        cyk.MAX_CHART_BYTES) se usa Earley, cuyo diagrama compacto pasa a disco.
+        """
+        if self.engine_plan:
+            for bound, name in self.engine_plan:
+                if bound is None or length <= bound:
+                    return self._bounded(name, length)
+        profile = self.profile
+        if self._has_dfa():
+            return "dfa"
+        if profile.ll1:
+            return "ll1"
+        if profile.slr:
+            return "lr"
+        if profile.likely_ambiguous:
+            if (self.matrix_threshold is not None and length >= self.matrix_threshold
+                    and optional_import("numpy") is not None):
+                return self._bounded("matrix", length)
+            return self._bounded("cyk", length)
+        return "earley"
+
+    def _bounded(self, name, length):
+        """
+        Reemplaza el motor de matrices por CYK si sus tablas superan su límite de
+        memoria (ver valiant.MAX_TABLE_BYTES), y CYK por Earley si su diagrama supera
+        el suyo (ver cyk.MAX_CHART_BYTES): la memoria de ambos crece con n², mientras
+        que Earley guarda su diagrama en arreglos compactos que pasan a disco (ver
+        chart_store.py).
+        """
+        if name == "matrix" and not self._get_engine("matrix").fits(length):
+            name = "cyk"
+        return "earley" if name == "cyk" and not self._get_engine("cyk").fits(length) else name
+
+    def recognize(self, string):
+        """
+        Indica si la cadena pertenece al lenguaje, sin construir derivación ni árbol.
+        El motor se elige por entrada con `select_engine`.
+
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para validación.")
+        try:
+            ids = self._tokenizer.tokenize(string)
+        except TokenizeError:
+            return False
+        return self._recognizer(self.select_engine(len(ids)))(ids)
+
+    def validate_batch(self, strings):
+        """
+        Valida un lote de cadenas y retorna una lista de booleanos en el mismo orden.
+        Para gramáticas regulares todas las cadenas avanzan a la vez por la tabla de
+        transiciones del DFA compilado; para el resto se usa `recognize`
+        (solo pertenencia, sin derivación).
+        """
+        if self.grammar.type not in (2, 3) or not self._has_dfa():
+            return [self.recognize(s) for s in strings]
+        dfa = self._get_engine("dfa")
+        if self._tokenizer.single_char:
+            return dfa.accepts_batch(strings)
+        # Con terminales de varios caracteres se divide cada cadena antes del lote
+        sequences = []
+        lexable = []
+        for string in strings:
+            try:
+                sequences.append(self._tokenizer.to_symbols(self._tokenizer.tokenize(string)))
+                lexable.append(True)
+            except TokenizeError:
+                sequences.append([])
+                lexable.append(False)
+        return [ok and accepted for ok, accepted in zip(lexable, dfa.accepts_batch(sequences))]
+
+    def diagnose(self, string, max_repair=MAX_REPAIR_COST):
+        """
+        Modo de diagnóstico: en una sola pasada informa la posición más lejana a la
+        que se llega, los terminales esperados allí y una reparación de distancia de
+        edición mínima (ver diagnostics.py). Usa el DFA si la gramática tiene forma
+        regular y el reconocedor de Earley en otro caso.
+
+        :param max_repair: Costo máximo de la reparación buscada con Earley (None: sin
+                           límite; con el DFA la búsqueda es lineal y no se acota).
+        :return: Instancia de Diagnosis.
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para validación.")
+        ids, starts = self._tokenizer.tokenize_spans(string)
+        if self._has_dfa():
+            return diagnose_dfa(self._get_engine("dfa"), ids, string, starts)
+        return diagnose_earley(self._get_engine("earley"), ids, string, starts, max_repair)
+
+    def most_likely_parse(self, string):
+        """
+        Modo probabilístico: usa los pesos de las producciones (normalizados por no
+        terminal, ver pcfg.py) para obtener el árbol de derivación más probable
+        (Viterbi) y la probabilidad total de la cadena (suma sobre todos sus árboles).
+
+        Para entradas muy largas las probabilidades pueden ser menores que el menor
+        número de punto flotante representable y dar 0.
+
+        :return: Tupla (probabilidad del mejor árbol, probabilidad de la cadena,
+                 derivation, tree); si la cadena no pertenece al lenguaje las
+                 probabilidades son 0, la derivación es vacía y el árbol es None.
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para validación.")
+        try:
+            ids = self._tokenizer.tokenize(string)
+        except TokenizeError:
+            return 0.0, 0.0, [], None
+        best, total, tree, steps = self._get_engine("pcfg").parse_ids(ids)
+        if tree is None:
+            return 0.0, 0.0, [], None
+        if self._engine_grammar is not self.grammar:
+            tree, steps = self._merge_terminals(tree)
+        return best, total, self._create_detailed_cfg_derivation(steps, string), tree
+
+    def parse_forest(self, string):
+        """
+        Analiza la cadena con el analizador GLR (ver glr.py) y retorna el bosque
+        empaquetado con todas sus derivaciones. `forest.to_tree()` retorna la tupla
+        (árbol en el formato de `validate_string`, pasos de la derivación por la
+        izquierda), y `forest.count_trees()` cuántos árboles hay. Si algún terminal es
+        prefijo de otro, el bosque es el de la gramática carácter a carácter (ver
+        tokenizer.character_grammar): sus hojas son caracteres.
+
+        :return: Instancia de PackedForest, o None si la cadena no pertenece al lenguaje.
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para validación.")
+        try:
+            ids = self._tokenizer.tokenize(string)
+        except TokenizeError:
+            return None
+        return self._get_engine("lr").parse_ids(ids)
+
+    def calibrate(self, samples=None, lengths=(8, 64, 256), per_length=5, repeats=3, engines=None,
+                  budget=2.0):
+        """
+        Mide los motores candidatos sobre entradas de muestra y fija `engine_plan`
+        con el más rápido para cada rango de longitudes. El informe queda además en
+        `calibration`.
+
+        :param samples: Cadenas de muestra. Si es None, para cada longitud se generan al
+                        azar hasta `per_length` cadenas del lenguaje (ver
+                        GrammarGenerator.generate_chunk) y otras tantas secuencias
+                        aleatorias de terminales (casi siempre rechazadas).
+        :param lengths: Longitudes (en terminales) que separan los rangos; cada muestra
+                        se asigna a la menor longitud mayor o igual que la suya. Las
+                        cadenas generadas tienen esa longitud en caracteres.
+        :param per_length: Cadenas de cada tipo generadas por longitud.
+        :param repeats: Repeticiones de cada medición (se toma el mínimo).
+        :param engines: Motores a comparar; por defecto todos los aplicables salvo el de
+                        matrices, que hay que pedir explícitamente.
+        :param budget: Segundos máximos dedicados a generar las cadenas de cada longitud;
+                       las que no se alcancen a generar se omiten.
+        :return: Diccionario con la clasificación, los tiempos, el plan elegido y la
+                 cantidad de muestras omitidas por no dividirse en terminales.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para validación.")
+        lengths = sorted(lengths)
+        profile = self.profile
+        if engines is None:
+            if self._has_dfa():
+                engines = ["dfa"]
+            else:
+                # El de matrices no se incluye: es opcional (ver MATRIX_THRESHOLD)
+                engines = (["ll1"] if profile.ll1 else []) + ["lr", "earley", "cyk"]
+
+        buckets = {length: [] for length in lengths}
+        skipped = 0  # Muestras que no se pudieron dividir en terminales
+        if samples is None:
+            from grammar_generator import GrammarGenerator
+            generator = GrammarGenerator(self.grammar)
+            rng = random.Random(0)
+            alphabet = range(len(self._tokenizer.symbols))
+            for length in lengths:
+                # Muestreo con semilla fija (reproducible) y acotado en tiempo: enumerar
+                # las cadenas de longitudes grandes es demasiado costoso
+                deadline = time.perf_counter() + budget
+                chunk = 0
+                while len(buckets[length]) < per_length and time.perf_counter() < deadline:
+                    strings = generator.generate_chunk(length, 0, chunk, 1)
+                    if not strings:
+                        break  # El generador agotó sus intentos para esta longitud
+                    chunk += 1
+                    try:
+                        buckets[length].append(self._tokenizer.tokenize(strings[0]))
+                    except TokenizeError:
+                        skipped += 1
+                if alphabet:
+                    for _ in range(per_length):
+                        buckets[length].append([rng.choice(alphabet) for _ in range(length)])
+        else:
+            for string in samples:
+                try:
+                    ids = self._tokenizer.tokenize(string)
+                except TokenizeError:
+                    skipped += 1
+                    continue
+                bucket = next((length for length in lengths if len(ids) <= length), lengths[-1])
+                buckets[bucket].append(ids)
+
+        timings = {}
+        disagreements = []
+        plan = []
+        for length in lengths:
+            inputs = buckets[length]
+            if not inputs:
+                continue
+            timings[length] = {}
+            expected = None
+            for name in engines:
+                engine = self._recognizer(name)
+                best = None
+                for _ in range(repeats):
+                    begin = time.perf_counter()
+                    results = [engine(ids) for ids in inputs]
+                    elapsed = time.perf_counter() - begin
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[length][name] = best
+                if expected is None:
+                    expected = results
+                elif results != expected:
+                    disagreements.append((length, engines[0], name))
+            winner = min(timings[length], key=timings[length].get)
+            plan.append([length, winner])
+
+        # Los límites entre rangos se ubican en la media geométrica de las longitudes medidas
+        for i in range(len(plan) - 1):
+            plan[i][0] = int(math.sqrt(plan[i][0] * plan[i + 1][0]))
+        if plan:
+            plan[-1][0] = None
+        merged = []
+        for bound, name in plan:
+            if merged and merged[-1][1] == name:
+                merged[-1] = (bound, name)
+            else:
+                merged.append((bound, name))
+
+        self.engine_plan = merged or None
+        self.calibration = {"profile": profile.summary(), "timings": timings,
+                            "plan": merged, "disagreements": disagreements, "skipped": skipped}
+        return self.calibration
 
     def validate_string(self, string):
         """
-        Valida la cadena según el tipo de gramática:
-         - Tipo 3: gramática regular, se simula como un autómata finito.
-         - Tipo 2: gramática libre de contexto, se realiza backtracking recursivo.
+        Valida la cadena y construye su derivación y su árbol. La pertenencia se
+        decide con el mismo motor que `recognize` (ver `select_engine`), así que
+        ambas respuestas coinciden siempre:
+         - Tipo 3: el camino se reconstruye simulando la gramática como un autómata.
+         - Tipo 2: la derivación y el árbol se extraen del bosque del analizador GLR
+           (ver `parse_forest`).
 
         Retorna una tupla:
          - (True, derivation, tree) si la cadena es válida.
-         - (False, derivation, tree) si la cadena no es válida.
-        """
-        if self.grammar.type == 3:
-            # Validación para gramática regular (tipo 3)
-            is_valid, transitions = self._validate_regular(string)
-            derivation = self._create_detailed_regular_derivation(transitions, string) if is_valid else transitions
-            tree = self._create_regular_tree(transitions, string) if is_valid else None
-            return is_valid, derivation, tree
-        elif self.grammar.type == 2:
-            # Validación para gramática libre de contexto (tipo 2)
-            derivation = []
-            tree = {"symbol": self.grammar.start, "children": [], "description": "Símbolo inicial"}
-            result = self._parse_cfg(self.grammar.start, string, derivation, tree, 0, set())
-            
-            if result is not None and result == "":
-                detailed_derivation = self._create_detailed_cfg_derivation(derivation, string)
-                return True, detailed_derivation, tree
-            else:
-                return False, derivation, None
-        else:
-            # Caso de tipo de gramática no soportado
-            messagebox.showerror("Error", "Tipo de gramática no soportado para validación.")
+         - (False, derivation, None) si no lo es; para tipo 3 la derivación es el
+           camino hasta la posición más lejana a la que se pudo avanzar.
+
+        :raises ValueError: Si el tipo de gramática no es 2 ni 3.
+        """
+        if self.grammar.type not in (2, 3):
+            raise ValueError("Tipo de gramática no soportado para validación.")
+        # La entrada se divide una sola vez en terminales (pueden tener varios caracteres)
+        try:
+            ids = self._tokenizer.tokenize(string)
+        except TokenizeError as error:
+            return False, [str(error)], None
+        is_valid = self._recognizer(self.select_engine(len(ids)))(ids)
+
+        if self.grammar.type == 3 and self._engine_grammar is self.grammar:
+            accepted, transitions = self._validate_regular(tuple(self._tokenizer.to_symbols(ids)))
+            if not is_valid:
+                return False, transitions, None
+            if accepted:
+                return (True, self._create_detailed_regular_derivation(transitions, string),
+                        self._create_regular_tree(transitions, string))
+            # Producciones con otra forma que A -> a B: se usa el bosque como en tipo 2
+        if not is_valid:
             return False, [], None
+        tree, steps = self._get_engine("lr").parse_ids(ids).to_tree()
+        if self._engine_grammar is not self.grammar:
+            tree, steps = self._merge_terminals(tree)
+        return True, self._create_detailed_cfg_derivation(steps, string), tree
 
     def _create_detailed_regular_derivation(self, transitions, string):
         """
@@ -75,85 +456,112 @@ class GrammarValidator:
     def _create_detailed_cfg_derivation(self, derivation_steps, final_string):
         """
         Crea una derivación paso a paso para gramáticas libres de contexto.
+        Los pasos ("A -> x y") van por la izquierda: cada uno reemplaza la primera
+        aparición del no terminal en la forma sentencial, que se guarda como lista
+        de símbolos.
         """
         detailed_derivation = []
-        current_form = self.grammar.start
-        detailed_derivation.append(f"Inicio: {current_form}")
+        current_form = [self.grammar.start]
+        detailed_derivation.append(f"Inicio: {self.grammar.start}")
 
         for i, step in enumerate(derivation_steps):
             if " -> " in step:
                 left, right = step.split(" -> ")
-                pos = current_form.find(left)
-                if pos >= 0:
+                if left in current_form:
+                    pos = current_form.index(left)
                     rule = f"{left} → {right}"
                     detailed_derivation.append(f" {i+1}:  [{rule}]  '{left}'")
-                    replacement = right if right != "ε" else ""
-                    current_form = current_form[:pos] + replacement + current_form[pos+len(left):]
-                    detailed_derivation.append(f": {current_form}")
+                    replacement = right.split() if right != "ε" else []
+                    current_form[pos:pos + 1] = replacement
+                    detailed_derivation.append(f": {''.join(current_form)}")
 
-        if current_form == final_string:
+        if "".join(current_form) == final_string:
             detailed_derivation.append(f"Cadena final validada: '{final_string}'")
         return detailed_derivation
 
-    def _validate_regular(self, string):
+    def _merge_terminals(self, tree):
+        """
+        Convierte un árbol de la gramática carácter a carácter (ver
+        tokenizer.character_grammar) en uno de la gramática original: en cada nodo
+        expandido se busca la producción cuyos caracteres coinciden con sus hijos y
+        las hojas de un mismo terminal se unen en una sola.
+
+        :return: Tupla (árbol, pasos de la derivación por la izquierda).
+        """
+        # Las producciones de ambas gramáticas están en el mismo orden
+        expanded = self._engine_grammar.get_productions()
+        steps = []
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if "production_applied" not in node:
+                continue
+            name = node["symbol"]
+            children = node["children"]
+            prod = self._productions[name][expanded[name].index([child["symbol"] for child in children])]
+            text = " ".join(prod) or EPSILON
+            steps.append(f"{name} -> {text}")
+            node["production_applied"] = f"{name} → {text}"
+            merged = []
+            position = 0
+            for index, sym in enumerate(prod):
+                if self.grammar.is_nonterminal(sym):
+                    child = children[position]
+                    child["description"] = f"Símbolo {index + 1} de la producción {name} → {text}"
+                    merged.append(child)
+                    position += 1
+                else:
+                    merged.append({"symbol": sym, "children": [], "terminal": True,
+                                   "description": f"Terminal '{sym}' coincide con la entrada"})
+                    position += len(sym)
+            node["children"] = merged
+            # El hijo más a la izquierda queda arriba de la pila (derivación por la izquierda)
+            stack.extend(reversed(merged))
+        return tree, steps
+
+    def _validate_regular(self, tokens):
         """
-        Simula la validación de una gramática regular como si fuera un autómata.
-        Versión corregida para manejar correctamente gramáticas regulares.
+        Simula la gramática regular como un autómata no determinista: en cada posición
+        se siguen todas las transiciones posibles (no solo la primera) y se recuerda de
+        qué estado viene cada uno para reconstruir el camino. Al terminar la entrada se
+        acepta con la misma regla que usa el generador (ver automaton.accepts_at_end).
+        Recibe la entrada ya dividida en terminales.
+
+        :return: Tupla (válida, camino). Si no es válida, el camino llega hasta la
+                 posición más lejana a la que se pudo avanzar.
         """
-        current = self.grammar.start
-        path = [current]
-        remaining = string
+        # layers[i]: estado alcanzado tras i terminales -> (estado anterior, transición);
+        # None representa el estado FINAL de una producción de un solo terminal
+        layers = [{self.grammar.start: None}]
+        for token in tokens:
+            layer = {}
+            for state in layers[-1]:
+                for prod in self._productions.get(state, []) if state is not None else ():
+                    if prod and prod[0] == token:
+                        next_state = prod[1] if len(prod) > 1 else None
+                        if next_state not in layer:
+                            transition = f"{token} -> {next_state}" if next_state else f"{token} -> FINAL"
+                            layer[next_state] = (state, transition)
+            if not layer:
+                break
+            layers.append(layer)
 
-        # Si la cadena está vacía, verificamos si el símbolo inicial acepta producción vacía
-        if not string:
-            for prod in self.grammar.productions.get(current, []):
-                if not prod:  # producción vacía (epsilon)
-                    path.append("ε")
-                    return True, path
-            return False, path
+        finals = []
+        if len(layers) == len(tokens) + 1:
+            finals = [state for state in layers[-1] if accepts_at_end(self._productions, state)]
+        accepted = bool(finals)
+        final = finals[0] if accepted else next(iter(layers[-1]))
 
-        # Iniciamos la simulación
-        while remaining and current is not None:
-            char = remaining[0]
-            valid_transitions = []
-            
-            # Buscamos todas las transiciones posibles para el estado actual y el siguiente símbolo
-            for prod in self.grammar.productions.get(current, []):
-                if prod and prod[0] == char:
-                    next_state = prod[1] if len(prod) > 1 else None
-                    valid_transitions.append((prod[0], next_state))
-            
-            # Si no hay transiciones válidas, la cadena no es aceptada
-            if not valid_transitions:
-                return False, path
-            
-            # Tomamos la primera transición (se podría implementar backtracking para todas)
-            terminal, next_state = valid_transitions[0]
-            
-            # Registramos la transición
-            transition_info = f"{terminal} -> {next_state}" if next_state else f"{terminal} -> FINAL"
-            path.append(transition_info)
-            
-            # Avanzamos al siguiente estado y consumimos el símbolo
-            current = next_state
-            remaining = remaining[1:]
-        
-        # Una vez procesada toda la cadena, verificamos si estamos en un estado final
-        if not remaining:
-            # Si no hay más símbolos por consumir, hemos aceptado la cadena si:
-            # 1. No hay estado actual (transición a FINAL), o
-            # 2. El estado actual acepta la cadena vacía
-            if current is None:
-                return True, path
-            
-            # Verificamos si el estado actual tiene una producción vacía o terminal
-            for prod in self.grammar.productions.get(current, []):
-                if not prod or (len(prod) == 1 and prod[0] in self.grammar.terminals):
-                    path.append("ε")
-                    return True, path
-        
-        # Si llegamos aquí, la cadena no es aceptada
-        return False, path
+        path = []
+        state = final
+        for layer in reversed(layers[1:]):
+            state, transition = layer[state]
+            path.append(transition)
+        path.append(self.grammar.start)
+        path.reverse()
+        if accepted and final is not None:
+            path.append("ε")
+        return accepted, path
 
     def _create_regular_tree(self, transitions, string):
         """
@@ -208,78 +616,3 @@ class GrammarValidator:
                 current_node = next_node
         
         return tree
-
-    def _parse_cfg(self, symbol, s, derivation, tree_node, recursion_depth=0, visited=None):
-        """
-        Valida una cadena usando backtracking sobre una gramática libre de contexto.
-        """
-        if recursion_depth > 100:
-            return None  # Evitar recursión infinita
-
-        if visited is None:
-            visited = set()
-
-        visit_key = (symbol, s)
-        if visit_key in visited:
-            return None
-
-        visited.add(visit_key)
-
-        if symbol in self.grammar.productions:
-            for production in self.grammar.productions[symbol]:
-                step = f"{symbol} -> {' '.join(production) if production else 'ε'}"
-                derivation_copy = derivation.copy()
-                derivation_copy.append(step)
-
-                prod_children = []
-                for i, prod_sym in enumerate(production):
-                    description = f"Símbolo {i+1} de la producción {symbol} → {' '.join(production)}"
-                    prod_children.append({"symbol": prod_sym, "children": [], "description": description})
-
-                original_children = tree_node["children"].copy()
-                tree_node["children"] = prod_children
-
-                remainder = s
-                success = True
-
-                if not production:
-                    if not s:
-                        derivation.clear()
-                        derivation.extend(derivation_copy)
-                        tree_node["production_applied"] = f"{symbol} → ε"
-                        return ""
-                    else:
-                        tree_node["children"] = original_children
-                        continue
-
-                for i, prod_sym in enumerate(production):
-                    new_visited = visited.copy()
-                    result = self._parse_cfg(prod_sym, remainder, derivation_copy,
-                                             prod_children[i], recursion_depth + 1, new_visited)
-                    if result is None:
-                        success = False
-                        break
-                    elif len(result) == len(remainder):
-                        if i < len(production) - 1:
-                            success = False
-                            break
-                    remainder = result
-
-                if success:
-                    derivation.clear()
-                    derivation.extend(derivation_copy)
-                    tree_node["production_applied"] = f"{symbol} → {' '.join(production) if production else 'ε'}"
-                    return remainder
-                else:
-                    tree_node["children"] = original_children
-
-            return None
-        else:
-            # Caso terminal: se compara directamente con el string restante
-            if s.startswith(symbol):
-                tree_node["symbol"] = symbol
-                tree_node["terminal"] = True
-                tree_node["description"] = f"Terminal '{symbol}' coincide con la entrada"
-                return s[len(symbol):]
-            else:
-                return None
\ No newline at end of file
@@ -0,0 +1,121 @@
+import os
+import threading
+
+# Segundos entre dos consultas a los archivos vigilados
+POLL_INTERVAL = 0.5
+
+
+def _signature(path):
+    """
+    Firma barata de un archivo (fecha de modificación en ns y tamaño), o None si
+    no existe o no se puede leer.
+    """
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+class FileWatcher:
+    """
+    Vigila archivos .grm por consulta periódica (os.stat, sin dependencias) en un
+    hilo en segundo plano. Cuando un archivo cambia y su firma se mantiene igual
+    durante una consulta completa (para no leer un archivo a medio escribir), se
+    lee y se llama a `callback(path, text)` en el mismo hilo: ahí se recompila la
+    gramática sin bloquear a quien la usa. Si el texto no cambió no se llama.
+
+    Los errores de `callback` (por ejemplo una gramática inválida mientras se
+    edita) se pasan a `on_error(path, error)` y la versión anterior sigue en uso.
+    """
+
+    def __init__(self, callback, interval=POLL_INTERVAL, on_error=None):
+        """
+        :param callback: Función (ruta, texto) que compila e instala la nueva versión.
+        :param interval: Segundos entre consultas.
+        :param on_error: Función (ruta, excepción) opcional para los errores de `callback`.
+        """
+        self.callback = callback
+        self.interval = interval
+        self.on_error = on_error
+        self._files = {}  # ruta -> [firma vista, firma pendiente, último texto compilado]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, path, text=None):
+        """
+        Empieza a vigilar un archivo.
+
+        :param text: Texto ya compilado del archivo (si se conoce); un cambio que
+                     deja el mismo texto no provoca recompilación.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            self._files[path] = [_signature(path), None, text]
+
+    def remove(self, path):
+        with self._lock:
+            self._files.pop(os.path.abspath(path), None)
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+
+    @property
+    def paths(self):
+        with self._lock:
+            return list(self._files)
+
+    def poll(self):
+        """
+        Revisa una vez todos los archivos vigilados.
+
+        :return: Lista de rutas recompiladas en esta consulta.
+        """
+        with self._lock:
+            files = list(self._files.items())
+        reloaded = []
+        for path, state in files:
+            signature = _signature(path)
+            if signature is None or signature == state[0]:
+                state[1] = None
+                continue
+            if signature != state[1]:
+                # Cambió desde la consulta anterior: se espera a que se estabilice
+                state[1] = signature
+                continue
+            state[0], state[1] = signature, None
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                if text == state[2]:
+                    continue
+                self.callback(path, text)
+                state[2] = text
+                reloaded.append(path)
+            except Exception as error:  # La versión anterior sigue en uso
+                if self.on_error is not None:
+                    self.on_error(path, error)
+        return reloaded
+
+    def start(self):
+        """
+        Inicia el hilo de vigilancia (daemon: no impide que el programa termine).
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="grammar-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
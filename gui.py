@@ -1,11 +1,15 @@
 import os
+import queue
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk
 from grammar import Grammar
 from grammar_validator import GrammarValidator
 from grammar_generator import GrammarGenerator
 from tree_visualizer import TreeVisualizer
+from grammar_watch import FileWatcher
+
+# Milisegundos entre dos revisiones de las gramáticas recompiladas en segundo plano
+RELOAD_CHECK_MS = 200
 
 class ModernGrammarGUI:
     def __init__(self, master):
@@ -15,6 +19,10 @@ class ModernGrammarGUI:
         self.validator = None
         self.generator = None
         self.tree_visualizer = None  # Se inicializará después
+        # Recarga del archivo cargado: el hilo del FileWatcher compila la nueva versión
+        # y la deja en la cola; el hilo de la interfaz la instala (ver _apply_reloads)
+        self.watcher = FileWatcher(self._compile_watched, on_error=self._watch_failed)
+        self._reloads = queue.Queue()
         
         master.title("Procesador de Gramáticas")
         master.state('zoomed')
@@ -23,6 +31,8 @@ class ModernGrammarGUI:
         self.configure_styles()
         self.create_widgets()
         self.load_default_logo()
+        self.watcher.start()
+        self.master.after(RELOAD_CHECK_MS, self._apply_reloads)
 
     def configure_styles(self):
         style = ttk.Style()
@@ -69,8 +79,12 @@ class ModernGrammarGUI:
         self.btn_load = ttk.Button(file_frame, text="Cargar Gramática", style='Primary.TButton',
                                     command=self.load_grammar)
         self.btn_load.pack(side=tk.LEFT, padx=5)
+        self.var_watch = tk.BooleanVar(value=True)
+        ttk.Checkbutton(file_frame, text="Recargar al cambiar el archivo", variable=self.var_watch,
+                        command=self._toggle_watch).pack(side=tk.LEFT, padx=5)
         self.lbl_status = ttk.Label(file_frame, text="No se ha cargado ninguna gramática", style='Status.TLabel')
         self.lbl_status.pack(side=tk.LEFT, padx=10)
+        self._watched_path = None
 
         self.notebook = ttk.Notebook(main_frame)
         
@@ -219,25 +233,28 @@ class ModernGrammarGUI:
             if length <= 0:
                 messagebox.showwarning("Error", "Longitud inválida")
                 return
-            
+        except ValueError:
+            messagebox.showerror("Error", "Longitud debe ser un número")
+            return
+
+        try:
             results = []
             for _ in range(5):
-                self.generator.rng.seed()
                 generated = self.generator.generate_string(length)
                 if generated:
                     results.append(generated)
                 else:
                     break
-            
-            if not results:
-                messagebox.showinfo("Resultado", "No se generaron cadenas válidas")
-                return
-            
-            result_text = "\n".join([f"{i+1}. {s}" for i, s in enumerate(results)])
-            messagebox.showinfo(f"Primeras {len(results)} cadenas (long={length})", result_text)
-            
-        except ValueError:
-            messagebox.showerror("Error", "Longitud debe ser un número")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        if not results:
+            messagebox.showinfo("Resultado", "No se generaron cadenas válidas")
+            return
+
+        result_text = "\n".join([f"{i+1}. {s}" for i, s in enumerate(results)])
+        messagebox.showinfo(f"Primeras {len(results)} cadenas (long={length})", result_text)
         
     def create_generate_tab(self, parent):
         # El código existente para la pestaña de generación permanece igual
@@ -273,6 +290,7 @@ class ModernGrammarGUI:
     def load_default_logo(self):
         logo_path = os.path.join(os.getcwd(), "logo.png")
         try:
+            from PIL import Image, ImageTk  # Pillow solo se carga al dibujar la interfaz
             original_image = Image.open(logo_path)
             max_size = 80
             width, height = original_image.size
@@ -317,27 +335,77 @@ class ModernGrammarGUI:
         
         try:
             new_grammar = Grammar.from_text(grammar_text)
-            self.grammar = new_grammar
-            self.validator = GrammarValidator(self.grammar)
-            self.generator = GrammarGenerator(self.grammar)
-            
-            # Determinar el tipo de gramática
-            grammar_type = self.grammar.type
-            if grammar_type == 3:
-                grammar_desc = "Regular"
-            elif grammar_type == 2:
-                grammar_desc = "Libre de Contexto"
-            else:
-                grammar_desc = "No soportado"
-                
-            self.lbl_status.config(text=f"Gramática aplicada (Tipo {grammar_type}: {grammar_desc})")
-            self.notebook.tab(1, text=f"Validar ({grammar_desc})")
-            self.notebook.tab(2, text=f"Generar ({grammar_desc})")
-            
+            self._install_grammar(new_grammar, GrammarValidator(new_grammar), GrammarGenerator(new_grammar))
+            # La gramática del editor reemplaza a la del archivo: se deja de vigilarlo
+            # para que una recarga pendiente no la sobrescriba (load_grammar lo vuelve
+            # a vigilar después de aplicarla)
+            if self._watched_path:
+                self.watcher.remove(self._watched_path)
+                self._watched_path = None
+            self.lbl_status.config(text=f"Gramática aplicada (Tipo {new_grammar.type}: "
+                                        f"{self._grammar_description()})")
             messagebox.showinfo("Éxito", "Gramática aplicada correctamente")
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo cargar la gramática: {str(e)}")
 
+    def _grammar_description(self):
+        grammar_type = self.grammar.type
+        if grammar_type == 3:
+            return "Regular"
+        elif grammar_type == 2:
+            return "Libre de Contexto"
+        return "No soportado"
+
+    def _install_grammar(self, grammar, validator, generator):
+        """
+        Reemplaza la gramática en uso. Se llama siempre desde el hilo de la interfaz,
+        entre dos eventos, así que ninguna validación ve una mezcla de versiones.
+        """
+        self.grammar = grammar
+        self.validator = validator
+        self.generator = generator
+        grammar_desc = self._grammar_description()
+        self.notebook.tab(1, text=f"Validar ({grammar_desc})")
+        self.notebook.tab(2, text=f"Generar ({grammar_desc})")
+
+    def _toggle_watch(self):
+        self.watcher.clear()
+        if self.var_watch.get() and self._watched_path:
+            self.watcher.add(self._watched_path, self.txt_grammar.get(1.0, tk.END))
+
+    def _compile_watched(self, path, text):
+        """
+        Se ejecuta en el hilo del FileWatcher: compila la nueva versión completa
+        (gramática, clasificación y motor por defecto) sin bloquear la interfaz.
+        """
+        grammar = Grammar.from_text(text)
+        validator = GrammarValidator(grammar).warm_up()
+        self._reloads.put((path, text, (grammar, validator, GrammarGenerator(grammar))))
+
+    def _watch_failed(self, path, error):
+        self._reloads.put((path, None, error))
+
+    def _apply_reloads(self):
+        """
+        Instala la última versión recompilada (si hay) y vuelve a programarse.
+        """
+        try:
+            while True:
+                path, text, result = self._reloads.get_nowait()
+                if os.path.abspath(path) != os.path.abspath(self._watched_path or ""):
+                    continue  # De un archivo que ya no está cargado
+                name = os.path.basename(path)
+                if text is None:
+                    self.lbl_status.config(text=f"No se pudo recargar {name}: {result}")
+                    continue
+                self._install_grammar(*result)
+                self.txt_grammar.delete(1.0, tk.END)
+                self.txt_grammar.insert(tk.END, text)
+                self.lbl_status.config(text=f"Gramática recargada: {name} (Tipo {self.grammar.type})")
+        except queue.Empty:
+            pass
+        self.master.after(RELOAD_CHECK_MS, self._apply_reloads)
+
     def load_grammar(self):
         filepath = filedialog.askopenfilename(filetypes=[("Archivos de gramática", "*.grm")])
         if filepath:
@@ -351,6 +419,10 @@ class ModernGrammarGUI:
                 
                 grammar_name = os.path.basename(filepath)
                 self.lbl_status.config(text=f"Gramática cargada: {grammar_name} (Tipo {self.grammar.type})")
+                self._watched_path = filepath
+                self.watcher.clear()
+                if self.var_watch.get():
+                    self.watcher.add(filepath, grammar_text)
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudo cargar la gramática: {str(e)}")
 
@@ -373,7 +445,11 @@ class ModernGrammarGUI:
         # Limpiar el canvas
         self.derivation_canvas.delete("all")
         
-        valid, derivation, tree = self.validator.validate_string(input_str)
+        try:
+            valid, derivation, tree = self.validator.validate_string(input_str)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
         self.txt_derivation.config(state=tk.NORMAL)
         self.txt_derivation.delete(1.0, tk.END)
         
@@ -386,10 +462,12 @@ class ModernGrammarGUI:
                 self.tree_visualizer.create_tree(tree, self.grammar)
         else:
             self.lbl_result.config(text="Cadena INVÁLIDA ✗", foreground="red")
+            # validate_string ya decide con recognize(); el diagnóstico se muestra
+            # siempre y, con gramáticas regulares, también el recorrido parcial
+            lines = self.validator.diagnose(input_str).lines()
             if derivation:
-                self.txt_derivation.insert(tk.END, "\n".join(derivation))
-            else:
-                self.txt_derivation.insert(tk.END, "No se pudo derivar la cadena.")
+                lines += [""] + derivation
+            self.txt_derivation.insert(tk.END, "\n".join(lines))
         
         self.txt_derivation.config(state=tk.DISABLED)
 
@@ -402,6 +480,10 @@ class ModernGrammarGUI:
             if length <= 0:
                 messagebox.showwarning("Advertencia", "La longitud debe ser un número positivo")
                 return
+        except ValueError:
+            messagebox.showerror("Error", "Longitud inválida")
+            return
+        try:
             generated = self.generator.generate_string(length)
             if generated:
                 self.lbl_generated.config(text=generated)
@@ -410,10 +492,12 @@ class ModernGrammarGUI:
                     self.lst_history.delete(100)
             else:
                 self.lbl_generated.config(text="No se pudo generar una cadena válida")
-        except ValueError:
-            messagebox.showerror("Error", "Longitud inválida")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             
     def __del__(self):
         # Limpieza de recursos al cerrar la aplicación
+        if hasattr(self, 'watcher'):
+            self.watcher.stop()
         if hasattr(self, 'tree_visualizer') and self.tree_visualizer:
             self.tree_visualizer.cleanup()
\ No newline at end of file
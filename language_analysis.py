@@ -0,0 +1,215 @@
+from collections import deque
+
+from grammar import Grammar
+from automaton import DFA, DEAD, compile_regular
+
+# Operaciones soportadas por la construcción producto
+OPERATIONS = {
+    "intersection": lambda x, y: x and y,
+    "union": lambda x, y: x or y,
+    "difference": lambda x, y: x and not y,
+    "symmetric_difference": lambda x, y: x != y,
+}
+
+
+def to_dfa(source):
+    """
+    Retorna el DFA asociado a `source`, que puede ser una instancia de Grammar
+    (se compila) o un DFA ya compilado.
+    """
+    if isinstance(source, DFA):
+        return source
+    if isinstance(source, Grammar):
+        return compile_regular(source)
+    raise TypeError("Se esperaba una instancia de Grammar o DFA.")
+
+
+def _pair_step(a, b, alphabet, p, q):
+    """
+    Genera las transiciones del par (p, q) sobre el alfabeto común.
+    """
+    for sym in alphabet:
+        yield sym, a.step(p, sym), b.step(q, sym)
+
+
+def _accepting(dfa, state):
+    return state != DEAD and dfa.accepting[state]
+
+
+def product(first, second, operation="intersection"):
+    """
+    Construye el autómata producto de dos lenguajes regulares.
+
+    :param first: Grammar o DFA.
+    :param second: Grammar o DFA.
+    :param operation: "intersection", "union", "difference" o "symmetric_difference".
+    :return: DFA mínimo que reconoce el lenguaje resultante.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Operación no soportada: {operation}")
+    combine = OPERATIONS[operation]
+    a, b = to_dfa(first), to_dfa(second)
+    alphabet = sorted(set(a.alphabet) | set(b.alphabet))
+
+    initial = (a.start, b.start)
+    ids = {initial: 0}
+    order = [initial]
+    transitions = []
+    accepting = []
+    for p, q in order:
+        row = []
+        for _, p2, q2 in _pair_step(a, b, alphabet, p, q):
+            pair = (p2, q2)
+            if pair not in ids:
+                ids[pair] = len(order)
+                order.append(pair)
+            row.append(ids[pair])
+        transitions.append(row)
+        accepting.append(combine(_accepting(a, p), _accepting(b, q)))
+    return DFA(alphabet, transitions, accepting, 0).minimize()
+
+
+def _useful_states(dfa):
+    """
+    Retorna los estados accesibles desde el inicial y co-accesibles
+    (desde los que se alcanza un estado final).
+    """
+    reachable = {dfa.start}
+    stack = [dfa.start]
+    while stack:
+        q = stack.pop()
+        for t in dfa.transitions[q]:
+            if t != DEAD and t not in reachable:
+                reachable.add(t)
+                stack.append(t)
+
+    inverse = {}
+    for q in reachable:
+        for t in dfa.transitions[q]:
+            if t != DEAD:
+                inverse.setdefault(t, []).append(q)
+    productive = {q for q in reachable if dfa.accepting[q]}
+    stack = list(productive)
+    while stack:
+        q = stack.pop()
+        for p in inverse.get(q, ()):
+            if p not in productive:
+                productive.add(p)
+                stack.append(p)
+    return productive
+
+
+def shortest_string(source):
+    """
+    Retorna la cadena más corta del lenguaje, o None si el lenguaje es vacío.
+    """
+    dfa = to_dfa(source)
+    parent = {dfa.start: None}
+    queue = deque([dfa.start])
+    while queue:
+        q = queue.popleft()
+        if dfa.accepting[q]:
+            symbols = []
+            while parent[q] is not None:
+                q, sym = parent[q]
+                symbols.append(sym)
+            return "".join(reversed(symbols))
+        for sym, t in zip(dfa.alphabet, dfa.transitions[q]):
+            if t != DEAD and t not in parent:
+                parent[t] = (q, sym)
+                queue.append(t)
+    return None
+
+
+def is_empty(source):
+    """
+    Indica si el lenguaje generado es vacío.
+    """
+    return shortest_string(source) is None
+
+
+def is_finite(source):
+    """
+    Indica si el lenguaje generado es finito: no existe un ciclo entre estados
+    útiles (accesibles y co-accesibles) del autómata.
+    """
+    dfa = to_dfa(source)
+    useful = _useful_states(dfa)
+    # DFS iterativo con colores: 1 = en la pila, 2 = terminado
+    color = {}
+    for root in useful:
+        if root in color:
+            continue
+        color[root] = 1
+        stack = [(root, iter(dfa.transitions[root]))]
+        while stack:
+            q, successors = stack[-1]
+            advanced = False
+            for t in successors:
+                if t not in useful:
+                    continue
+                if color.get(t) == 1:
+                    return False
+                if t not in color:
+                    color[t] = 1
+                    stack.append((t, iter(dfa.transitions[t])))
+                    advanced = True
+                    break
+            if not advanced:
+                color[q] = 2
+                stack.pop()
+    return True
+
+
+def _find_distinguishing(a, b, condition):
+    """
+    Recorre en anchura el producto de ambos autómatas (sin construirlo completo)
+    y retorna la cadena más corta cuyo par de estados cumple `condition`,
+    o None si no existe.
+    """
+    alphabet = sorted(set(a.alphabet) | set(b.alphabet))
+    initial = (a.start, b.start)
+    parent = {initial: None}
+    queue = deque([initial])
+    while queue:
+        p, q = queue.popleft()
+        if condition(_accepting(a, p), _accepting(b, q)):
+            symbols = []
+            pair = (p, q)
+            while parent[pair] is not None:
+                pair, sym = parent[pair]
+                symbols.append(sym)
+            return "".join(reversed(symbols))
+        if p == DEAD and q == DEAD:
+            continue
+        for sym, p2, q2 in _pair_step(a, b, alphabet, p, q):
+            pair = (p2, q2)
+            if pair not in parent:
+                parent[pair] = ((p, q), sym)
+                queue.append(pair)
+    return None
+
+
+def is_included(first, second):
+    """
+    Verifica si L(first) ⊆ L(second).
+
+    Retorna una tupla:
+     - (True, None) si la inclusión se cumple.
+     - (False, contraejemplo) con la cadena más corta de L(first) que no está en L(second).
+    """
+    counterexample = _find_distinguishing(to_dfa(first), to_dfa(second), OPERATIONS["difference"])
+    return counterexample is None, counterexample
+
+
+def are_equivalent(first, second):
+    """
+    Verifica si ambas gramáticas (o autómatas) definen el mismo lenguaje.
+
+    Retorna una tupla:
+     - (True, None) si los lenguajes son iguales.
+     - (False, contraejemplo) con la cadena más corta que pertenece a solo uno de ellos.
+    """
+    counterexample = _find_distinguishing(to_dfa(first), to_dfa(second),
+                                          OPERATIONS["symmetric_difference"])
+    return counterexample is None, counterexample
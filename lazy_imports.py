@@ -0,0 +1,18 @@
+import importlib
+
+# Módulos opcionales ya resueltos: nombre -> módulo (o None si no está instalado)
+_loaded = {}
+
+
+def optional_import(name):
+    """
+    Importa un módulo opcional (por ejemplo NumPy) la primera vez que se necesita,
+    para que importar el núcleo no pague su costo de carga.
+    Retorna el módulo, o None si no está instalado.
+    """
+    if name not in _loaded:
+        try:
+            _loaded[name] = importlib.import_module(name)
+        except ImportError:
+            _loaded[name] = None
+    return _loaded[name]
@@ -0,0 +1,145 @@
+from bisect import bisect_right
+
+from automaton import DEAD
+
+
+class LengthDAG:
+    """
+    Grafo acíclico de derivaciones de un DFA indexado por longitud restante: el
+    nodo (q, r) representa todas las cadenas de exactamente r terminales que el
+    autómata acepta desde el estado q, y sus aristas son las transiciones de q
+    hacia nodos (q', r - 1) no vacíos. Las cadenas que comparten sufijo comparten
+    el nodo, así que el grafo ocupa O(longitud × estados) aunque el lenguaje tenga
+    exponenciales cadenas.
+
+    Para cada nodo se guarda cuántas cadenas representa (counts[r][q]); con eso
+    cada cadena se genera en un solo recorrido de `length` pasos sin reintentos,
+    de forma uniforme entre todas las cadenas de esa longitud, y las cadenas se
+    pueden numerar en orden (ver `unrank` y `strings`).
+    """
+
+    def __init__(self, dfa, length):
+        """
+        :param dfa: Instancia de automaton.DFA.
+        :param length: Longitud máxima (en terminales) que se va a pedir.
+        """
+        self.dfa = dfa
+        self.length = length
+        # Aristas de cada estado: (índice del símbolo, destino) sin las transiciones muertas
+        self.edges = [[(index, target) for index, target in enumerate(row) if target != DEAD]
+                      for row in dfa.transitions]
+        self.counts = [[1 if accepting else 0 for accepting in dfa.accepting]]
+        for _ in range(length):
+            previous = self.counts[-1]
+            self.counts.append([sum(previous[target] for _, target in edges) for edges in self.edges])
+        self._thresholds = {}  # (estado, longitud restante) -> probabilidades acumuladas
+
+    def count(self, length, state=None):
+        """
+        Cantidad de cadenas de exactamente `length` terminales aceptadas desde
+        `state` (por defecto el estado inicial).
+        """
+        if length > self.length:
+            raise ValueError(f"El grafo se construyó hasta la longitud {self.length}.")
+        return self.counts[length][self.dfa.start if state is None else state]
+
+    def sample(self, length, rng):
+        """
+        Retorna una cadena de `length` terminales elegida de manera uniforme entre
+        todas las del lenguaje, o None si no hay ninguna.
+
+        Cada paso elige la transición con probabilidad proporcional a la cantidad de
+        cadenas que la completan. Esas proporciones se calculan (con los conteos
+        exactos) la primera vez que se visita cada nodo y después cada paso cuesta
+        un número aleatorio y una búsqueda binaria, sin operar con enteros grandes.
+
+        :param rng: Instancia de random.Random.
+        """
+        if not self.count(length):
+            return None
+        alphabet, thresholds = self.dfa.alphabet, self._thresholds
+        state = self.dfa.start
+        generated = []
+        for remaining in range(length, 0, -1):
+            node = thresholds.get((state, remaining))
+            if node is None:
+                node = thresholds[(state, remaining)] = self._node_thresholds(state, remaining)
+            index, state = self.edges[state][bisect_right(node, rng.random())]
+            generated.append(alphabet[index])
+        return "".join(generated)
+
+    def _node_thresholds(self, state, remaining):
+        """
+        Probabilidades acumuladas de las aristas del nodo (state, remaining), con 53
+        bits de precisión; la última es exactamente 1.
+        """
+        total = self.counts[remaining][state]
+        below = self.counts[remaining - 1]
+        result = []
+        accumulated = 0
+        for _, target in self.edges[state]:
+            accumulated += below[target]
+            result.append(((accumulated << 53) // total) / (1 << 53))
+        return result
+
+    def unrank(self, length, rank):
+        """
+        Retorna la cadena número `rank` (desde 0) de las de `length` terminales, en
+        el orden del alfabeto del DFA. En cada paso se salta, de una sola vez, la
+        cantidad de cadenas de las transiciones anteriores.
+
+        :raises IndexError: Si rank no es menor que `count(length)`.
+        """
+        if not 0 <= rank < self.count(length):
+            raise IndexError("No hay tantas cadenas de esa longitud.")
+        alphabet, counts = self.dfa.alphabet, self.counts
+        state = self.dfa.start
+        generated = []
+        for remaining in range(length, 0, -1):
+            below = counts[remaining - 1]
+            for index, target in self.edges[state]:
+                if rank < below[target]:
+                    break
+                rank -= below[target]
+            generated.append(alphabet[index])
+            state = target
+        return "".join(generated)
+
+    def strings(self, length, limit=None):
+        """
+        Itera (sin recursión) las cadenas de `length` terminales en el orden de
+        `unrank`, hasta `limit` cadenas. Solo se recorren nodos no vacíos, así que
+        el costo es proporcional a la salida.
+        """
+        if not self.count(length):
+            return
+        alphabet, counts = self.dfa.alphabet, self.counts
+        produced = 0
+        prefix = []
+        # Pila de (estado, longitud restante, índice de la próxima arista a probar)
+        stack = [[self.dfa.start, length, 0]]
+        while stack:
+            frame = stack[-1]
+            state, remaining, position = frame
+            if remaining == 0:
+                yield "".join(prefix)
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return
+                stack.pop()
+                if prefix:
+                    prefix.pop()
+                continue
+            edges = self.edges[state]
+            below = counts[remaining - 1]
+            while position < len(edges) and not below[edges[position][1]]:
+                position += 1
+            if position == len(edges):
+                stack.pop()
+                if prefix:
+                    prefix.pop()
+                continue
+            frame[2] = position + 1
+            index, target = edges[position]
+            prefix.append(alphabet[index])
+            stack.append([target, remaining - 1, 0])
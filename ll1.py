@@ -0,0 +1,190 @@
+from grammar import Grammar
+from tokenizer import terminal_alphabet
+
+
+def all_productions(grammar: Grammar):
+    """
+    Producciones normalizadas con una entrada (posiblemente vacía) para cada no
+    terminal declarado, aunque no tenga producciones.
+    """
+    productions = grammar.get_productions()
+    for name in sorted(grammar.nonterminals):
+        productions.setdefault(name, [])
+    return productions
+
+
+def nullable_set(productions):
+    """
+    Retorna el conjunto de no terminales que derivan la cadena vacía.
+
+    :param productions: Producciones normalizadas (ver Grammar.get_productions).
+    """
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for left, prods in productions.items():
+            if left not in nullable and any(all(sym in nullable for sym in prod) for prod in prods):
+                nullable.add(left)
+                changed = True
+    return nullable
+
+
+def first_of_sequence(symbols, first, nullable):
+    """
+    FIRST de una secuencia de símbolos: retorna (conjunto de terminales, anulable).
+    """
+    result = set()
+    for sym in symbols:
+        if sym in first:
+            result |= first[sym]
+            if sym not in nullable:
+                return result, False
+        else:
+            result.add(sym)
+            return result, False
+    return result, True
+
+
+def first_sets(grammar: Grammar, productions=None, nullable=None):
+    """
+    Calcula FIRST(A) para cada no terminal A con producciones.
+    """
+    productions = productions if productions is not None else all_productions(grammar)
+    nullable = nullable if nullable is not None else nullable_set(productions)
+    first = {left: set() for left in productions}
+    changed = True
+    while changed:
+        changed = False
+        for left, prods in productions.items():
+            for prod in prods:
+                symbols, _ = first_of_sequence(prod, first, nullable)
+                if not symbols <= first[left]:
+                    first[left] |= symbols
+                    changed = True
+    return first
+
+
+# Marcador de fin de entrada en los conjuntos FOLLOW
+END = "$"
+
+
+def follow_sets(grammar: Grammar, productions=None, nullable=None, first=None):
+    """
+    Calcula FOLLOW(A) para cada no terminal A con producciones; el fin de entrada
+    se representa con END.
+    """
+    productions = productions if productions is not None else all_productions(grammar)
+    nullable = nullable if nullable is not None else nullable_set(productions)
+    first = first if first is not None else first_sets(grammar, productions, nullable)
+    follow = {left: set() for left in productions}
+    if grammar.start in follow:
+        follow[grammar.start].add(END)
+    changed = True
+    while changed:
+        changed = False
+        for left, prods in productions.items():
+            for prod in prods:
+                for i, sym in enumerate(prod):
+                    if sym not in follow:
+                        continue
+                    symbols, rest_nullable = first_of_sequence(prod[i + 1:], first, nullable)
+                    if rest_nullable:
+                        symbols = symbols | follow[left]
+                    if not symbols <= follow[sym]:
+                        follow[sym] |= symbols
+                        changed = True
+    return follow
+
+
+def ll1_table(grammar: Grammar):
+    """
+    Construye la tabla de análisis LL(1): (A, terminal o END) -> producción.
+
+    :return: Tupla (tabla, conflictos); cada conflicto es (A, terminal, [producciones]).
+    """
+    productions = all_productions(grammar)
+    nullable = nullable_set(productions)
+    first = first_sets(grammar, productions, nullable)
+    follow = follow_sets(grammar, productions, nullable, first)
+    table = {}
+    candidates = {}
+    for left, prods in productions.items():
+        for prod in prods:
+            symbols, prod_nullable = first_of_sequence(prod, first, nullable)
+            if prod_nullable:
+                symbols = symbols | follow[left]
+            for terminal in symbols:
+                candidates.setdefault((left, terminal), []).append(prod)
+    conflicts = []
+    for (left, terminal), prods in candidates.items():
+        table[(left, terminal)] = prods[0]
+        if len(prods) > 1:
+            conflicts.append((left, terminal, prods))
+    return table, conflicts
+
+
+class LL1Recognizer:
+    """
+    Reconocedor predictivo LL(1) dirigido por tabla: un único recorrido de la
+    entrada, sin retroceso. Solo se puede construir para gramáticas LL(1).
+    """
+
+    def __init__(self, grammar: Grammar):
+        """
+        :param grammar: Instancia de Grammar.
+        :raises ValueError: Si la gramática no es LL(1).
+        """
+        table, conflicts = ll1_table(grammar)
+        if conflicts:
+            left, terminal, _ = conflicts[0]
+            raise ValueError(f"La gramática no es LL(1): conflicto en ({left}, {terminal}).")
+        self.alphabet = terminal_alphabet(grammar)
+        ids = {sym: i for i, sym in enumerate(self.alphabet)}
+        self.end = len(self.alphabet)
+        ids[END] = self.end
+
+        # Los no terminales se codifican como enteros negativos y los terminales por su id
+        names = list(all_productions(grammar))
+        codes = {name: -(k + 1) for k, name in enumerate(names)}
+        self.start = codes.get(grammar.start)
+        # rows[k][id] = producción (lista de códigos, invertida para apilar directamente)
+        self.rows = [dict() for _ in names]
+        for (left, terminal), prod in table.items():
+            encoded = [codes[sym] if sym in codes else ids[sym] for sym in prod]
+            self.rows[-codes[left] - 1][ids[terminal]] = encoded[::-1]
+
+    def recognize(self, tokens):
+        """
+        Indica si la secuencia de terminales pertenece al lenguaje.
+        """
+        ids = {sym: i for i, sym in enumerate(self.alphabet)}
+        try:
+            return self.recognize_ids([ids[tok] for tok in tokens])
+        except KeyError:
+            return False
+
+    def recognize_ids(self, ids):
+        """
+        Igual que `recognize`, pero recibe identificadores de token (ver tokenizer.py).
+        """
+        if self.start is None:
+            return False
+        rows = self.rows
+        stack = [self.start]
+        position = 0
+        n = len(ids)
+        end = self.end
+        while stack:
+            top = stack.pop()
+            current = ids[position] if position < n else end
+            if top >= 0:
+                if top != current:
+                    return False
+                position += 1
+            else:
+                prod = rows[-top - 1].get(current)
+                if prod is None:
+                    return False
+                stack.extend(prod)
+        return position == n
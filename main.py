@@ -1,7 +1,106 @@
-import tkinter as tk
-from gui import ModernGrammarGUI
+import argparse
+import sys
+
+
+def run_cli(args):
+    """
+    Modo de línea de comandos (sin interfaz gráfica): valida o genera cadenas
+    con la gramática indicada. Retorna el código de salida.
+    """
+    from grammar import Grammar
+    from grammar_validator import GrammarValidator
+    from grammar_generator import GrammarGenerator
+
+    try:
+        grammar = Grammar.from_file(args.grammar)
+        if args.generate is not None:
+            generator = GrammarGenerator(grammar)
+            if args.seed is not None:
+                # Reproducible y repartible entre procesos (ver GrammarGenerator.generate_bulk)
+                strings = generator.generate_bulk(args.generate, args.count, args.seed, args.workers)
+                for generated in strings:
+                    print(generated)
+                if len(strings) < args.count:
+                    print("No se pudieron generar todas las cadenas pedidas", file=sys.stderr)
+                    return 1
+                return 0
+            for _ in range(args.count):
+                generated = generator.generate_string(args.generate)
+                if generated is None:
+                    print("No se pudo generar una cadena válida", file=sys.stderr)
+                    return 1
+                print(generated)
+            return 0
+
+        validator = GrammarValidator(grammar)
+        if args.calibrate:
+            report = validator.calibrate()
+            print(validator.profile)
+            for length, timings in report["timings"].items():
+                measured = ", ".join(f"{name} {seconds * 1000:.2f} ms" for name, seconds in timings.items())
+                print(f"n ≤ {length}: {measured}")
+            plan = ", ".join(f"{name} (n ≤ {bound})" if bound is not None else name
+                             for bound, name in report["plan"])
+            print(f"Motores elegidos: {plan}")
+            if report["skipped"]:
+                print(f"Muestras omitidas (no se dividen en terminales): {report['skipped']}")
+        all_valid = True
+        for string in args.strings:
+            if args.derivation:
+                valid, derivation, _ = validator.validate_string(string)
+            else:
+                valid, derivation = validator.recognize(string), []
+            all_valid = all_valid and valid
+            print(f"{string}\t{'VÁLIDA' if valid else 'INVÁLIDA'}")
+            for line in derivation:
+                print(f"    {line}")
+            if args.probability and valid:
+                best, total, _, _ = validator.most_likely_parse(string)
+                print(f"    P(cadena) = {total:.6g}, P(árbol más probable) = {best:.6g}")
+            if args.trees and valid:
+                count = validator.parse_forest(string).count_trees()
+                print(f"    Árboles de derivación: {count if count is not None else 'infinitos'}")
+            if args.diagnose and not valid:
+                for line in validator.diagnose(string).lines():
+                    print(f"    {line}")
+        return 0 if all_valid else 1
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+def run_gui():
+    # La interfaz (Tkinter, Pillow, Graphviz) solo se importa en este modo
+    import tkinter as tk
+    from gui import ModernGrammarGUI
 
-if __name__ == "__main__":
     root = tk.Tk()
     app = ModernGrammarGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Procesador de gramáticas. Sin argumentos abre la interfaz gráfica.")
+    parser.add_argument("grammar", nargs="?", help="Archivo .grm (activa el modo de línea de comandos).")
+    parser.add_argument("strings", nargs="*", help="Cadenas a validar.")
+    parser.add_argument("--derivation", action="store_true", help="Muestra la derivación de cada cadena.")
+    parser.add_argument("--diagnose", action="store_true",
+                        help="Para las cadenas inválidas muestra dónde falla, qué se esperaba y una reparación mínima.")
+    parser.add_argument("--probability", action="store_true",
+                        help="Muestra la probabilidad de cada cadena válida según los pesos de las producciones.")
+    parser.add_argument("--trees", action="store_true",
+                        help="Cuenta los árboles de derivación de cada cadena válida (bosque GLR).")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Mide los motores de reconocimiento y muestra el elegido por longitud.")
+    parser.add_argument("--generate", type=int, metavar="LONGITUD", help="Genera cadenas de esa longitud.")
+    parser.add_argument("--count", type=int, default=1, help="Cantidad de cadenas a generar.")
+    parser.add_argument("--seed", help="Semilla: con la misma semilla se generan las mismas cadenas.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos para generar con --seed (el resultado no depende de este valor).")
+    args = parser.parse_args()
+
+    if args.grammar is None:
+        run_gui()
+    else:
+        sys.exit(run_cli(args))
@@ -0,0 +1,297 @@
+import math
+from operator import itemgetter
+
+from grammar import Grammar
+from earley import EarleyRecognizer
+
+# Cantidad máxima de pasadas del punto fijo dentro de un grupo de elementos (solo se
+# necesita más de unas pocas si hay ciclos de producciones unitarias o anulables)
+MAX_PASSES = 1000
+# Tolerancia relativa con la que se considera que la probabilidad total convergió
+TOLERANCE = 1e-12
+
+
+def production_probabilities(grammar: Grammar):
+    """
+    Probabilidad de cada producción: su peso dividido por la suma de los pesos de
+    las producciones del mismo no terminal (ver Grammar.get_weights). Sin pesos
+    declarados las producciones de cada no terminal son equiprobables.
+
+    :return: Diccionario no terminal -> lista de probabilidades, en el orden de
+             Grammar.get_productions.
+    """
+    probabilities = {}
+    for left, weights in grammar.get_weights().items():
+        total = sum(weights)
+        probabilities[left] = [weight / total for weight in weights]
+    return probabilities
+
+
+def shortest_yields(productions):
+    """
+    Longitud (en terminales) de la cadena más corta que deriva cada no terminal;
+    los no terminales improductivos no aparecen en el resultado.
+
+    :param productions: Producciones normalizadas (ver Grammar.get_productions).
+    """
+    shortest = {}
+    changed = True
+    while changed:
+        changed = False
+        for left, prods in productions.items():
+            for prod in prods:
+                if all(sym in shortest or sym not in productions for sym in prod):
+                    length = sum(shortest.get(sym, 1) for sym in prod)
+                    if length < shortest.get(left, length + 1):
+                        shortest[left] = length
+                        changed = True
+    return shortest
+
+
+class AliasTable:
+    """
+    Muestreo de una distribución discreta en tiempo O(1) con el método de alias de
+    Vose: la tabla se construye en O(k) y cada muestra usa una columna elegida al
+    azar y una moneda sesgada.
+    """
+
+    def __init__(self, weights):
+        """
+        :param weights: Pesos positivos (no hace falta que sumen 1).
+        :raises ValueError: Si no hay pesos.
+        """
+        count = len(weights)
+        if not count:
+            raise ValueError("La distribución no tiene elementos.")
+        total = float(sum(weights))
+        scaled = [weight * count / total for weight in weights]
+        self.probability = [1.0] * count
+        self.alias = list(range(count))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.probability[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Las columnas que quedan valen 1 salvo por errores de redondeo
+
+    def __len__(self):
+        return len(self.probability)
+
+    def sample(self, rng):
+        """
+        Retorna un índice con probabilidad proporcional a su peso.
+
+        :param rng: Instancia de random.Random.
+        """
+        column = int(rng.random() * len(self.probability))
+        return column if rng.random() < self.probability[column] else self.alias[column]
+
+
+class ProbabilisticParser:
+    """
+    Análisis probabilístico sobre los conjuntos de Earley (ver earley.py): en una sola
+    pasada por el diagrama calcula, para cada elemento, la probabilidad de su mejor
+    análisis parcial (Viterbi, en escala logarítmica) y la suma de las probabilidades
+    de todos sus análisis parciales (probabilidad interior).
+
+    Los elementos de cada conjunto se procesan por origen decreciente; dentro de un
+    mismo origen se itera hasta un punto fijo, lo que cubre los ciclos de producciones
+    unitarias o anulables (para la probabilidad total la iteración converge a la serie
+    geométrica correspondiente).
+    """
+
+    def __init__(self, grammar: Grammar, earley=None):
+        """
+        :param grammar: Instancia de Grammar; los pesos de las producciones se
+                        normalizan por no terminal (ver production_probabilities).
+        :param earley: EarleyRecognizer ya construido para la gramática (opcional).
+        """
+        self.grammar = grammar
+        self.earley = earley if earley is not None else EarleyRecognizer(grammar)
+        self._productions = grammar.get_productions()
+        probabilities = production_probabilities(grammar)
+        self.rule_probabilities = [probabilities[name][index] for name, index in self.earley.sources]
+        self._log_probabilities = [math.log(p) for p in self.rule_probabilities]
+
+    def parse(self, tokens):
+        """
+        Igual que `parse_ids`, pero recibe la secuencia de terminales.
+        """
+        ids = {sym: i for i, sym in enumerate(self.earley.alphabet)}
+        try:
+            return self.parse_ids([ids[tok] for tok in tokens])
+        except KeyError:
+            return 0.0, 0.0, None, []
+
+    def parse_ids(self, ids):
+        """
+        Analiza una entrada dada como identificadores de token (ver tokenizer.py).
+
+        :return: Tupla (probabilidad del árbol más probable, probabilidad total de la
+                 cadena, árbol, pasos de la derivación por la izquierda). Si la cadena
+                 no pertenece al lenguaje el árbol es None y las probabilidades son 0.
+                 El árbol usa el formato de GrammarValidator.validate_string.
+        """
+        earley = self.earley
+        n = len(ids)
+        sets = earley.parse_sets(ids) if earley.start is not None else []
+        if len(sets) <= n:
+            return 0.0, 0.0, None, []
+        rules = earley.rules
+        log_p, p = self._log_probabilities, self.rule_probabilities
+
+        best = [dict() for _ in range(n + 1)]    # elemento -> log de la mejor probabilidad
+        total = [dict() for _ in range(n + 1)]   # elemento -> probabilidad interior
+        split = [dict() for _ in range(n + 1)]   # elemento -> conjunto del elemento anterior
+        inner = [dict() for _ in range(n + 1)]   # (B, k) -> [log mejor, total, mejor regla]
+        waits = []                               # waits[k][B]: elementos de k con el punto delante de B
+
+        for m in range(n + 1):
+            best_m, total_m, split_m, inner_m = best[m], total[m], split[m], inner[m]
+            waits_m = {}
+            groups = {}
+            for item in sets[m]:
+                rule, dot, origin = item
+                right = rules[rule][1]
+                if dot < len(right) and right[dot] < 0:
+                    waits_m.setdefault(right[dot], []).append(item)
+                groups.setdefault(origin, []).append(item)
+            waits.append(waits_m)
+            # Aportes de las compleciones de grupos con origen mayor (ya calculados)
+            pushed = {}
+
+            for origin in sorted(groups, reverse=True):
+                group = groups[origin]
+                if len(group) > 1:
+                    group.sort(key=itemgetter(1))
+                best_o, total_o = best[origin], total[origin]
+                # Elementos completos del grupo, por no terminal de la izquierda
+                complete = {}
+                # No terminales que el grupo lee de sus propios completos (corte l = origen);
+                # solo si alguno cambia hace falta otra pasada, porque al recorrer el grupo
+                # por punto creciente cada elemento ya encuentra calculado a su anterior
+                used = set()
+                for rule, dot, _ in group:
+                    right = rules[rule][1]
+                    if dot == len(right):
+                        complete.setdefault(rules[rule][0], []).append((rule, dot, origin))
+                    if dot and right[dot - 1] < 0:
+                        used.add(right[dot - 1])
+
+                for _ in range(MAX_PASSES):
+                    changed = False
+                    for item in group:
+                        rule, dot, _ = item
+                        if dot == 0:
+                            value_best, value_total, previous_set = 0.0, 1.0, None
+                        else:
+                            sym = rules[rule][1][dot - 1]
+                            previous = (rule, dot - 1, origin)
+                            if sym >= 0:
+                                # Escaneo: el elemento anterior está en el conjunto m - 1
+                                previous_set = m - 1
+                                value_best = best[previous_set].get(previous, -math.inf)
+                                value_total = total[previous_set].get(previous, 0.0)
+                            else:
+                                # Compleción: los cortes origen < l < m ya se sumaron en
+                                # `pushed`; faltan l = origen y l = m (sym anulable)
+                                value_best, value_total, previous_set = pushed.get(item, (-math.inf, 0.0, None))
+                                for l in ((origin, m) if origin < m else (m,)):
+                                    entry = inner_m.get((sym, l))
+                                    if entry is None or previous not in best[l]:
+                                        continue
+                                    candidate = best[l][previous] + entry[0]
+                                    if candidate > value_best:
+                                        value_best, previous_set = candidate, l
+                                    value_total += total[l][previous] * entry[1]
+                        if value_best > best_m.get(item, -math.inf):
+                            best_m[item] = value_best
+                            total_m[item] = value_total
+                            split_m[item] = previous_set
+                        elif item in best_m:
+                            total_m[item] = value_total
+
+                    # Probabilidad interior de los no terminales completos en (origen, m)
+                    for left, items in complete.items():
+                        items = [item for item in items if item in best_m]
+                        if not items:
+                            continue
+                        value_best, rule = max((log_p[item[0]] + best_m[item], item[0]) for item in items)
+                        value_total = sum(p[item[0]] * total_m[item] for item in items)
+                        entry = inner_m.setdefault((left, origin), [-math.inf, 0.0, None])
+                        if value_best > entry[0]:
+                            entry[0], entry[2] = value_best, rule
+                            changed = changed or left in used
+                        if abs(value_total - entry[1]) > TOLERANCE * value_total:
+                            changed = changed or left in used
+                        entry[1] = value_total
+                    if not changed:
+                        break
+
+                # Se propagan los no terminales completos a los elementos que los esperan
+                # con un origen menor (como la compleción de Earley); los completos en
+                # (m, m) se leen directamente al evaluar cada elemento
+                if origin == m:
+                    continue
+                for left in complete:
+                    entry = inner_m.get((left, origin))
+                    if entry is None:
+                        continue
+                    for parent in waits[origin].get(left, ()):
+                        if parent[2] == origin or parent not in best_o:
+                            continue
+                        advanced = (parent[0], parent[1] + 1, parent[2])
+                        current = pushed.get(advanced, (-math.inf, 0.0, None))
+                        candidate = best_o[parent] + entry[0]
+                        if candidate > current[0]:
+                            current = (candidate, current[1], origin)
+                        pushed[advanced] = (current[0], current[1] + total_o[parent] * entry[1], current[2])
+
+        entry = inner[n].get((earley.start, 0))
+        if entry is None or entry[2] is None:
+            return 0.0, 0.0, None, []
+        tree, steps = self._build_tree(ids, rules, split, inner)
+        return math.exp(entry[0]), entry[1], tree, steps
+
+    def _build_tree(self, ids, rules, split, inner):
+        """
+        Reconstruye de forma iterativa el árbol más probable a partir de los punteros
+        del diagrama. Los nodos se expanden en preorden, así que los pasos retornados
+        forman la derivación por la izquierda.
+        """
+        earley = self.earley
+        names, alphabet = earley.names, earley.alphabet
+        n = len(ids)
+        root = {"symbol": names[-earley.start - 1], "children": [], "description": "Símbolo inicial"}
+        steps = []
+        stack = [(root, earley.start, 0, n)]
+        while stack:
+            node, code, origin, end = stack.pop()
+            rule = inner[end][(code, origin)][2]
+            right = rules[rule][1]
+            name, index = earley.sources[rule]
+            production = self._productions[name][index]
+            text = " ".join(production) if production else "ε"
+            steps.append(f"{name} -> {text}")
+            node["production_applied"] = f"{name} → {text}"
+            children = [None] * len(right)
+            pending = []
+            dot, position = len(right), end
+            while dot > 0:
+                previous_set = split[position][(rule, dot, origin)]
+                sym = right[dot - 1]
+                if sym >= 0:
+                    children[dot - 1] = {"symbol": alphabet[sym], "children": [], "terminal": True,
+                                         "description": f"Terminal '{alphabet[sym]}' coincide con la entrada"}
+                else:
+                    children[dot - 1] = {"symbol": names[-sym - 1], "children": [],
+                                         "description": f"Símbolo {dot} de la producción {name} → {text}"}
+                    pending.append((children[dot - 1], sym, previous_set, position))
+                dot, position = dot - 1, previous_set
+            node["children"] = children
+            # pending está de derecha a izquierda: el hijo más a la izquierda queda arriba
+            stack.extend(pending)
+        return root, steps
@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from grammar import Grammar
+from grammar_validator import GrammarValidator
+from grammar_generator import GrammarGenerator
+from grammar_watch import FileWatcher, POLL_INTERVAL
+
+
+class RegistryEntry:
+    """
+    Gramática registrada con su validador y generador ya construidos.
+    Los motores compilados (DFA, CYK, ...) se crean una vez dentro del validador y
+    se comparten entre todas las peticiones que usan la gramática.
+    """
+
+    def __init__(self, name, text, path=None, version=1):
+        self.name = name
+        self.text = text
+        self.path = path
+        self.version = version
+        self.grammar = Grammar.from_text(text)
+        self.validator = GrammarValidator(self.grammar)
+        self.generator = GrammarGenerator(self.grammar)
+
+    def describe(self):
+        return {"name": self.name, "type": self.grammar.type, "start": self.grammar.start,
+                "path": self.path, "version": self.version, "profile": self.validator.profile.summary()}
+
+
+class GrammarRegistry:
+    """
+    Registro de gramáticas compiladas indexado por nombre.
+
+    Reemplazar una gramática es atómico: la nueva entrada se compila completa y
+    recién entonces ocupa el lugar de la anterior. Las peticiones en curso ya
+    tienen su entrada (o su versión, en el pool) y terminan con la versión vieja.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def load_text(self, name, text, path=None):
+        """
+        Registra (o reemplaza) una gramática a partir de su texto .grm.
+        """
+        entry = RegistryEntry(name, text, path)
+        entry.validator.warm_up()
+        with self._lock:
+            previous = self.entries.get(name)
+            entry.version = previous.version + 1 if previous else 1
+            self.entries[name] = entry
+        if path is not None and self._watcher is not None:
+            self._watcher.add(path, text)
+        return entry
+
+    def load_file(self, name, path):
+        """
+        Registra (o reemplaza) una gramática leyendo un archivo .grm.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        return self.load_text(name, text, os.path.abspath(path))
+
+    def get(self, name):
+        """
+        Retorna la entrada registrada con ese nombre.
+
+        :raises KeyError: Si no existe.
+        """
+        if name not in self.entries:
+            raise KeyError(f"Gramática no registrada: {name}")
+        return self.entries[name]
+
+    def watch(self, interval=POLL_INTERVAL, on_error=None):
+        """
+        Vigila los archivos de las gramáticas registradas (y de las que se registren
+        después) y las recompila en segundo plano cuando cambian (ver grammar_watch.py).
+
+        :param on_error: Función (ruta, excepción) para los archivos que no compilan.
+        :return: El FileWatcher iniciado.
+        """
+        if self._watcher is None:
+            self._watcher = FileWatcher(self._reload, interval, on_error)
+            with self._lock:
+                entries = list(self.entries.values())
+            for entry in entries:
+                if entry.path is not None:
+                    self._watcher.add(entry.path, entry.text)
+        return self._watcher.start()
+
+    def _reload(self, path, text):
+        with self._lock:
+            names = [entry.name for entry in self.entries.values() if entry.path == path]
+        for name in names:
+            self.load_text(name, text, path)
+
+
+# Caché de gramáticas compiladas dentro de cada proceso del pool: (nombre, versión) -> entrada
+_worker_entries = {}
+
+
+def _worker_entry(name, version, text):
+    key = (name, version)
+    entry = _worker_entries.get(key)
+    if entry is None:
+        # Se descartan versiones anteriores de la misma gramática
+        for old in [k for k in _worker_entries if k[0] == name]:
+            del _worker_entries[old]
+        entry = RegistryEntry(name, text, version=version)
+        _worker_entries[key] = entry
+    return entry
+
+
+def run_operation(entry, operation, payload):
+    """
+    Ejecuta una operación sobre una entrada del registro y retorna un diccionario
+    serializable a JSON.
+    """
+    if operation == "validate":
+        string = payload["string"]
+        if payload.get("derivation", True):
+            valid, derivation, tree = entry.validator.validate_string(string)
+            return {"valid": valid, "derivation": derivation, "tree": tree}
+        return {"valid": entry.validator.recognize(string)}
+    if operation == "probability":
+        best, total, derivation, tree = entry.validator.most_likely_parse(payload["string"])
+        return {"valid": tree is not None, "probability": total, "best_probability": best,
+                "derivation": derivation, "tree": tree}
+    if operation == "diagnose":
+        return entry.validator.diagnose(payload["string"]).to_dict()
+    if operation == "validate-batch":
+        return {"results": entry.validator.validate_batch(payload["strings"])}
+    if operation == "generate":
+        length = int(payload["length"])
+        count = int(payload.get("count", 1))
+        if payload.get("seed") is not None:
+            # Mismas cadenas para la misma semilla, en cualquier proceso del pool
+            return {"strings": entry.generator.generate_bulk(length, count, payload["seed"])}
+        strings = [entry.generator.generate_string(length) for _ in range(count)]
+        return {"strings": [s for s in strings if s is not None]}
+    if operation == "enumerate":
+        length = int(payload["length"])
+        limit = int(payload.get("limit", 100))
+        return {"strings": entry.generator.enumerate_strings(length, limit)}
+    raise ValueError(f"Operación desconocida: {operation}")
+
+
+def _run_in_worker(name, version, text, operation, payload):
+    """
+    Punto de entrada de las tareas enviadas al pool de procesos.
+    """
+    return run_operation(_worker_entry(name, version, text), operation, payload)
+
+
+class ValidationService:
+    """
+    Servicio HTTP/JSON sin interfaz gráfica sobre asyncio.
+
+    Rutas:
+     - GET  /grammars            lista las gramáticas registradas.
+     - POST /grammars            {"name", "path"} o {"name", "text"}: registra una gramática.
+     - POST /validate            {"grammar", "string", "derivation": bool}
+     - POST /probability         {"grammar", "string"}: probabilidad total y árbol más probable.
+     - POST /diagnose            {"grammar", "string"}: posición del error, esperados y reparación mínima.
+     - POST /validate-batch      {"grammar", "strings": [...]}
+     - POST /generate            {"grammar", "length", "count", "seed" (opcional, reproducible)}
+     - POST /enumerate           {"grammar", "length", "limit"}
+
+    Solo el reconocimiento (validación sin derivación y por lotes) de entradas de
+    hasta `inline_limit` símbolos se resuelve en el propio bucle de eventos. El
+    resto (derivaciones, probabilidades, diagnósticos, generación y enumeración,
+    que pueden ser supercuadráticos o exponenciales aun con entradas cortas) se
+    envía a un pool de procesos para no bloquearlo. El registro de gramáticas
+    (compilación y precalentamiento) se hace en un hilo aparte.
+    """
+
+    OPERATIONS = ("validate", "probability", "diagnose", "validate-batch", "generate", "enumerate")
+
+    def __init__(self, registry=None, workers=None, inline_limit=256):
+        self.registry = registry if registry is not None else GrammarRegistry()
+        self.workers = workers
+        self.inline_limit = inline_limit
+        self.pool = None
+
+    def _cost(self, operation, payload):
+        """
+        Estima el costo de la petición en símbolos de entrada. Las operaciones que no
+        son solo reconocimiento cuestan siempre más que `inline_limit`.
+        """
+        if operation == "validate" and not payload.get("derivation", True):
+            return len(payload.get("string", ""))
+        if operation == "validate-batch":
+            return sum(len(s) for s in payload.get("strings", []))
+        return self.inline_limit + 1
+
+    async def dispatch(self, operation, payload):
+        """
+        Ejecuta una operación, en línea o en el pool según su costo.
+        """
+        entry = self.registry.get(payload["grammar"])
+        if self.pool is None or self._cost(operation, payload) <= self.inline_limit:
+            return run_operation(entry, operation, payload)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, _run_in_worker, entry.name, entry.version,
+                                          entry.text, operation, payload)
+
+    async def handle(self, method, path, payload):
+        """
+        Resuelve una petición y retorna (estado HTTP, cuerpo).
+        """
+        if path == "/grammars":
+            if method == "GET":
+                return HTTPStatus.OK, {"grammars": [e.describe() for e in self.registry.entries.values()]}
+            if method == "POST":
+                # Compilar y precalentar puede tardar: no se bloquea el bucle de eventos
+                loop = asyncio.get_running_loop()
+                if "path" in payload:
+                    entry = await loop.run_in_executor(None, self.registry.load_file,
+                                                       payload["name"], payload["path"])
+                else:
+                    entry = await loop.run_in_executor(None, self.registry.load_text,
+                                                       payload["name"], payload["text"])
+                return HTTPStatus.OK, entry.describe()
+        operation = path.strip("/")
+        if operation in self.OPERATIONS and method == "POST":
+            return HTTPStatus.OK, await self.dispatch(operation, payload)
+        return HTTPStatus.NOT_FOUND, {"error": f"Ruta no encontrada: {method} {path}"}
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    payload = json.loads(body) if body else {}
+                    status, response = await self.handle(method, path, payload)
+                except KeyError as e:
+                    status, response = HTTPStatus.BAD_REQUEST, {"error": str(e.args[0] if e.args else e)}
+                except (ValueError, TypeError, OSError) as e:
+                    status, response = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+                except Exception as e:  # Errores internos: la conexión sigue atendiéndose
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+                data = json.dumps(response, ensure_ascii=False).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        """
+        Inicia el servidor y atiende peticiones hasta que se cancele.
+        """
+        # Procesos nuevos (spawn): copiar con fork un proceso con hilos (bucle de
+        # eventos, registro de gramáticas, vigilancia de archivos) puede bloquear el pool
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        server = await asyncio.start_server(self._serve_connection, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de validación de gramáticas.")
+    parser.add_argument("grammars", nargs="*", metavar="NOMBRE=RUTA",
+                        help="Gramáticas a registrar al iniciar (ej. palindromos=ejemplos/ejemplo4.grm).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (por defecto, uno por CPU).")
+    parser.add_argument("--watch", action="store_true",
+                        help="Recompila en segundo plano las gramáticas cuyos archivos cambian.")
+    args = parser.parse_args()
+
+    service = ValidationService(workers=args.workers)
+    for spec in args.grammars:
+        name, _, path = spec.partition("=")
+        if not path:
+            name, path = os.path.splitext(os.path.basename(spec))[0], spec
+        service.registry.load_file(name, path)
+    if args.watch:
+        service.registry.watch(on_error=lambda path, error: print(f"No se pudo recargar {path}: {error}"))
+    print(f"Escuchando en http://{args.host}:{args.port}")
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import unittest
+
+from automaton import compile_regular
+from grammar import Grammar
+from grammar_validator import GrammarValidator
+
+
+def kth_from_end(k):
+    """
+    Gramática regular de las cadenas sobre {a, b} cuyo símbolo k-ésimo desde el
+    final es a: su DFA tiene 2^k estados.
+    """
+    lines = ["type: 3", "start: S", "S -> a S | b S | a Q1"]
+    lines += [f"Q{i} -> a Q{i + 1} | b Q{i + 1}" for i in range(1, k)]
+    lines.append(f"Q{k} -> ε")
+    return Grammar.from_text("\n".join(lines))
+
+
+class CompileRegularTest(unittest.TestCase):
+
+    def test_small_dfa(self):
+        dfa = compile_regular(kth_from_end(3))
+        self.assertEqual(dfa.num_states, 8)
+        self.assertTrue(dfa.accepts("babb"))
+        self.assertFalse(dfa.accepts("bbab"))
+
+    def test_state_limit(self):
+        with self.assertRaises(ValueError):
+            compile_regular(kth_from_end(12), max_states=1000)
+
+    def test_validator_falls_back(self):
+        validator = GrammarValidator(kth_from_end(15))
+        self.assertNotEqual(validator.select_engine(20), "dfa")
+        self.assertTrue(validator.recognize("b" * 4 + "a" + "b" * 14))
+        self.assertFalse(validator.recognize("b" * 20))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from grammar import Grammar
+from grammar_validator import GrammarValidator
+
+
+class WeightAnnotationTest(unittest.TestCase):
+    """
+    Pesos entre corchetes al final de cada alternativa (ver Grammar.from_text).
+    """
+
+    def test_numeric_weights(self):
+        grammar = Grammar.from_text("type: 2\nstart: S\nS -> a S [2.5] | ε [0.5]")
+        self.assertEqual(grammar.productions["S"], [["a", "S"], ["ε"]])
+        self.assertEqual(grammar.weights["S"], [2.5, 0.5])
+
+    def test_brackets_as_symbols(self):
+        grammar = Grammar.from_text("type: 2\nstart: S\nS -> [ S ] | x")
+        self.assertEqual(grammar.productions["S"], [["[", "S", "]"], ["x"]])
+        self.assertFalse(grammar.weighted)
+        validator = GrammarValidator(grammar)
+        self.assertTrue(validator.recognize("[[x]]"))
+        self.assertFalse(validator.recognize("[x"))
+
+    def test_non_positive_weight(self):
+        with self.assertRaises(ValueError):
+            Grammar.from_text("type: 2\nstart: S\nS -> a [0] | b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+from grammar import EPSILON, Grammar
+
+
+# Identificador de los caracteres que no forman ningún terminal (ver `tokenize_spans`)
+UNKNOWN = -1
+
+
+class TokenizeError(ValueError):
+    """
+    Error de análisis léxico: la entrada no se puede dividir en terminales.
+    El atributo `position` indica el carácter donde falló la división.
+    """
+
+    def __init__(self, text, position):
+        self.text = text
+        self.position = position
+        super().__init__(f"No hay ningún terminal que coincida con la entrada en la posición {position}.")
+
+
+def terminal_alphabet(grammar: Grammar):
+    """
+    Retorna la lista ordenada de terminales de la gramática. El índice de cada
+    terminal en esta lista es su identificador de token para todos los motores.
+    """
+    return sorted(grammar.get_terminals())
+
+
+def character_grammar(grammar: Grammar):
+    """
+    Retorna una gramática equivalente en la que cada terminal de varios caracteres
+    se reemplaza por la secuencia de sus caracteres. Las producciones (y sus pesos)
+    quedan en el mismo orden, así que los identificadores de producción no cambian.
+    Una cadena pertenece a su lenguaje si alguna de sus divisiones en terminales
+    pertenece al de la original, que es lo que hace falta cuando la coincidencia más
+    larga no es la única división posible (ver Tokenizer.prefix_free).
+    Si todos los terminales tienen un carácter se retorna la misma gramática.
+
+    :raises ValueError: Si un carácter de algún terminal es también un no terminal.
+    """
+    terminals = grammar.get_terminals()
+    if all(len(sym) == 1 for sym in terminals):
+        return grammar
+    characters = set()
+    for sym in terminals:
+        for char in sym:
+            if grammar.is_nonterminal(char):
+                raise ValueError(f"El carácter '{char}' del terminal '{sym}' es también un no terminal.")
+            characters.add(char)
+    productions = {left: [[char for sym in prod
+                           for char in (sym if sym in terminals and sym != EPSILON else (sym,))]
+                          for prod in prods]
+                   for left, prods in grammar.productions.items()}
+    weights = {left: list(values) for left, values in grammar.weights.items()}
+    result = Grammar(set(grammar.nonterminals), characters, grammar.start, productions, weights)
+    result.type = grammar.type
+    return result
+
+
+class Tokenizer:
+    """
+    Analizador léxico compilado a partir del conjunto de terminales.
+    Convierte la entrada en una lista de identificadores de terminal con la regla
+    de coincidencia más larga (maximal munch) sobre un trie, de modo que cada
+    carácter se procesa con una sola consulta a un diccionario.
+
+    La coincidencia más larga solo da la única división posible si ningún terminal
+    es prefijo de otro (`prefix_free`); si no (por ejemplo a, ab y b en
+    ejemplos/1.4, donde "babab" solo se divide como b a b ab) hay que analizar la
+    gramática carácter a carácter (ver `character_grammar`).
+    """
+
+    def __init__(self, symbols):
+        """
+        :param symbols: Lista de terminales; el identificador de cada uno es su índice.
+        """
+        self.symbols = list(symbols)
+        self.single_char = all(len(sym) == 1 for sym in self.symbols)
+        self.char_ids = {sym: i for i, sym in enumerate(self.symbols) if len(sym) == 1}
+
+        # Trie: lista de estados, cada uno con sus transiciones por carácter
+        self.trie = [{}]
+        self.accept = [-1]  # identificador del terminal que termina en cada estado
+        for token_id, sym in enumerate(self.symbols):
+            state = 0
+            for char in sym:
+                nxt = self.trie[state].get(char)
+                if nxt is None:
+                    nxt = len(self.trie)
+                    self.trie[state][char] = nxt
+                    self.trie.append({})
+                    self.accept.append(-1)
+                state = nxt
+            self.accept[state] = token_id
+        # Ningún estado que termina un terminal continúa en otro más largo
+        self.prefix_free = all(self.accept[state] < 0 or not self.trie[state] for state in range(len(self.trie)))
+
+    @staticmethod
+    def from_grammar(grammar: Grammar):
+        """
+        Construye el analizador léxico con los terminales de la gramática.
+        """
+        return Tokenizer(terminal_alphabet(grammar))
+
+    def tokenize(self, text):
+        """
+        Divide la entrada en terminales y retorna la lista de sus identificadores.
+
+        :raises TokenizeError: Si en alguna posición ningún terminal coincide.
+        """
+        if self.single_char:
+            ids = self.char_ids
+            try:
+                return [ids[char] for char in text]
+            except KeyError:
+                position = next(i for i, char in enumerate(text) if char not in ids)
+                raise TokenizeError(text, position) from None
+
+        trie, accept = self.trie, self.accept
+        result = []
+        position = 0
+        length = len(text)
+        while position < length:
+            state = 0
+            best, best_end = -1, position
+            cursor = position
+            while cursor < length:
+                state = trie[state].get(text[cursor])
+                if state is None:
+                    break
+                cursor += 1
+                if accept[state] >= 0:
+                    best, best_end = accept[state], cursor
+            if best < 0:
+                raise TokenizeError(text, position)
+            result.append(best)
+            position = best_end
+        return result
+
+    def tokenize_spans(self, text):
+        """
+        Variante tolerante de `tokenize` para diagnósticos: nunca falla. Cada carácter
+        que no inicia ningún terminal se convierte en un token desconocido (UNKNOWN).
+
+        :return: Tupla (ids, starts) donde starts[i] es la posición en `text` donde
+                 empieza el token i; starts tiene además la longitud del texto al final.
+        """
+        trie, accept = self.trie, self.accept
+        ids, starts = [], []
+        position = 0
+        length = len(text)
+        while position < length:
+            state = 0
+            best, best_end = UNKNOWN, position + 1
+            cursor = position
+            while cursor < length:
+                state = trie[state].get(text[cursor])
+                if state is None:
+                    break
+                cursor += 1
+                if accept[state] >= 0:
+                    best, best_end = accept[state], cursor
+            ids.append(best)
+            starts.append(position)
+            position = best_end
+        starts.append(length)
+        return ids, starts
+
+    def to_symbols(self, ids):
+        """
+        Convierte una lista de identificadores en la lista de terminales.
+        """
+        return [self.symbols[i] for i in ids]
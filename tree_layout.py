@@ -0,0 +1,198 @@
+from grammar import EPSILON
+
+# Escalas de zoom disponibles en el visor por mosaicos
+ZOOM_LEVELS = (0.125, 0.25, 0.5, 1.0, 2.0)
+
+# Dimensiones (en unidades de mundo, a escala 1) de cada nodo y de la separación entre ellos
+NODE_WIDTH = 60
+NODE_HEIGHT = 28
+SLOT_WIDTH = 72
+LEVEL_HEIGHT = 70
+
+
+class FlatTree:
+    """
+    Árbol de derivación aplanado en arreglos paralelos indexados por nodo
+    (el nodo 0 es la raíz). Se construye de forma iterativa, así que admite
+    árboles más profundos que el límite de recursión.
+    """
+
+    def __init__(self, tree_data, grammar):
+        """
+        :param tree_data: Diccionario con la estructura del árbol ("symbol", "children", "terminal").
+        :param grammar: Instancia de Grammar para distinguir terminales y no terminales.
+        """
+        self.symbols = []
+        self.kinds = []      # "nonterminal", "terminal" o "epsilon"
+        self.children = []
+        self.depth = []
+
+        stack = [(tree_data, -1, 0)]
+        while stack:
+            node, parent, depth = stack.pop()
+            index = len(self.symbols)
+            symbol = node["symbol"]
+            self.symbols.append(symbol)
+            if symbol == EPSILON:
+                self.kinds.append("epsilon")
+            elif node.get("terminal") or not grammar.is_nonterminal(symbol):
+                self.kinds.append("terminal")
+            else:
+                self.kinds.append("nonterminal")
+            self.children.append([])
+            self.depth.append(depth)
+            if parent >= 0:
+                self.children[parent].append(index)
+            for child in reversed(node.get("children") or []):
+                stack.append((child, index, depth + 1))
+
+        # Tamaño de cada subárbol: los hijos siempre tienen índice mayor que su padre
+        self.sizes = [1] * len(self.symbols)
+        for index in range(len(self.symbols) - 1, -1, -1):
+            for child in self.children[index]:
+                self.sizes[index] += self.sizes[child]
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def initial_expansion(self, budget):
+        """
+        Elige qué nodos se muestran expandidos al abrir el árbol: se recorre en
+        anchura desde la raíz mientras la cantidad de nodos visibles no supere
+        `budget`. Los subárboles que quedan fuera se muestran como nodos resumen.
+
+        :return: Conjunto de índices de nodos expandidos.
+        """
+        expanded = set()
+        visible = 1
+        frontier = [0] if self.children and self.children[0] else []
+        while frontier:
+            next_frontier = []
+            for index in frontier:
+                if visible + len(self.children[index]) > budget:
+                    return expanded
+                expanded.add(index)
+                visible += len(self.children[index])
+                next_frontier.extend(c for c in self.children[index] if self.children[c])
+            frontier = next_frontier
+        return expanded
+
+
+class TreeLayout:
+    """
+    Disposición ordenada de la parte visible de un FlatTree: las hojas visibles
+    ocupan posiciones consecutivas y cada padre se centra sobre sus hijos.
+    Los nodos no expandidos con hijos son nodos resumen que ocultan su subárbol.
+
+    Para cada escala de ZOOM_LEVELS se construye (a demanda) un índice de mosaicos
+    de `tile_size` píxeles, de modo que el visor solo dibuja lo que está a la vista.
+    """
+
+    def __init__(self, flat, expanded, horizontal=False, tile_size=512):
+        """
+        :param flat: FlatTree a disponer.
+        :param expanded: Conjunto de nodos expandidos (ver FlatTree.initial_expansion).
+        :param horizontal: Si es True, la raíz queda a la izquierda (gramáticas regulares).
+        :param tile_size: Lado de cada mosaico en píxeles de pantalla.
+        """
+        self.flat = flat
+        self.expanded = expanded
+        self.horizontal = horizontal
+        self.tile_size = tile_size
+        self.visible = []     # nodos visibles en preorden
+        self.positions = {}   # nodo -> (x, y) del centro en unidades de mundo
+        self.edges = []       # (padre, hijo)
+        self._tiles = {}      # escala -> {(tx, ty): ([nodos], [aristas])}
+        self._compute()
+
+    def is_summary(self, index):
+        """
+        Indica si el nodo se dibuja como resumen de un subárbol oculto.
+        """
+        return bool(self.flat.children[index]) and index not in self.expanded
+
+    def label(self, index):
+        """
+        Texto del nodo; los resúmenes muestran cuántos nodos ocultan.
+        """
+        symbol = self.flat.symbols[index]
+        if self.is_summary(index):
+            return f"{symbol} (+{self.flat.sizes[index] - 1})"
+        return symbol
+
+    def _compute(self):
+        flat = self.flat
+        if not len(flat):
+            self.width = self.height = 0
+            return
+        slot = 0
+        x_slot = {}
+        # Postorden iterativo: las hojas visibles reciben posiciones consecutivas
+        stack = [(0, False)]
+        while stack:
+            index, done = stack.pop()
+            shown = flat.children[index] if index in self.expanded else []
+            if done:
+                x_slot[index] = (x_slot[shown[0]] + x_slot[shown[-1]]) / 2
+                continue
+            self.visible.append(index)
+            if not shown:
+                x_slot[index] = slot
+                slot += 1
+                continue
+            stack.append((index, True))
+            for child in reversed(shown):
+                self.edges.append((index, child))
+                stack.append((child, False))
+
+        max_depth = 0
+        for index in self.visible:
+            along = x_slot[index] * SLOT_WIDTH + SLOT_WIDTH / 2
+            across = flat.depth[index] * LEVEL_HEIGHT + LEVEL_HEIGHT / 2
+            max_depth = max(max_depth, flat.depth[index])
+            self.positions[index] = (across, along) if self.horizontal else (along, across)
+        extent_along = slot * SLOT_WIDTH
+        extent_across = (max_depth + 1) * LEVEL_HEIGHT
+        if self.horizontal:
+            self.width, self.height = extent_across, extent_along
+        else:
+            self.width, self.height = extent_along, extent_across
+
+    def tiles(self, scale):
+        """
+        Retorna el índice de mosaicos para una escala: (tx, ty) -> (nodos, aristas)
+        que se dibujan (aunque sea en parte) dentro de ese mosaico.
+        """
+        index = self._tiles.get(scale)
+        if index is not None:
+            return index
+        index = {}
+        size = self.tile_size
+        half_w, half_h = NODE_WIDTH / 2, NODE_HEIGHT / 2
+        for node in self.visible:
+            x, y = self.positions[node]
+            for tx in range(int((x - half_w) * scale // size), int((x + half_w) * scale // size) + 1):
+                for ty in range(int((y - half_h) * scale // size), int((y + half_h) * scale // size) + 1):
+                    index.setdefault((tx, ty), ([], []))[0].append(node)
+        for edge in self.edges:
+            (x1, y1), (x2, y2) = self.positions[edge[0]], self.positions[edge[1]]
+            # Se registra en todos los mosaicos de su caja envolvente
+            for tx in range(int(min(x1, x2) * scale // size), int(max(x1, x2) * scale // size) + 1):
+                for ty in range(int(min(y1, y2) * scale // size), int(max(y1, y2) * scale // size) + 1):
+                    index.setdefault((tx, ty), ([], []))[1].append(edge)
+        self._tiles[scale] = index
+        return index
+
+    def node_at(self, x, y):
+        """
+        Retorna el nodo visible que contiene el punto (x, y) en unidades de mundo, o None.
+        """
+        scale = 1.0
+        bucket = self.tiles(scale).get((int(x // self.tile_size), int(y // self.tile_size)))
+        if bucket is None:
+            return None
+        for node in bucket[0]:
+            nx, ny = self.positions[node]
+            if abs(nx - x) <= NODE_WIDTH / 2 and abs(ny - y) <= NODE_HEIGHT / 2:
+                return node
+        return None
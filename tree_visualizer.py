@@ -1,51 +1,254 @@
-import graphviz
-import tempfile
+import hashlib
 import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
 from tkinter import messagebox
-from PIL import Image, ImageTk
+
+from tree_layout import (FlatTree, TreeLayout, ZOOM_LEVELS, NODE_WIDTH, NODE_HEIGHT)
+
+# Colores de cada tipo de nodo (los mismos que usa el renderizado con Graphviz)
+NODE_COLORS = {
+    "nonterminal": ("#4a6ea9", "white"),
+    "terminal": ("#f0a500", "white"),
+    "epsilon": ("#90ee90", "black"),
+    "summary": ("#8a8a8a", "white"),
+}
+
+
+def tree_key(tree_data, grammar, options):
+    """
+    Calcula un hash estructural del árbol: dos árboles con los mismos símbolos,
+    marcas de terminal y forma producen la misma clave. También entran en la clave
+    los no terminales declarados (deciden el color de cada nodo) y las opciones de
+    renderizado.
+
+    :param tree_data: Diccionario con la estructura del árbol.
+    :param grammar: Instancia de Grammar.
+    :param options: Tupla con las opciones de renderizado (formato, motor, orientación...).
+    :return: Cadena hexadecimal con la clave.
+    """
+    digest = hashlib.sha1()
+    digest.update(repr((options, sorted(grammar.nonterminals))).encode("utf-8"))
+    # Recorrido en preorden iterativo (los árboles grandes superan el límite de recursión)
+    stack = [tree_data]
+    while stack:
+        node = stack.pop()
+        children = node.get("children") or []
+        digest.update(repr((node["symbol"], bool(node.get("terminal")), len(children))).encode("utf-8"))
+        stack.extend(reversed(children))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Caché LRU de árboles ya renderizados: clave estructural -> ruta de la imagen.
+    Las imágenes viven en un directorio temporal propio de la caché y se borran al
+    ser desalojadas. Es segura para usar desde varios hilos.
+    """
+
+    def __init__(self, max_entries=32):
+        """
+        :param max_entries: Cantidad máxima de imágenes que se conservan.
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.directory = None
+        self._lock = threading.Lock()
+
+    def new_path(self, suffix=".gv"):
+        """
+        Reserva un nombre de archivo único dentro del directorio de la caché,
+        de modo que dos renderizados nunca escriben sobre el mismo archivo.
+        """
+        with self._lock:
+            if self.directory is None or not os.path.isdir(self.directory):
+                self.directory = tempfile.mkdtemp(prefix="derivation_trees_")
+            directory = self.directory
+        fd, path = tempfile.mkstemp(prefix="tree_", suffix=suffix, dir=directory)
+        os.close(fd)
+        return path
+
+    def get(self, key):
+        """
+        Retorna la ruta de la imagen guardada con esa clave, o None.
+        """
+        with self._lock:
+            path = self.entries.get(key)
+            if path is None:
+                return None
+            if not os.path.exists(path):
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return path
+
+    def put(self, key, path):
+        """
+        Guarda la imagen con esa clave y desaloja las menos usadas recientemente.
+        """
+        removed = []
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None and previous != path:
+                removed.append(previous)
+            self.entries[key] = path
+            while len(self.entries) > self.max_entries:
+                _, old_path = self.entries.popitem(last=False)
+                removed.append(old_path)
+        for old_path in removed:
+            _remove_file(old_path)
+
+    def clear(self):
+        """
+        Vacía la caché y borra su directorio temporal.
+        """
+        with self._lock:
+            self.entries.clear()
+            directory, self.directory = self.directory, None
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 
 class TreeVisualizer:
     """
     Clase para visualizar árboles de derivación usando Graphviz.
     """
-    def __init__(self, canvas):
+    def __init__(self, canvas, cache=None):
         """
         Inicializa el visualizador con el canvas donde se mostrará el árbol.
         
         :param canvas: Canvas de Tkinter donde se mostrará el árbol.
+        :param cache: RenderCache compartida; por defecto cada visualizador tiene la suya.
         """
         self.canvas = canvas
         self.graph = None
         self.image = None
         self.image_tk = None
-        self.temp_files = []
+        self.cache = cache if cache is not None else RenderCache()
+        self.zoom_index = ZOOM_LEVELS.index(1.0)
+        self.tiled = None  # TiledTreeView activo para árboles grandes
+
+        # Árboles con más nodos que este umbral se muestran con el visor por mosaicos
+        self.lod_threshold = 400
+        # Cantidad de nodos visibles al abrir un árbol grande (el resto queda resumido)
+        self.collapse_budget = 2000
         
-        # Configurar eventos para zoom con rueda del ratón
+        # Configurar eventos para scroll (y zoom con Control) con rueda del ratón
         self.canvas.bind("<MouseWheel>", self._on_mousewheel)  # Windows
         self.canvas.bind("<Button-4>", self._on_mousewheel)    # Linux scroll up
         self.canvas.bind("<Button-5>", self._on_mousewheel)    # Linux scroll down
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Configure>", self._on_view_change)
+        self._wrap_scrollcommands()
     
+    def _wrap_scrollcommands(self):
+        """
+        Intercepta los avisos de desplazamiento del canvas a sus barras de scroll,
+        para que el visor por mosaicos cargue los mosaicos que entran a la vista.
+        """
+        for option in ("xscrollcommand", "yscrollcommand"):
+            original = self.canvas.tk.splitlist(self.canvas.cget(option))
+
+            def notify(first, last, original=original):
+                if original:
+                    self.canvas.tk.call(*original, first, last)
+                self._on_view_change()
+
+            self.canvas.configure(**{option: notify})
+
+    def _on_view_change(self, event=None):
+        if self.tiled is not None:
+            self.tiled.schedule_refresh()
+
     def _on_mousewheel(self, event):
         """
-        Maneja el evento de la rueda del ratón para hacer scroll vertical.
+        Maneja el evento de la rueda del ratón: scroll vertical, o zoom si se
+        mantiene presionada la tecla Control.
         """
-        if event.num == 4 or event.delta > 0:
+        up = event.num == 4 or event.delta > 0
+        down = event.num == 5 or event.delta < 0
+        if event.state & 0x4:
+            if up or down:
+                self.zoom(1 if up else -1, event.x, event.y)
+        elif up:
             # Scroll hacia arriba
             self.canvas.yview_scroll(-1, "units")
-        elif event.num == 5 or event.delta < 0:
+        elif down:
             # Scroll hacia abajo
             self.canvas.yview_scroll(1, "units")
-    
+
+    def _on_click(self, event):
+        """
+        En el visor por mosaicos, un clic sobre un nodo resumen lo expande y un
+        clic sobre un nodo expandido lo vuelve a resumir.
+        """
+        if self.tiled is not None:
+            self.tiled.toggle_at(event.x, event.y)
+
+    def zoom(self, step, x=0, y=0):
+        """
+        Cambia al nivel de zoom siguiente (step > 0) o anterior (step < 0) de
+        ZOOM_LEVELS, manteniendo fijo el punto (x, y) de la ventana.
+        """
+        index = min(max(self.zoom_index + step, 0), len(ZOOM_LEVELS) - 1)
+        if index == self.zoom_index:
+            return
+        old_scale, self.zoom_index = ZOOM_LEVELS[self.zoom_index], index
+        if self.tiled is not None:
+            self.tiled.set_scale(ZOOM_LEVELS[index], x, y)
+        elif self.image is not None:
+            world_x = self.canvas.canvasx(x) / old_scale
+            world_y = self.canvas.canvasy(y) / old_scale
+            self._show_scaled_image()
+            _scroll_to(self.canvas, world_x * ZOOM_LEVELS[index] - x, world_y * ZOOM_LEVELS[index] - y)
+
     def create_tree(self, tree_data, grammar):
         """
         Crea un árbol de derivación usando Graphviz.
         Versión mejorada para manejar mejor las gramáticas tipo 3.
+        Los árboles con más de `lod_threshold` nodos no pasan por Graphviz: se
+        muestran con el visor por mosaicos con niveles de detalle (TiledTreeView).
         
         :param tree_data: Diccionario con la estructura del árbol.
         :param grammar: Instancia de Grammar para distinguir terminales y no terminales.
         :return: True si el árbol se creó correctamente, False en caso contrario.
         """
+        self.tiled = None
+        self.image = None
+        self.zoom_index = ZOOM_LEVELS.index(1.0)
+        flat = FlatTree(tree_data, grammar)
+        if len(flat) > self.lod_threshold:
+            expanded = flat.initial_expansion(self.collapse_budget)
+            self.tiled = TiledTreeView(self.canvas, flat, expanded, horizontal=grammar.type == 3,
+                                       scale=ZOOM_LEVELS[self.zoom_index])
+            self.tiled.show()
+            return True
+
+        # Atributos del grafo según el tipo de gramática
+        if grammar.type == 3:  # Gramática regular
+            options = ('png', 'dot', 'LR')
+        else:  # Gramática tipo 2 (CFG)
+            options = ('png', 'dot', 'TB')
+        key = tree_key(tree_data, grammar, options)
+
+        # Un árbol con la misma estructura ya renderizado se muestra sin llamar a Graphviz
+        img_path = self.cache.get(key)
+        if img_path is not None:
+            self.display_image(img_path)
+            return True
+
         try:
+            import graphviz  # Graphviz solo se carga cuando se dibuja un árbol
+
             # Verificar si Graphviz está instalado
             try:
                 os.environ["PATH"] = r'C:\Program Files\Graphviz\bin' + os.pathsep + os.environ["PATH"]
@@ -54,30 +257,24 @@ class TreeVisualizer:
                 pass
             
             # Crear un nuevo grafo dirigido
-            self.graph = graphviz.Digraph(format='png', engine='dot')
-            
-            # Configurar atributos del grafo según el tipo de gramática
-            if grammar.type == 3:  # Gramática regular
-                self.graph.attr(rankdir='LR', nodesep='0.3', ranksep='0.5', fontname='Arial')
-            else:  # Gramática tipo 2 (CFG)
-                self.graph.attr(rankdir='TB', nodesep='0.3', ranksep='0.5', fontname='Arial')
+            fmt, engine, rankdir = options
+            self.graph = graphviz.Digraph(format=fmt, engine=engine)
+            self.graph.attr(rankdir=rankdir, nodesep='0.3', ranksep='0.5', fontname='Arial')
             
             # Generar el árbol recursivamente
-            self._add_node(tree_data, None, grammar)
+            self._add_node(tree_data, None, grammar, [0])
             
-            # Crear un archivo temporal para la imagen
-            temp_dir = tempfile.gettempdir()
-            img_path = os.path.join(temp_dir, 'derivation_tree.png')
-            self.temp_files.append(img_path)
-            
-            # Renderizar y verificar que la imagen existe
-            self.graph.render(filename='derivation_tree', directory=temp_dir, cleanup=True, view=False)
+            # Cada renderizado usa su propio archivo temporal: renderizados repetidos o
+            # concurrentes nunca se pisan
+            source_path = self.cache.new_path()
+            img_path = self.graph.render(filename=source_path, cleanup=True, view=False)
             
             # Verificar que se creó la imagen
-            render_path = os.path.join(temp_dir, 'derivation_tree.png')
-            if not os.path.exists(render_path) or os.path.getsize(render_path) == 0:
+            if not os.path.exists(img_path) or os.path.getsize(img_path) == 0:
+                _remove_file(img_path)
                 messagebox.showerror("Error", "La imagen del árbol no se generó correctamente")
                 return False
+            self.cache.put(key, img_path)
             
             # Cargar la imagen en el canvas
             self.display_image(img_path)
@@ -86,7 +283,7 @@ class TreeVisualizer:
             messagebox.showerror("Error", f"Error al crear el árbol: {str(e)}")
             return False
     
-    def _add_node(self, node_data, parent_id, grammar, node_counter=[0]):
+    def _add_node(self, node_data, parent_id, grammar, node_counter):
         """
         Añade un nodo al grafo de forma recursiva.
         Versión mejorada para manejar mejor los nodos terminales y no terminales.
@@ -141,13 +338,28 @@ class TreeVisualizer:
         
         :param img_path: Ruta al archivo de imagen.
         """
+        from PIL import Image  # Pillow solo se carga al mostrar la imagen
+
+        # Cargar la imagen
+        self.image = Image.open(img_path)
+        self.image.load()
+        self._show_scaled_image()
+
+    def _show_scaled_image(self):
+        """
+        Muestra la imagen cargada con el nivel de zoom actual.
+        """
+        from PIL import Image, ImageTk
+
         # Limpiar el canvas
         self.canvas.delete("all")
-        
-        # Cargar la imagen
-        pil_image = Image.open(img_path)
-        
-        # Mantener el tamaño original para mejor claridad
+
+        # A escala 1 se mantiene el tamaño original para mejor claridad
+        scale = ZOOM_LEVELS[self.zoom_index]
+        pil_image = self.image
+        if scale != 1.0:
+            size = (max(1, int(pil_image.width * scale)), max(1, int(pil_image.height * scale)))
+            pil_image = pil_image.resize(size, Image.LANCZOS)
         new_width = pil_image.width
         new_height = pil_image.height
         
@@ -158,19 +370,177 @@ class TreeVisualizer:
         self.canvas.config(scrollregion=(0, 0, new_width, new_height))
         
         # Mostrar la imagen en el canvas desde la esquina superior izquierda
-        img_item = self.canvas.create_image(
+        self.canvas.create_image(
             0, 0,
             image=self.image_tk, anchor='nw'
         )
     
     def cleanup(self):
         """
-        Limpia los archivos temporales generados.
+        Limpia los archivos temporales generados (las imágenes de la caché).
         """
-        for file_path in self.temp_files:
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception:
-                pass
-        self.temp_files = []
\ No newline at end of file
+        self.cache.clear()
+
+def _scroll_to(canvas, left, top):
+    """
+    Desplaza el canvas para que el punto (left, top) de su área de scroll quede
+    en la esquina superior izquierda de la ventana.
+    """
+    x0, y0, x1, y1 = (float(v) for v in canvas.tk.splitlist(canvas.cget("scrollregion")))
+    if x1 > x0:
+        canvas.xview_moveto(max(0.0, left - x0) / (x1 - x0))
+    if y1 > y0:
+        canvas.yview_moveto(max(0.0, top - y0) / (y1 - y0))
+
+
+class TiledTreeView:
+    """
+    Visor con niveles de detalle para árboles de derivación grandes.
+
+    El árbol se dispone una sola vez (TreeLayout) y el área de scroll se divide en
+    mosaicos cuadrados; solo se crean ítems del canvas para los mosaicos visibles
+    (más un margen) y se destruyen los que salen de la vista, de modo que el costo
+    de dibujar no depende del tamaño total del árbol. A escalas pequeñas se omiten
+    las etiquetas. Los subárboles que exceden el presupuesto de nodos visibles se
+    muestran como nodos resumen que se expanden con un clic.
+    """
+
+    def __init__(self, canvas, flat, expanded, horizontal=False, scale=1.0, margin=1):
+        """
+        :param canvas: Canvas de Tkinter donde se dibuja.
+        :param flat: FlatTree con el árbol completo.
+        :param expanded: Conjunto inicial de nodos expandidos.
+        :param horizontal: Si es True, la raíz queda a la izquierda.
+        :param scale: Escala inicial (una de ZOOM_LEVELS).
+        :param margin: Mosaicos adicionales que se mantienen cargados alrededor de la vista.
+        """
+        self.canvas = canvas
+        self.flat = flat
+        self.horizontal = horizontal
+        self.scale = scale
+        self.margin = margin
+        self.layout = TreeLayout(flat, expanded, horizontal)
+        self.loaded = set()       # mosaicos cargados
+        self.drawn_nodes = {}     # nodo -> mosaico con el que se dibujó
+        self.drawn_edges = {}
+        self._pending = False
+
+    def show(self):
+        """
+        Dibuja el árbol desde cero con la escala actual.
+        """
+        self.canvas.delete("all")
+        self.loaded.clear()
+        self.drawn_nodes.clear()
+        self.drawn_edges.clear()
+        self.canvas.config(scrollregion=(0, 0, max(1, self.layout.width * self.scale),
+                                         max(1, self.layout.height * self.scale)))
+        self.refresh()
+
+    def schedule_refresh(self):
+        """
+        Agrupa los avisos de desplazamiento en una sola actualización.
+        """
+        if not self._pending:
+            self._pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def _visible_tiles(self):
+        size = self.layout.tile_size
+        left, top = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        right = self.canvas.canvasx(self.canvas.winfo_width())
+        bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        return (int(left // size) - self.margin, int(right // size) + self.margin,
+                int(top // size) - self.margin, int(bottom // size) + self.margin)
+
+    def refresh(self):
+        """
+        Carga los mosaicos que entraron a la vista y descarga los que salieron.
+        """
+        self._pending = False
+        tx0, tx1, ty0, ty1 = self._visible_tiles()
+        for tile in [t for t in self.loaded if not (tx0 <= t[0] <= tx1 and ty0 <= t[1] <= ty1)]:
+            self.loaded.discard(tile)
+            self.canvas.delete(_tile_tag(tile))
+            for drawn in (self.drawn_nodes, self.drawn_edges):
+                for item in [k for k, v in drawn.items() if v == tile]:
+                    del drawn[item]
+
+        tiles = self.layout.tiles(self.scale)
+        for tx in range(tx0, tx1 + 1):
+            for ty in range(ty0, ty1 + 1):
+                tile = (tx, ty)
+                bucket = tiles.get(tile)
+                self.loaded.add(tile)
+                if bucket is None:
+                    continue
+                # Un nodo o arista que cruza varios mosaicos se dibuja una sola vez
+                # (y se vuelve a dibujar si se descarga el mosaico con el que se creó)
+                for edge in bucket[1]:
+                    if edge not in self.drawn_edges:
+                        self.drawn_edges[edge] = tile
+                        self._draw_edge(edge, tile)
+                for node in bucket[0]:
+                    if node not in self.drawn_nodes:
+                        self.drawn_nodes[node] = tile
+                        self._draw_node(node, tile)
+        self.canvas.tag_raise("node")
+
+    def _draw_edge(self, edge, tile):
+        (x1, y1), (x2, y2) = self.layout.positions[edge[0]], self.layout.positions[edge[1]]
+        s = self.scale
+        self.canvas.create_line(x1 * s, y1 * s, x2 * s, y2 * s, fill="#555555",
+                                tags=("edge", _tile_tag(tile)))
+
+    def _draw_node(self, node, tile):
+        x, y = self.layout.positions[node]
+        s = self.scale
+        x, y = x * s, y * s
+        w, h = NODE_WIDTH * s / 2, NODE_HEIGHT * s / 2
+        kind = "summary" if self.layout.is_summary(node) else self.flat.kinds[node]
+        fill, text_color = NODE_COLORS[kind]
+        tags = ("node", _tile_tag(tile))
+        if kind == "nonterminal":
+            self.canvas.create_oval(x - w, y - h, x + w, y + h, fill=fill, outline="", tags=tags)
+        else:
+            self.canvas.create_rectangle(x - w, y - h, x + w, y + h, fill=fill, outline="", tags=tags)
+        # Nivel de detalle: las etiquetas solo se dibujan cuando son legibles
+        if s >= 0.5:
+            self.canvas.create_text(x, y, text=self.layout.label(node), fill=text_color,
+                                    font=("Arial", max(6, int(9 * s))), tags=tags)
+
+    def set_scale(self, scale, x=0, y=0):
+        """
+        Cambia la escala manteniendo fijo el punto (x, y) de la ventana.
+        """
+        world_x = self.canvas.canvasx(x) / self.scale
+        world_y = self.canvas.canvasy(y) / self.scale
+        self.scale = scale
+        self.show()
+        _scroll_to(self.canvas, world_x * scale - x, world_y * scale - y)
+        self.refresh()
+
+    def toggle_at(self, x, y):
+        """
+        Expande o resume el nodo bajo el punto (x, y) de la ventana.
+        """
+        world_x = self.canvas.canvasx(x) / self.scale
+        world_y = self.canvas.canvasy(y) / self.scale
+        node = self.layout.node_at(world_x, world_y)
+        if node is None or not self.flat.children[node]:
+            return
+        expanded = set(self.layout.expanded)
+        if node in expanded:
+            expanded.discard(node)
+        else:
+            expanded.add(node)
+        self.layout = TreeLayout(self.flat, expanded, self.horizontal, self.layout.tile_size)
+        # Se mantiene el nodo bajo el puntero tras recalcular la disposición
+        new_x, new_y = self.layout.positions[node]
+        self.show()
+        _scroll_to(self.canvas, new_x * self.scale - x, new_y * self.scale - y)
+        self.refresh()
+
+
+def _tile_tag(tile):
+    return f"tile_{tile[0]}_{tile[1]}"
@@ -0,0 +1,250 @@
+from grammar import Grammar
+from cnf import to_cnf
+from tokenizer import terminal_alphabet
+from lazy_imports import optional_import
+
+# NumPy es obligatorio para este reconocedor, pero opcional para el resto: el módulo
+# solo se importa cuando se usa el reconocedor (ver GrammarValidator._get_engine)
+np = optional_import("numpy")
+
+# Memoria máxima (en bytes) de las tablas de una entrada. Las tablas T y P ocupan
+# (no terminales + pares) x m x m booleanos, con m la potencia de 2 mayor que la
+# longitud: con la gramática densa de benchmark.py, n = 8192 ya supera 1,3 GiB
+MAX_TABLE_BYTES = 1024 * 1024 * 1024
+
+
+class ValiantRecognizer:
+    """
+    Reconocedor de gramáticas libres de contexto por multiplicación de matrices
+    booleanas, en el estilo del algoritmo de Valiant (versión simplificada de Okhotin).
+
+    La tabla T[A, i, j] indica si A deriva la subcadena entre las posiciones i y j.
+    Para cada par (B, C) con alguna regla A -> B C se mantiene una matriz auxiliar
+    P[(B, C), i, j] con las contribuciones ya conocidas. El cálculo divide la tabla
+    recursivamente en submatrices y acumula en P productos de matrices (hechos con
+    BLAS sobre float32); los bloques pequeños (hojas) se completan por frentes de
+    onda vectorizados.
+    """
+
+    def __init__(self, grammar: Grammar, leaf_size=256, max_bytes=MAX_TABLE_BYTES):
+        """
+        :param grammar: Instancia de Grammar; se convierte a CNF al construir el reconocedor.
+        :param leaf_size: Tamaño de bloque por debajo del cual no se sigue dividiendo.
+        :param max_bytes: Memoria máxima de las tablas de una entrada (ver `table_bytes`);
+                          None no pone límite.
+        :raises ImportError: Si NumPy no está instalado.
+        """
+        if np is None:
+            raise ImportError("El reconocedor por multiplicación de matrices requiere NumPy.")
+        self.cnf = to_cnf(grammar)
+        self.leaf_size = leaf_size
+        self.max_bytes = max_bytes
+        # No terminales A con A -> t, por identificador de token (ver tokenizer.py)
+        self.id_rules = [self.cnf.terminal_rules.get(sym, []) for sym in terminal_alphabet(grammar)]
+        pairs = {}
+        for a, b, c in self.cnf.binary_rules:
+            pairs.setdefault((b, c), []).append(a)
+        self.pairs = list(pairs.items())
+        # Versión en arreglos de los pares: B y C de cada par y la incidencia A x par
+        produces = np.zeros((self.cnf.num_nonterminals, len(self.pairs)), dtype=np.float32)
+        for p, (_, lefts) in enumerate(self.pairs):
+            produces[lefts, p] = 1
+        self._pair_arrays = (np.array([b for (b, _), _ in self.pairs], dtype=np.intp),
+                             np.array([c for (_, c), _ in self.pairs], dtype=np.intp),
+                             produces)
+
+    def table_bytes(self, length):
+        """
+        Memoria (en bytes) que ocupan las tablas para una entrada de `length`
+        terminales: T y P (un byte por celda) y los tres bloques float32 de m/2 x m/2
+        que usa cada producto del nivel superior.
+        """
+        size = 1
+        while size < length + 1:
+            size *= 2
+        return (self.cnf.num_nonterminals + len(self.pairs) + 3) * size * size
+
+    def fits(self, length):
+        """
+        Indica si una entrada de `length` terminales entra en `max_bytes`.
+        """
+        return self.max_bytes is None or self.table_bytes(length) <= self.max_bytes
+
+    def recognize(self, tokens):
+        """
+        Indica si la secuencia de terminales pertenece al lenguaje.
+        Una cadena de Python se trata carácter a carácter.
+        """
+        rules = self.cnf.terminal_rules
+        return self._recognize_rules([rules.get(tok, []) for tok in tokens])
+
+    def recognize_ids(self, ids):
+        """
+        Igual que `recognize`, pero recibe identificadores de token (ver tokenizer.py).
+        """
+        return self._recognize_rules([self.id_rules[i] for i in ids])
+
+    def _recognize_rules(self, lefts):
+        """
+        Reconoce la entrada dada, para cada posición, como la lista de no terminales
+        que derivan el terminal de esa posición.
+
+        :raises ValueError: Si las tablas de la entrada superan `max_bytes`.
+        """
+        n = len(lefts)
+        if n == 0:
+            return self.cnf.accepts_empty
+        if not all(lefts):
+            return False
+        if not self.fits(n):
+            raise ValueError(f"Las tablas de matrices para {n} terminales ocuparían "
+                             f"{self.table_bytes(n) // (1024 * 1024)} MiB (límite: "
+                             f"{self.max_bytes // (1024 * 1024)} MiB).")
+
+        size = 1
+        while size < n + 1:
+            size *= 2
+        self.T = np.zeros((self.cnf.num_nonterminals, size, size), dtype=bool)
+        self.P = np.zeros((len(self.pairs), size, size), dtype=bool)
+        for i, position_lefts in enumerate(lefts):
+            self.T[position_lefts, i, i + 1] = True
+
+        try:
+            self._compute(0, size)
+            return bool(self.T[self.cnf.start, 0, n])
+        finally:
+            self.T = self.P = None
+
+    def _compute(self, l, m):
+        """
+        Calcula todas las celdas del bloque diagonal [l, m) x [l, m).
+        """
+        if m - l <= self.leaf_size:
+            self._compute_leaf(l, m)
+            return
+        if m - l >= 4:
+            mid = (l + m) // 2
+            self._compute(l, mid)
+            self._compute(mid, m)
+        self._complete(l, (l + m) // 2, (l + m) // 2, m)
+
+    def _multiply(self, rows, inner, cols):
+        """
+        Acumula en P[(B, C), rows, cols] el producto T[B, rows, inner] x T[C, inner, cols]
+        para cada par (B, C).
+        """
+        T, P = self.T, self.P
+        for p, ((b, c), _) in enumerate(self.pairs):
+            left = T[b, rows, inner]
+            right = T[c, inner, cols]
+            if not left.any() or not right.any():
+                continue
+            product = left.astype(np.float32) @ right.astype(np.float32)
+            P[p, rows, cols] |= product > 0
+
+    def _complete(self, l, m, l2, m2):
+        """
+        Completa el bloque [l, m) x [l2, m2) (con m <= l2), suponiendo conocidos los
+        bloques diagonales [l, m) y [l2, m2) y acumuladas en P las contribuciones
+        de los puntos de corte en [m, l2).
+        """
+        if m - l <= self.leaf_size:
+            self._complete_leaf(l, m, l2, m2)
+            return
+        a = (l + m) // 2
+        b = (l2 + m2) // 2
+        top, bottom = slice(l, a), slice(a, m)
+        left, right = slice(l2, b), slice(b, m2)
+
+        # Inferior izquierdo: el más cercano a la diagonal
+        self._complete(a, m, l2, b)
+        # Superior izquierdo
+        self._multiply(top, bottom, left)
+        self._complete(l, a, l2, b)
+        # Inferior derecho
+        self._multiply(bottom, left, right)
+        self._complete(a, m, b, m2)
+        # Superior derecho
+        self._multiply(top, bottom, right)
+        self._multiply(top, left, right)
+        self._complete(l, a, b, m2)
+
+    def _local_arrays(self, rows, inner_left, inner_right, cols):
+        """
+        Arma las copias locales empaquetadas en bits usadas por las hojas:
+        X[A, i, k] = T[A, i, k] para k en inner_left ∪ inner_right (filas de `rows`)
+        e Y[A, j, k] = T[A, k, j] para k en inner_left ∪ inner_right (columnas de `cols`).
+        """
+        T = self.T
+        X = np.packbits(np.concatenate([T[:, rows, inner_left], T[:, rows, inner_right]], axis=2),
+                        axis=2)
+        Y = np.packbits(np.concatenate([T[:, inner_left, cols].transpose(0, 2, 1),
+                                        T[:, inner_right, cols].transpose(0, 2, 1)], axis=2),
+                        axis=2)
+        return X, Y
+
+    def _apply_front(self, X, Y, found, i, j, x_offset, known=None):
+        """
+        Calcula un conjunto de celdas independientes (i, j) (índices locales) a partir
+        de X e Y, y registra los no terminales obtenidos en `found`, X e Y.
+        """
+        lefts_b, rights_c, produces = self._pair_arrays
+        hits = (X[lefts_b[:, None], i] & Y[rights_c[:, None], j]).any(axis=2)
+        if known is not None:
+            hits |= known[:, i, j]
+        if not hits.any():
+            return
+        # (no terminales x pares) @ (pares x celdas): qué A se obtienen en cada celda
+        new = (produces @ hits.astype(np.float32)) > 0
+        a_idx, cell = np.nonzero(new)
+        i_new, j_new = i[cell], j[cell]
+        found[a_idx, i_new, j_new] = True
+        # packbits guarda los bits en orden big-endian dentro de cada byte
+        x_col = x_offset + j_new
+        X[a_idx, i_new, x_col >> 3] |= (128 >> (x_col & 7)).astype(np.uint8)
+        Y[a_idx, j_new, i_new >> 3] |= (128 >> (i_new & 7)).astype(np.uint8)
+
+    def _compute_leaf(self, l, m):
+        """
+        Calcula un bloque diagonal pequeño al estilo CYK, una diagonal por vez:
+        todas las celdas con la misma longitud j - i son independientes.
+        """
+        block = slice(l, m)
+        size = m - l
+        empty = slice(l, l)
+        X, Y = self._local_arrays(block, block, empty, block)
+        found = self.T[:, block, block].copy()
+        for length in range(2, size):
+            i = np.arange(0, size - length)
+            self._apply_front(X, Y, found, i, i + length, 0)
+        self.T[:, block, block] = found
+
+    def _complete_leaf(self, l, m, l2, m2):
+        """
+        Completa un bloque pequeño por frentes de onda: la celda (i, j) depende de
+        celdas del mismo bloque con fila mayor (misma columna) o columna menor (misma
+        fila), así que las celdas con igual (m - 1 - i) + (j - l2) son independientes
+        y se calculan juntas.
+
+        Las filas y columnas involucradas se copian a arreglos locales empaquetados en
+        bits (ver `_local_arrays`). Como T es triangular superior, el AND de ambas ya
+        descarta los cortes fuera de (i, m) ∪ [l2, j) sin necesidad de máscaras, y cada
+        frente se resuelve para todos los pares (B, C) con unas pocas operaciones.
+        """
+        height, width = m - l, m2 - l2
+        rows, cols = slice(l, m), slice(l2, m2)
+        X, Y = self._local_arrays(rows, rows, cols, cols)
+        found = self.T[:, rows, cols].copy()
+        known = self.P[:, rows, cols]
+
+        for front in range(height + width - 1):
+            r = np.arange(max(0, front - width + 1), min(height, front + 1))
+            i = height - 1 - r
+            j = front - r
+            keep = l2 + j > l + i + 1  # las celdas de longitud 1 son las de los terminales
+            if not keep.all():
+                i, j = i[keep], j[keep]
+            if len(i):
+                self._apply_front(X, Y, found, i, j, height, known)
+
+        self.T[:, rows, cols] = found